@@ -11,13 +11,23 @@ class Profile(models.Model):
     def __str__(self):
         return self.user.username
 
-    # resizing images
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # remember the stored file to detect a new upload in save()
+        instance._saved_avatar = instance.avatar.name
+        return instance
+
+    # resizing images only when a new avatar was uploaded
     def save(self, *args, **kwargs):
-        super().save()
+        avatar_changed = self.avatar.name != getattr(self, '_saved_avatar', None)
+        super().save(*args, **kwargs)
+        self._saved_avatar = self.avatar.name
 
-        img = Image.open(self.avatar.path)
+        if not avatar_changed or self.avatar.name == 'default_avatar.png':
+            return
 
-        if img.height > 250 or img.width > 250:
-            new_img = (250, 250)
-            img.thumbnail(new_img)
-            img.save(self.avatar.path)
+        with Image.open(self.avatar.path) as img:
+            if img.height > 250 or img.width > 250:
+                img.thumbnail((250, 250))
+                img.save(self.avatar.path)
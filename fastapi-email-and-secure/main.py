@@ -1,11 +1,8 @@
-import re
-from ipaddress import ip_address
-from typing import Callable
 from pathlib import Path
 
 import redis.asyncio as redis
-from fastapi import FastAPI, Depends, HTTPException, Request, status
-from fastapi.responses import JSONResponse, HTMLResponse
+from fastapi import FastAPI, Depends, HTTPException, Request
+from fastapi.responses import HTMLResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
@@ -16,13 +13,10 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from src.database.db import get_db
 from src.routes import todos, auth, users
 from src.conf.config import config
+from src.services.request_filters import RequestFilterMiddleware, user_agent_filter
+from src.services.user_agents import UserAgentFilter
 
 app = FastAPI()
-banned_ips = [
-    ip_address("192.168.1.1"),
-    ip_address("192.168.1.2"),
-    ip_address("127.0.0.1"),
-]
 origins = ["*"]
 
 app.add_middleware(
@@ -31,32 +25,13 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
-# @app.middleware("http")
-# async def ban_ips(request: Request, call_next: Callable):
-#     ip = ip_address(request.client.host)
-#     if ip in banned_ips:
-#         return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"detail": "You are banned"})
-#     response = await call_next(request)
-#     return response
-
-user_agent_ban_list = [r"Googlebot", r"Python-urllib"]
-
-
-@app.middleware("http")
-async def user_agent_ban_middleware(request: Request, call_next: Callable):
-    print(request.headers.get("Authorization"))
-    user_agent = request.headers.get("user-agent")
-    print(user_agent)
-    for ban_pattern in user_agent_ban_list:
-        if re.search(ban_pattern, user_agent):
-            return JSONResponse(
-                status_code=status.HTTP_403_FORBIDDEN,
-                content={"detail": "You are banned"},
-            )
-    response = await call_next(request)
-    return response
+user_agents = UserAgentFilter(config.USER_AGENT_BAN_LIST, ignore_case=config.USER_AGENT_BAN_IGNORE_CASE,
+                              cache_size=config.USER_AGENT_CACHE_SIZE)
+
+app.add_middleware(RequestFilterMiddleware, filters=[user_agent_filter(user_agents)])
 
 
 BASE_DIR = Path(".")
@@ -0,0 +1,26 @@
+"""todos keyset index
+
+Revision ID: b4d2f6a8c0e1
+Revises: de77979c6ae6
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d2f6a8c0e1'
+down_revision: Union[str, None] = 'de77979c6ae6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_todos_user_id_id', 'todos', ['user_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_todos_user_id_id', table_name='todos')
@@ -13,9 +13,20 @@ class Settings(BaseSettings):
     MAIL_FROM: str = "postgres"
     MAIL_PORT: int = 567234
     MAIL_SERVER: str = "postgres"
+    MAIL_STARTTLS: bool = False
+    MAIL_SSL_TLS: bool = True
+    MAIL_USE_CREDENTIALS: bool = True
+    MAIL_VALIDATE_CERTS: bool = True
     REDIS_DOMAIN: str = 'localhost'
     REDIS_PORT: int = 6379
     REDIS_PASSWORD: str | None = None
+    USER_AGENT_BAN_LIST: list[str] = [r"Googlebot", r"Python-urllib"]
+    USER_AGENT_BAN_IGNORE_CASE: bool = False
+    USER_AGENT_CACHE_SIZE: int = 4096
+    BATCH_MAX_SIZE: int = 1000
+    BATCH_UNIT_SIZE: int = 50
+    BATCH_RATE_UNITS: int = 40
+    BATCH_RATE_SECONDS: int = 60
     CLD_NAME: str = 'abc'
     CLD_API_KEY: int = 326488457974591
     CLD_API_SECRET: str = "secret"
@@ -2,7 +2,7 @@ import enum
 from datetime import date
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Integer, ForeignKey, DateTime, func, Enum, Boolean
+from sqlalchemy import String, Integer, ForeignKey, DateTime, func, Enum, Boolean, Index
 from sqlalchemy.orm import DeclarativeBase
 
 
@@ -26,6 +26,8 @@ class Todo(Base):
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey("users.id"), nullable=True)
     user: Mapped["User"] = relationship("User", backref="todos", lazy="joined")
 
+    __table_args__ = (Index("ix_todos_user_id_id", "user_id", "id"),)
+
 
 class Role(enum.Enum):
     admin: str = "admin"
@@ -1,18 +1,27 @@
-from sqlalchemy import select
+from sqlalchemy import and_, delete, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.entity.models import Todo, User
-from src.schemas.todo import TodoSchema, TodoUpdateSchema
+from src.schemas.todo import TodoSchema, TodoUpdateSchema, TodoBatchSchema, TodoBatchUpdateSchema
 
 
-async def get_todos(limit: int, offset: int, db: AsyncSession, user: User):
-    stmt = select(Todo).filter_by(user=user).offset(offset).limit(limit)
+def paginate(stmt, limit: int, offset: int, after_id: int | None):
+    # keyset mode when after_id is given, legacy OFFSET mode otherwise
+    if after_id is not None:
+        stmt = stmt.where(Todo.id > after_id)
+    else:
+        stmt = stmt.offset(offset)
+    return stmt.order_by(Todo.id).limit(limit)
+
+
+async def get_todos(limit: int, offset: int, db: AsyncSession, user: User, after_id: int | None = None):
+    stmt = paginate(select(Todo).filter_by(user=user), limit, offset, after_id)
     todos = await db.execute(stmt)
     return todos.scalars().all()
 
 
-async def get_all_todos(limit: int, offset: int, db: AsyncSession):
-    stmt = select(Todo).offset(offset).limit(limit)
+async def get_all_todos(limit: int, offset: int, db: AsyncSession, after_id: int | None = None):
+    stmt = paginate(select(Todo), limit, offset, after_id)
     todos = await db.execute(stmt)
     return todos.scalars().all()
 
@@ -31,24 +40,65 @@ async def create_todo(body: TodoSchema, db: AsyncSession, user: User):
     return todo
 
 
+# columns returned by UPDATE/DELETE ... RETURNING, shaped like TodoResponse
+TODO_COLUMNS = (Todo.id, Todo.title, Todo.description, Todo.completed, Todo.created_at, Todo.updated_at)
+
+
+def owner_row(user: User) -> dict:
+    # the owner is always the caller (WHERE user_id = user.id), no join needed
+    return {"id": user.id, "username": user.username, "email": user.email, "avatar": user.avatar, "role": user.role}
+
+
+async def write_todo(stmt, db: AsyncSession, user: User) -> dict | None:
+    # single round trip instead of SELECT -> mutate -> COMMIT -> refresh;
+    # the row is read before COMMIT, so expire_on_commit does not touch it
+    result = await db.execute(stmt.returning(*TODO_COLUMNS))
+    row = result.mappings().one_or_none()
+    await db.commit()
+    if row is None:
+        return None
+    return {**row, "user": owner_row(user)}
+
+
+def owned_todo(todo_id: int, user: User):
+    return and_(Todo.id == todo_id, Todo.user_id == user.id)
+
+
 async def update_todo(todo_id: int, body: TodoUpdateSchema, db: AsyncSession, user: User):
-    stmt = select(Todo).filter_by(id=todo_id, user=user)
-    result = await db.execute(stmt)
-    todo = result.scalar_one_or_none()
-    if todo:
-        todo.title = body.title
-        todo.description = body.description
-        todo.completed = body.completed
-        await db.commit()
-        await db.refresh(todo)
-    return todo
+    stmt = update(Todo).where(owned_todo(todo_id, user)).values(**body.model_dump())
+    return await write_todo(stmt, db, user)
 
 
 async def delete_todo(todo_id: int, db: AsyncSession, user: User):
-    stmt = select(Todo).filter_by(id=todo_id, user=user)
-    todo = await db.execute(stmt)
-    todo = todo.scalar_one_or_none()
-    if todo:
-        await db.delete(todo)
-        await db.commit()
-    return todo
+    return await write_todo(delete(Todo).where(owned_todo(todo_id, user)), db, user)
+
+
+def batch_target(body: TodoBatchSchema, user: User, limit: int):
+    # always scoped to the owner; a filter selects at most <limit> lowest ids (no UPDATE ... LIMIT in Postgres)
+    owned = Todo.user_id == user.id
+    if body.ids is not None:
+        return and_(owned, Todo.id.in_(body.ids))
+    conditions = [owned]
+    if body.filter.completed is not None:
+        conditions.append(Todo.completed == body.filter.completed)
+    if body.filter.created_before is not None:
+        conditions.append(Todo.created_at < body.filter.created_before)
+    chosen = select(Todo.id).where(*conditions).order_by(Todo.id).limit(limit)
+    return and_(owned, Todo.id.in_(chosen.scalar_subquery()))
+
+
+async def write_todos_batch(stmt, body: TodoBatchSchema, db: AsyncSession) -> dict:
+    # one set-based statement for the whole batch, outcome reported per id
+    result = await db.execute(stmt.returning(Todo.id))
+    affected = sorted(result.scalars().all())
+    await db.commit()
+    return {"affected": affected, "not_found": sorted(set(body.ids or ()) - set(affected))}
+
+
+async def update_todos_batch(body: TodoBatchUpdateSchema, db: AsyncSession, user: User, limit: int) -> dict:
+    stmt = update(Todo).where(batch_target(body, user, limit)).values(completed=body.completed)
+    return await write_todos_batch(stmt, body, db)
+
+
+async def delete_todos_batch(body: TodoBatchSchema, db: AsyncSession, user: User, limit: int) -> dict:
+    return await write_todos_batch(delete(Todo).where(batch_target(body, user, limit)), body, db)
@@ -1,5 +1,5 @@
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from libgravatar import Gravatar
 
@@ -36,14 +36,15 @@ async def update_token(user: User, token: str | None, db: AsyncSession):
 
 
 async def confirmed_email(email: str, db: AsyncSession) -> None:
-    user = await get_user_by_email(email, db)
-    user.confirmed = True
+    await db.execute(update(User).where(User.email == email).values(confirmed=True))
     await db.commit()
 
 
 async def update_avatar_url(email: str, url: str | None, db: AsyncSession) -> User:
-    user = await get_user_by_email(email, db)
-    user.avatar = url
+    # UPDATE ... RETURNING gives the updated user; expunge before COMMIT so expire_on_commit
+    # does not wipe its attributes and it can be pickled into the cache without another SELECT
+    result = await db.execute(update(User).where(User.email == email).values(avatar=url).returning(User))
+    user = result.scalar_one()
+    db.expunge(user)
     await db.commit()
-    await db.refresh(user)
     return user
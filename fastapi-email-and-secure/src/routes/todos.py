@@ -1,11 +1,15 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Path, Query
+from fastapi import APIRouter, HTTPException, Depends, status, Path, Query, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.conf.config import config
 from src.database.db import get_db
 from src.entity.models import User, Role
 from src.repository import todos as repositories_todos
-from src.schemas.todo import TodoSchema, TodoUpdateSchema, TodoResponse
+from src.schemas.todo import (TodoSchema, TodoUpdateSchema, TodoResponse, TodoBatchSchema, TodoBatchUpdateSchema,
+                              BatchResult)
 from src.services.auth import auth_service
+from src.services.pagination import NEXT_CURSOR_HEADER, decode_cursor, next_cursor
+from src.services.rate_limit import batch_limiter
 from src.services.roles import RoleAccess
 
 router = APIRouter(prefix='/todos', tags=['todos'])
@@ -14,16 +18,24 @@ access_to_route_all = RoleAccess([Role.admin, Role.moderator])
 
 
 @router.get("/", response_model=list[TodoResponse])
-async def get_todos(limit: int = Query(10, ge=10, le=500), offset: int = Query(0, ge=0),
-                    db: AsyncSession = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
-    todos = await repositories_todos.get_todos(limit, offset, db, user)
+async def get_todos(response: Response, limit: int = Query(10, ge=10, le=500), offset: int = Query(0, ge=0),
+                    cursor: str | None = Query(None), db: AsyncSession = Depends(get_db),
+                    user: User = Depends(auth_service.get_current_user)):
+    after_id = decode_cursor(cursor) if cursor else None
+    todos = await repositories_todos.get_todos(limit, offset, db, user, after_id)
+    if cursor_value := next_cursor(todos, limit):
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
     return todos
 
 
 @router.get("/all", response_model=list[TodoResponse], dependencies=[Depends(access_to_route_all)])
-async def get_all_todos(limit: int = Query(10, ge=10, le=500), offset: int = Query(0, ge=0),
-                        db: AsyncSession = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
-    todos = await repositories_todos.get_all_todos(limit, offset, db)
+async def get_all_todos(response: Response, limit: int = Query(10, ge=10, le=500), offset: int = Query(0, ge=0),
+                        cursor: str | None = Query(None), db: AsyncSession = Depends(get_db),
+                        user: User = Depends(auth_service.get_current_user)):
+    after_id = decode_cursor(cursor) if cursor else None
+    todos = await repositories_todos.get_all_todos(limit, offset, db, after_id)
+    if cursor_value := next_cursor(todos, limit):
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
     return todos
 
 
@@ -43,6 +55,35 @@ async def create_todo(body: TodoSchema, db: AsyncSession = Depends(get_db),
     return todo
 
 
+async def batch_charge(body: TodoBatchSchema, user: User) -> None:
+    # an id list is charged upfront by size; a filter is charged one unit now and the rest in batch_settle
+    size = len(body.ids) if body.ids is not None else 1
+    await batch_limiter.hit(f"todos:{user.id}", batch_limiter.weight(size))
+
+
+async def batch_settle(body: TodoBatchSchema, user: User, result: dict) -> None:
+    if body.filter is not None and len(result["affected"]) > batch_limiter.unit_size:
+        await batch_limiter.charge(f"todos:{user.id}", batch_limiter.weight(len(result["affected"])) - 1)
+
+
+@router.post("/batch/update", response_model=BatchResult)
+async def update_todos_batch(body: TodoBatchUpdateSchema, db: AsyncSession = Depends(get_db),
+                             user: User = Depends(auth_service.get_current_user)):
+    await batch_charge(body, user)
+    result = await repositories_todos.update_todos_batch(body, db, user, config.BATCH_MAX_SIZE)
+    await batch_settle(body, user, result)
+    return result
+
+
+@router.post("/batch/delete", response_model=BatchResult)
+async def delete_todos_batch(body: TodoBatchSchema, db: AsyncSession = Depends(get_db),
+                             user: User = Depends(auth_service.get_current_user)):
+    await batch_charge(body, user)
+    result = await repositories_todos.delete_todos_batch(body, db, user, config.BATCH_MAX_SIZE)
+    await batch_settle(body, user, result)
+    return result
+
+
 @router.put("/{todo_id}")
 async def update_todo(body: TodoUpdateSchema, todo_id: int = Path(ge=1), db: AsyncSession = Depends(get_db),
                       user: User = Depends(auth_service.get_current_user)):
@@ -1,8 +1,9 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import BaseModel, EmailStr, Field
+from pydantic import BaseModel, EmailStr, Field, model_validator
 
+from src.conf.config import config
 from src.schemas.user import UserResponse
 
 
@@ -27,3 +28,35 @@ class TodoResponse(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class TodoBatchFilter(BaseModel):
+    # at least one criterion: an empty filter would match all of the owner's todos
+    completed: Optional[bool] = None
+    created_before: datetime | None = None
+
+    @model_validator(mode="after")
+    def validate_criteria(self):
+        if self.completed is None and self.created_before is None:
+            raise ValueError("filter must have at least one of completed or created_before")
+        return self
+
+
+class TodoBatchSchema(BaseModel):
+    ids: list[int] | None = Field(None, min_length=1, max_length=config.BATCH_MAX_SIZE)
+    filter: TodoBatchFilter | None = None
+
+    @model_validator(mode="after")
+    def validate_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("exactly one of ids or filter must be given")
+        return self
+
+
+class TodoBatchUpdateSchema(TodoBatchSchema):
+    completed: bool
+
+
+class BatchResult(BaseModel):
+    affected: list[int] = []
+    not_found: list[int] = []
@@ -5,6 +5,7 @@ from fastapi_mail.errors import ConnectionErrors
 from pydantic import EmailStr
 
 from src.services.auth import auth_service
+from src.services.email_templates import email_templates
 from src.conf.config import config
 
 conf = ConnectionConfig(
@@ -14,25 +15,27 @@ conf = ConnectionConfig(
     MAIL_PORT=config.MAIL_PORT,
     MAIL_SERVER=config.MAIL_SERVER,
     MAIL_FROM_NAME="TODO Systems",
-    MAIL_STARTTLS=False,
-    MAIL_SSL_TLS=True,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=True,
+    MAIL_STARTTLS=config.MAIL_STARTTLS,
+    MAIL_SSL_TLS=config.MAIL_SSL_TLS,
+    USE_CREDENTIALS=config.MAIL_USE_CREDENTIALS,
+    VALIDATE_CERTS=config.MAIL_VALIDATE_CERTS,
     TEMPLATE_FOLDER=Path(__file__).parent / 'templates',
 )
+mail = FastMail(conf)
 
 
 async def send_email(email: EmailStr, username: str, host: str):
     try:
         token_verification = auth_service.create_email_token({"sub": email})
+        body = email_templates.render("verify_email.html",
+                                      {"host": host, "username": username, "token": token_verification})
         message = MessageSchema(
             subject="Confirm your email ",
             recipients=[email],
-            template_body={"host": host, "username": username, "token": token_verification},
+            body=body,
             subtype=MessageType.html
         )
 
-        fm = FastMail(conf)
-        await fm.send_message(message, template_name="verify_email.html")
+        await mail.send_message(message)
     except ConnectionErrors as err:
         print(err)
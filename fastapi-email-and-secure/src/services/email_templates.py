@@ -0,0 +1,73 @@
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Iterable
+
+from jinja2 import Environment, FileSystemLoader, Template, select_autoescape
+from markupsafe import escape
+
+
+MARKER = "\x00{}\x00"
+MARKER_RE = re.compile("\x00(\\d+)\x00")
+
+
+class EmailTemplates:
+    """Email templates compiled once; plain-substitution templates are split into static fragments.
+
+    A template is rendered once with markers in place of its variables and cut into fragments, so each
+    recipient costs a ''.join of fragments and escaped values. Templates that do more than substitute
+    (checked with a probe render) fall back to the compiled Jinja template.
+    """
+
+    def __init__(self, folder: Path, preload: Iterable[str] = (), fragment_cache_size: int = 128):
+        self.env = Environment(loader=FileSystemLoader(folder), autoescape=select_autoescape(["html", "xml"]),
+                               auto_reload=False, cache_size=-1)
+        self.templates: dict[str, Template] = {name: self.env.get_template(name) for name in preload}
+        self.fragments = lru_cache(maxsize=fragment_cache_size)(self._fragments)
+
+    def get(self, name: str) -> Template:
+        template = self.templates.get(name)
+        if template is None:
+            template = self.templates[name] = self.env.get_template(name)
+        return template
+
+    def _fragments(self, name: str, variables: tuple[str, ...]) -> tuple[list[str], list[int], bool] | None:
+        template = self.get(name)
+        parts = MARKER_RE.split(template.render({var: MARKER.format(i) for i, var in enumerate(variables)}))
+        fragments, slots = parts[0::2], [int(i) for i in parts[1::2]]
+        probe = {var: f"<probe {i}&>" for i, var in enumerate(variables)}
+        autoescape = self.env.autoescape(name) if callable(self.env.autoescape) else self.env.autoescape
+        if template.render(probe) != self._fill(fragments, slots, autoescape, variables, probe):
+            return None
+        return fragments, slots, autoescape
+
+    @staticmethod
+    def _fill(fragments: list[str], slots: list[int], autoescape: bool, variables: tuple[str, ...],
+              context: dict) -> str:
+        values = [str(escape(context[var])) if autoescape else str(context[var]) for var in variables]
+        chunks = [fragments[0]]
+        for slot, fragment in zip(slots, fragments[1:]):
+            chunks.append(values[slot])
+            chunks.append(fragment)
+        return "".join(chunks)
+
+    def render(self, name: str, context: dict) -> str:
+        variables = tuple(sorted(context))
+        compiled = self.fragments(name, variables)
+        if compiled is None:
+            return self.get(name).render(context)
+        return self._fill(*compiled, variables, context)
+
+    def render_many(self, name: str, contexts: Iterable[dict]) -> list[str]:
+        rendered = []
+        compiled, variables = None, None
+        for context in contexts:
+            keys = tuple(sorted(context))
+            if keys != variables:
+                variables, compiled = keys, self.fragments(name, keys)
+            rendered.append(self.get(name).render(context) if compiled is None
+                            else self._fill(*compiled, variables, context))
+        return rendered
+
+
+email_templates = EmailTemplates(Path(__file__).parent / 'templates', preload=["verify_email.html"])
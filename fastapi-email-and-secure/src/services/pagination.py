@@ -0,0 +1,31 @@
+import base64
+import json
+
+from fastapi import HTTPException, status
+
+
+# Keyset pagination: the client gets an opaque cursor (X-Next-Cursor header) holding the id of the
+# last row on the page, and the next page is WHERE id > :last_id ORDER BY id LIMIT :limit.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(raw)["id"]
+        if not isinstance(last_id, int):
+            raise ValueError(last_id)
+        return last_id
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+def next_cursor(items: list, limit: int) -> str | None:
+    if len(items) < limit:
+        return None
+    return encode_cursor(items[-1].id)
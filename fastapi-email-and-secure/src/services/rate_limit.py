@@ -0,0 +1,42 @@
+import math
+import time
+
+from fastapi import HTTPException, status
+from fastapi_limiter import FastAPILimiter
+
+from src.conf.config import config
+
+
+class WeightedRateLimiter:
+    """ Rate limit counted in units instead of requests: a batch over <n> rows is one request
+        costing ceil(n / unit_size) units. Fixed window of <seconds>, INCRBY on the fastapi-limiter
+        Redis client (initialised in main.py). """
+
+    def __init__(self, units: int, seconds: int, unit_size: int, prefix: str = "ratelimit:weighted:"):
+        self.units = units
+        self.seconds = seconds
+        self.unit_size = unit_size
+        self.prefix = prefix
+
+    def weight(self, size: int) -> int:
+        return max(1, math.ceil(size / self.unit_size))
+
+    async def charge(self, key: str, weight: int) -> int:
+        # one counter per window, expiring with it
+        window = int(time.time() // self.seconds)
+        name = f"{self.prefix}{key}:{window}"
+        async with FastAPILimiter.redis.pipeline(transaction=True) as pipe:
+            pipe.incrby(name, weight)
+            pipe.expire(name, self.seconds)
+            used, _ = await pipe.execute()
+        return used
+
+    async def hit(self, key: str, weight: int = 1) -> None:
+        used = await self.charge(key, weight)
+        if used > self.units:
+            retry_after = self.seconds - int(time.time() % self.seconds)
+            raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS, detail="Too Many Requests",
+                                headers={"Retry-After": str(retry_after)})
+
+
+batch_limiter = WeightedRateLimiter(config.BATCH_RATE_UNITS, config.BATCH_RATE_SECONDS, config.BATCH_UNIT_SIZE)
@@ -0,0 +1,44 @@
+import json
+from typing import Callable, Sequence
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.services.user_agents import UserAgentFilter
+
+
+# A filter gets the ASGI scope and returns True when the request must be rejected
+RequestFilter = Callable[[Scope], bool]
+
+
+class RequestFilterMiddleware:
+    """Pure ASGI filter chain that rejects requests with 403 before routing, without BaseHTTPMiddleware."""
+
+    def __init__(self, app: ASGIApp, filters: Sequence[RequestFilter], status_code: int = 403,
+                 detail: str = "You are banned"):
+        self.app = app
+        self.filters = tuple(filters)
+        self.status_code = status_code
+        self._body = json.dumps({"detail": detail}).encode()
+        self._headers = [(b"content-type", b"application/json"), (b"content-length", str(len(self._body)).encode())]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            for request_filter in self.filters:
+                if request_filter(scope):
+                    await send({"type": "http.response.start", "status": self.status_code, "headers": self._headers})
+                    await send({"type": "http.response.body", "body": self._body})
+                    return
+        await self.app(scope, receive, send)
+
+
+def get_header(scope: Scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def user_agent_filter(user_agents: UserAgentFilter) -> RequestFilter:
+    def check(scope: Scope) -> bool:
+        return user_agents.is_banned(get_header(scope, b"user-agent"))
+    return check
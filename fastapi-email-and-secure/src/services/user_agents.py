@@ -0,0 +1,31 @@
+import re
+from functools import lru_cache
+from typing import Iterable
+
+
+class UserAgentFilter:
+    """Ban-list patterns compiled into a single alternation with an LRU cache keyed by the User-Agent."""
+
+    MAX_CACHED_LENGTH = 1024
+
+    def __init__(self, patterns: Iterable[str], ignore_case: bool = False, cache_size: int = 4096):
+        self.ignore_case = ignore_case
+        self.cache_size = cache_size
+        self.set_patterns(patterns)
+
+    def set_patterns(self, patterns: Iterable[str]) -> None:
+        patterns = list(patterns)
+        flags = re.IGNORECASE if self.ignore_case else 0
+        # cached answers belong to the old pattern list, so the cache is rebuilt with the regex
+        self._regex = re.compile("|".join(f"(?:{pattern})" for pattern in patterns), flags) if patterns else None
+        self._cached = lru_cache(maxsize=self.cache_size)(self._search)
+
+    def _search(self, user_agent: str) -> bool:
+        return self._regex.search(user_agent) is not None
+
+    def is_banned(self, user_agent: str | None) -> bool:
+        if self._regex is None or not user_agent:
+            return False
+        if len(user_agent) > self.MAX_CACHED_LENGTH:
+            return self._search(user_agent)
+        return self._cached(user_agent)
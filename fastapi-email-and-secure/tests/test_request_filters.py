@@ -0,0 +1,70 @@
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from src.services.request_filters import RequestFilterMiddleware, get_header, user_agent_filter
+from src.services.user_agents import UserAgentFilter
+
+BOT = "Mozilla/5.0 (compatible; Googlebot/2.1)"
+
+
+def header_filter(scope):
+    return get_header(scope, b"x-banned") is not None
+
+
+def make_app():
+    started = []
+
+    @asynccontextmanager
+    async def lifespan(app):
+        started.append(True)
+        yield
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.websocket("/ws")
+    async def websocket(ws: WebSocket):
+        await ws.accept()
+        await ws.send_text("hello")
+        await ws.close()
+
+    app.add_middleware(RequestFilterMiddleware,
+                       filters=[header_filter, user_agent_filter(UserAgentFilter([r"Googlebot", r"Python-urllib"]))])
+    return app, started
+
+
+def test_blocked_requests_get_the_same_403():
+    app, _ = make_app()
+    client = TestClient(app)
+    by_agent = client.get("/ping", headers={"user-agent": BOT})
+    by_filter = client.get("/ping", headers={"x-banned": "1"})
+    for response in (by_agent, by_filter):
+        assert response.status_code == 403
+        assert response.json() == {"detail": "You are banned"}
+        assert response.headers["content-type"] == "application/json"
+        assert int(response.headers["content-length"]) == len(response.content)
+    assert by_agent.content == by_filter.content
+
+
+def test_allowed_requests_reach_the_app():
+    app, _ = make_app()
+    client = TestClient(app)
+    assert client.get("/ping").json() == {"ok": True}
+    # a missing User-Agent must not crash the filter
+    assert client.get("/ping", headers={"user-agent": ""}).json() == {"ok": True}
+    # the default ban list is case-sensitive
+    assert client.get("/ping", headers={"user-agent": BOT.lower()}).json() == {"ok": True}
+
+
+def test_lifespan_and_websocket_pass_through():
+    app, started = make_app()
+    with TestClient(app) as client:
+        assert started == [True]
+        # the filters only check HTTP requests
+        with client.websocket_connect("/ws", headers={"user-agent": BOT, "x-banned": "1"}) as ws:
+            assert ws.receive_text() == "hello"
@@ -0,0 +1,28 @@
+import pytest
+from pydantic import ValidationError
+
+from src.conf.config import config
+from src.schemas.todo import TodoBatchSchema, TodoBatchUpdateSchema
+
+
+def test_batch_target_is_ids_or_filter():
+    assert TodoBatchSchema.model_validate({"ids": [1, 2]}).ids == [1, 2]
+    assert TodoBatchSchema.model_validate({"filter": {"completed": False}}).filter.completed is False
+    for body in ({}, {"ids": [1], "filter": {"completed": True}}, {"ids": []}):
+        with pytest.raises(ValidationError):
+            TodoBatchSchema.model_validate(body)
+
+
+def test_empty_filter_is_rejected():
+    # an empty filter would match all of the owner's todos
+    for body in ({"filter": {}}, {"filter": {"completed": None, "created_before": None}}):
+        with pytest.raises(ValidationError):
+            TodoBatchSchema.model_validate(body)
+        with pytest.raises(ValidationError):
+            TodoBatchUpdateSchema.model_validate({**body, "completed": True})
+
+
+def test_ids_limited_by_schema():
+    TodoBatchSchema.model_validate({"ids": list(range(config.BATCH_MAX_SIZE))})
+    with pytest.raises(ValidationError):
+        TodoBatchSchema.model_validate({"ids": list(range(config.BATCH_MAX_SIZE + 1))})
@@ -0,0 +1,141 @@
+""" Скiльки листiв верифiкацiї на секунду реально доходить до SMTP: бенчмарк реєструє <--users> користувачiв
+    через /api/auth/signup, потiм просить повторний лист через /api/auth/request_email i чекає, поки всi листи
+    прийдуть до вбудованої SMTP-заглушки (benchmarks/smtp_sink.py). Працює офлайн, з будь-яким з двох застосункiв.
+
+    1) hw-fastAPI (листи вiдправляє окремий процес з черги):
+        MAIL_SERVER=127.0.0.1 MAIL_PORT=8025 MAIL_STARTTLS=false MAIL_SSL_TLS=false uvicorn main:app --port 8000
+        MAIL_SERVER=127.0.0.1 MAIL_PORT=8025 MAIL_STARTTLS=false MAIL_SSL_TLS=false python -m src.workers.email_worker
+    2) fastapi-email-and-secure - тi самi змiннi оточення, лише без воркера.
+    3) з каталогу hw-fastAPI:
+        python -m benchmarks.email_throughput --base-url http://127.0.0.1:8000 --users 500 --concurrency 50
+
+    Кожен запуск використовує новi адреси (<--prefix> + мiтка часу), тож БД можна не чистити. """
+import argparse
+import asyncio
+import time
+from collections import Counter, defaultdict, deque
+
+import httpx
+
+from benchmarks.smtp_sink import SMTPSink
+
+
+def percentile(values: list[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(q / 100 * len(values)), len(values) - 1)]
+
+
+def describe(name: str, latencies: list[float], statuses: Counter, elapsed: float) -> None:
+    failures = sum(count for status, count in statuses.items() if not 200 <= status < 300)
+    print(f"{name:>14}: {len(latencies)} requests in {elapsed:.2f}s ({len(latencies) / elapsed:.1f} req/s), "
+          f"failures: {failures} {dict(statuses)}")
+    print(f"{'':>14}  latency ms p50={percentile(latencies, 50) * 1000:.1f} "
+          f"p90={percentile(latencies, 90) * 1000:.1f} p99={percentile(latencies, 99) * 1000:.1f} "
+          f"max={max(latencies, default=0) * 1000:.1f}")
+
+
+class EmailBenchmark:
+    def __init__(self, base_url: str, users: int, concurrency: int, prefix: str, password: str):
+        self.base_url = base_url.rstrip("/")
+        self.users = users
+        self.concurrency = concurrency
+        self.password = password
+        run = int(time.time())
+        self.emails = [f"{prefix}-{run}-{i}@example.com" for i in range(users)]
+        # час вiдправки HTTP-запиту, пiсля якого чекаємо лист, - FIFO на кожну адресу
+        self.pending: dict[str, deque[float]] = defaultdict(deque)
+        self.delivery: list[float] = []
+        self.expected = 0
+        self.delivered = asyncio.Event()
+        self.first_request: float | None = None
+        self.last_delivery: float | None = None
+
+    def on_message(self, recipients: list[str], data: bytes, received_at: float) -> None:
+        for recipient in recipients:
+            sent = self.pending.get(recipient)
+            if sent:
+                self.delivery.append(received_at - sent.popleft())
+                self.last_delivery = received_at
+        if self.expected and len(self.delivery) >= self.expected:
+            self.delivered.set()
+
+    async def _phase(self, client: httpx.AsyncClient, name: str, path: str, payloads: list[dict]) -> None:
+        semaphore = asyncio.Semaphore(self.concurrency)
+        latencies: list[float] = []
+        statuses: Counter = Counter()
+
+        async def call(payload: dict) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                self.first_request = self.first_request or started
+                self.pending[payload["email"]].append(started)
+                try:
+                    response = await client.post(path, json=payload)
+                    status = response.status_code
+                except httpx.HTTPError:
+                    status = 0
+                latencies.append(time.perf_counter() - started)
+                statuses[status] += 1
+                if 200 <= status < 300:
+                    self.expected += 1
+                else:
+                    # лист на цей запит не очiкується
+                    self.pending[payload["email"]].remove(started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(call(payload) for payload in payloads))
+        describe(name, latencies, statuses, time.perf_counter() - started)
+
+    async def run(self, timeout: float, skip_request_email: bool) -> None:
+        async with httpx.AsyncClient(base_url=self.base_url, timeout=30,
+                                     limits=httpx.Limits(max_connections=self.concurrency)) as client:
+            await self._phase(client, "signup", "/api/auth/signup",
+                              [{"username": f"bench{i}", "email": email, "password": self.password}
+                               for i, email in enumerate(self.emails)])
+            if not skip_request_email:
+                await self._phase(client, "request_email", "/api/auth/request_email",
+                                  [{"email": email} for email in self.emails])
+        if len(self.delivery) < self.expected:
+            try:
+                await asyncio.wait_for(self.delivered.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def report(self) -> None:
+        delivered = len(self.delivery)
+        print(f"{'emails':>14}: {delivered}/{self.expected} delivered, lost/late: {self.expected - delivered}")
+        if delivered and self.first_request is not None:
+            elapsed = self.last_delivery - self.first_request
+            print(f"{'':>14}  {delivered / elapsed:.1f} emails/s over {elapsed:.2f}s")
+            print(f"{'':>14}  request->SMTP ms p50={percentile(self.delivery, 50) * 1000:.1f} "
+                  f"p90={percentile(self.delivery, 90) * 1000:.1f} p99={percentile(self.delivery, 99) * 1000:.1f} "
+                  f"max={max(self.delivery) * 1000:.1f}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    benchmark = EmailBenchmark(args.base_url, args.users, args.concurrency, args.prefix, args.password)
+    sink = SMTPSink(args.smtp_host, args.smtp_port, args.fail_rate, on_message=benchmark.on_message)
+    await sink.start()
+    try:
+        await benchmark.run(args.timeout, args.skip_request_email)
+    finally:
+        await sink.stop()
+    benchmark.report()
+    print(f"{'smtp':>14}: connections={sink.connections} messages={sink.messages} rejected={sink.rejected}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Verification email throughput benchmark")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--prefix", default="bench")
+    parser.add_argument("--password", default="bench1")
+    parser.add_argument("--smtp-host", default="127.0.0.1")
+    parser.add_argument("--smtp-port", type=int, default=8025)
+    parser.add_argument("--fail-rate", type=float, default=0)
+    parser.add_argument("--timeout", type=float, default=60, help="seconds to wait for outstanding emails")
+    parser.add_argument("--skip-request-email", action="store_true")
+    asyncio.run(main(parser.parse_args()))
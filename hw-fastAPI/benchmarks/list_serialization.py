@@ -0,0 +1,124 @@
+""" Серiалiзацiя сторiнки контактiв: старий шлях (ORM-об'єкти [Contact] з вкладеним [User] ->
+    валiдацiя у [ContactResponseSchema] -> JSONResponse) проти нового (словники з проекцiї
+    src/repository/contacts.py -> contact_row() -> ORJSONResponse). Результат - рядкiв на секунду.
+    Запуск з каталогу hw-fastAPI (БД не потрiбна, рядки генеруються в пам'ятi):
+        python -m benchmarks.list_serialization --rows 500 --repeat 200
+    З <--database-url> додатково замiрюється вибiрка з БД (ORM + lazy="joined" проти проекцiї):
+        python -m benchmarks.list_serialization --database-url postgresql+asyncpg://... """
+import argparse
+import asyncio
+import time
+from datetime import date, datetime, timedelta
+
+import orjson
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from fastapi.responses import JSONResponse, ORJSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+from src.entity.models import Contact, Role, User
+from src.repository.contacts import LIST_COLUMNS, LIST_USER_COLUMNS, contact_row
+from src.schemas.contact import ContactResponseSchema
+
+
+def make_rows(count: int) -> tuple[list[Contact], list[dict]]:
+    user = User(id=1, username="bench", email="bench@example.com", password="x" * 60, role=Role.user,
+                avatar="/api/users/avatars/bench-250.webp", confirmed=True)
+    now = datetime.now()
+    contacts, rows = [], []
+    for i in range(1, count + 1):
+        fields = {"id": i, "first_name": f"First{i}", "last_name": f"Last{i}", "email": f"contact{i}@example.com",
+                  "phone_number": f"380{i:09d}", "birth_date": date(1990, 1, 1) + timedelta(days=i % 365),
+                  "crm_status": "operational", "created_at": now, "updated_at": now}
+        contacts.append(Contact(**fields, user_id=user.id, user=user))
+        rows.append({**fields, "user_id": user.id, "username": user.username, "user_email": user.email,
+                     "role": user.role, "avatar": user.avatar})
+    return contacts, rows
+
+
+def measure(name: str, render, rows: int, repeat: int) -> float:
+    render()  # прогрiв
+    started = time.perf_counter()
+    for _ in range(repeat):
+        render()
+    elapsed = time.perf_counter() - started
+    rate = rows * repeat / elapsed
+    print(f"{name:>12}: {rate:,.0f} rows/s ({elapsed / repeat * 1000:.2f} ms per page of {rows})")
+    return rate
+
+
+def serialization(rows: int, repeat: int) -> None:
+    contacts, projected = make_rows(rows)
+    field = create_response_field(name="response", type_=list[ContactResponseSchema])
+    # [serialize_response] - корутина, тож для старого шляху потрiбен свiй event loop
+    loop = asyncio.new_event_loop()
+
+    # те саме, що робить FastAPI для response_model: валiдацiя + серiалiзацiя + json.dumps
+    def before() -> bytes:
+        return JSONResponse(loop.run_until_complete(serialize_response(field=field, response_content=contacts))).body
+
+    def after() -> bytes:
+        return ORJSONResponse([contact_row(row) for row in projected]).body
+
+    assert orjson.loads(before()) == orjson.loads(after()), "responses differ"
+    print("serialization")
+    try:
+        old = measure("orm+pydantic", before, rows, repeat)
+        new = measure("projection", after, rows, repeat)
+    finally:
+        loop.close()
+    print(f"{'speedup':>12}: x{new / old:.1f}")
+
+
+async def database(url: str, rows: int, repeat: int) -> None:
+    engine = create_async_engine(url)
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    field = create_response_field(name="response", type_=list[ContactResponseSchema])
+    print(f"database (first {rows} contacts)")
+    try:
+        async def run(name: str, page) -> float:
+            async with session_maker() as db:
+                count = await page(db)
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    await page(db)
+                elapsed = time.perf_counter() - started
+            print(f"{name:>12}: {count * repeat / elapsed:,.0f} rows/s ({elapsed / repeat * 1000:.2f} ms per page)")
+            return count * repeat / elapsed
+
+        # кожна "сторiнка" - вибiрка + серiалiзацiя у тiло вiдповiдi; повертає кiлькiсть рядкiв
+        async def orm_page(db) -> int:
+            result = await db.execute(select(Contact).order_by(Contact.id).limit(rows))
+            contacts = result.unique().scalars().all()
+            JSONResponse(await serialize_response(field=field, response_content=contacts))
+            db.expunge_all()
+            return len(contacts)
+
+        async def projection_page(db) -> int:
+            statement = (select(*LIST_COLUMNS, *LIST_USER_COLUMNS).outerjoin(User, Contact.user_id == User.id)
+                         .order_by(Contact.id).limit(rows))
+            result = await db.execute(statement)
+            projected = [contact_row(row) for row in result.mappings()]
+            ORJSONResponse(projected)
+            return len(projected)
+
+        old = await run("orm+pydantic", orm_page)
+        new = await run("projection", projection_page)
+        print(f"{'speedup':>12}: x{new / old:.1f}")
+    finally:
+        await engine.dispose()
+
+
+def main(args: argparse.Namespace) -> None:
+    serialization(args.rows, args.repeat)
+    if args.database_url:
+        asyncio.run(database(args.database_url, args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Contact list serialization benchmark")
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--database-url", default=None)
+    main(parser.parse_args())
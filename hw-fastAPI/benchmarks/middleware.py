@@ -0,0 +1,106 @@
+""" Порiвняння пропускної здатностi фiльтрiв запитiв: два @app.middleware("http") (BaseHTTPMiddleware)
+    проти одного чистого ASGI [RequestFilterMiddleware].
+    Запуск з каталогу hw-fastAPI (БД та Redis не потрiбнi - запити йдуть напряму в ASGI-застосунок):
+        python -m benchmarks.middleware --requests 20000 """
+import argparse
+import asyncio
+import time
+
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
+
+from src.services.blocklist import IPBlocklist
+from src.services.request_filters import RequestFilterMiddleware, ip_filter, user_agent_filter
+from src.services.user_agents import UserAgentFilter
+
+
+BANNED = ["10.0.0.0/8", "172.16.0.0/12", "192.168.0.0/16"]
+USER_AGENTS = [r"yandexbot", r"yandex-bot"]
+
+
+def base_http_app(blocklist: IPBlocklist, user_agents: UserAgentFilter) -> FastAPI:
+    app = FastAPI()
+
+    @app.middleware("http")
+    async def black_list(request: Request, call_next):
+        if blocklist.match(request.client.host if request.client else None) is not None:
+            return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"detail": "You are banned"})
+        return await call_next(request)
+
+    @app.middleware("http")
+    async def user_agent_ban_middleware(request: Request, call_next):
+        if user_agents.is_banned(request.headers.get("user-agent")):
+            return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"detail": "You are banned"})
+        return await call_next(request)
+
+    @app.get("/")
+    def index():
+        return {"message": "Contacts Application"}
+
+    return app
+
+
+def pure_asgi_app(blocklist: IPBlocklist, user_agents: UserAgentFilter) -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestFilterMiddleware, filters=[ip_filter(blocklist), user_agent_filter(user_agents)])
+
+    @app.get("/")
+    def index():
+        return {"message": "Contacts Application"}
+
+    return app
+
+
+async def call(app, client_host: str, user_agent: bytes) -> int:
+    scope = {"type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET", "scheme": "http",
+             "path": "/", "raw_path": b"/", "root_path": "", "query_string": b"",
+             "headers": [(b"host", b"localhost"), (b"user-agent", user_agent)],
+             "client": (client_host, 50000), "server": ("localhost", 8000)}
+    status_code = 0
+    request_sent = False
+    response_done = asyncio.Event()
+
+    async def receive():
+        # як у справжнього сервера: спочатку тiло запиту, далi - очiкування на розрив з'єднання
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        await response_done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status_code
+        if message["type"] == "http.response.start":
+            status_code = message["status"]
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            response_done.set()
+
+    await app(scope, receive, send)
+    return status_code
+
+
+async def measure(app, requests: int, client_host: str, user_agent: bytes) -> float:
+    await call(app, client_host, user_agent)  # прогрiв (startup, кешi)
+    started = time.perf_counter()
+    for _ in range(requests):
+        await call(app, client_host, user_agent)
+    return requests / (time.perf_counter() - started)
+
+
+async def main(requests: int) -> None:
+    blocklist = IPBlocklist(BANNED)
+    user_agents = UserAgentFilter(USER_AGENTS)
+    cases = [("allowed", "8.8.8.8", b"Mozilla/5.0"), ("banned ip", "10.1.2.3", b"Mozilla/5.0"),
+             ("banned ua", "8.8.8.8", b"Mozilla/5.0 (compatible; YandexBot/3.0)")]
+    print(f"{'case':<12}{'BaseHTTPMiddleware':>22}{'pure ASGI':>14}{'speedup':>10}")
+    for name, client_host, user_agent in cases:
+        before = await measure(base_http_app(blocklist, user_agents), requests, client_host, user_agent)
+        after = await measure(pure_asgi_app(blocklist, user_agents), requests, client_host, user_agent)
+        print(f"{name:<12}{before:>18.0f} r/s{after:>10.0f} r/s{after / before:>9.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000)
+    asyncio.run(main(parser.parse_args().requests))
@@ -0,0 +1,125 @@
+""" Локальна SMTP-заглушка для бенчмаркiв: приймає листи i нiкуди їх не вiдправляє.
+    Пiдтримує EHLO/HELO, AUTH PLAIN/LOGIN (будь-якi логiн/пароль), MAIL/RCPT/DATA, RSET, NOOP, QUIT.
+    TLS немає, тож застосунок треба запускати з MAIL_STARTTLS=false MAIL_SSL_TLS=false.
+    Окремий запуск з каталогу hw-fastAPI:
+        python -m benchmarks.smtp_sink --port 8025
+    <--fail-rate 0.1> вiдповiдає 451 приблизно на 10% DATA - для перевiрки повторiв у email_worker. """
+import argparse
+import asyncio
+import random
+import time
+from typing import Callable
+
+
+class SMTPSink:
+    def __init__(self, host: str = "127.0.0.1", port: int = 8025, fail_rate: float = 0,
+                 on_message: Callable[[list[str], bytes, float], None] | None = None):
+        self.host = host
+        self.port = port
+        self.fail_rate = fail_rate
+        self.on_message = on_message
+        self.connections = 0
+        self.messages = 0
+        self.rejected = 0
+        self._server: asyncio.AbstractServer | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+
+        async def reply(line: str) -> None:
+            writer.write(line.encode() + b"\r\n")
+            await writer.drain()
+
+        recipients: list[str] = []
+        await reply("220 sink ESMTP ready")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command, _, argument = line.decode(errors="replace").strip().partition(" ")
+                command = command.upper()
+                if command == "EHLO":
+                    await reply("250-sink\r\n250-AUTH PLAIN LOGIN\r\n250-8BITMIME\r\n250 SMTPUTF8")
+                elif command == "HELO":
+                    await reply("250 sink")
+                elif command == "AUTH":
+                    mechanism, _, initial = argument.partition(" ")
+                    if mechanism.upper() == "LOGIN":
+                        await reply("334 VXNlcm5hbWU6")
+                        await reader.readline()
+                        await reply("334 UGFzc3dvcmQ6")
+                        await reader.readline()
+                    elif not initial:
+                        await reply("334 ")
+                        await reader.readline()
+                    await reply("235 Authentication successful")
+                elif command == "MAIL":
+                    recipients = []
+                    await reply("250 OK")
+                elif command == "RCPT":
+                    recipients.append(argument.partition(":")[2].strip().strip("<>").lower())
+                    await reply("250 OK")
+                elif command == "DATA":
+                    await reply("354 End data with <CR><LF>.<CR><LF>")
+                    chunks = []
+                    while True:
+                        chunk = await reader.readline()
+                        if not chunk or chunk == b".\r\n":
+                            break
+                        chunks.append(chunk)
+                    if self.fail_rate and random.random() < self.fail_rate:
+                        self.rejected += 1
+                        await reply("451 Temporary failure, try again later")
+                    else:
+                        self.messages += 1
+                        if self.on_message is not None:
+                            self.on_message(recipients, b"".join(chunks), time.perf_counter())
+                        await reply("250 OK queued")
+                    recipients = []
+                elif command == "RSET":
+                    recipients = []
+                    await reply("250 OK")
+                elif command == "NOOP":
+                    await reply("250 OK")
+                elif command == "QUIT":
+                    await reply("221 Bye")
+                    break
+                else:
+                    await reply("502 Command not implemented")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def main(host: str, port: int, fail_rate: float) -> None:
+    sink = SMTPSink(host, port, fail_rate)
+    await sink.start()
+    print(f"SMTP sink on {host}:{port}")
+    previous = 0
+    while True:
+        await asyncio.sleep(5)
+        print(f"messages: {sink.messages} (+{(sink.messages - previous) / 5:.1f}/s), "
+              f"rejected: {sink.rejected}, connections: {sink.connections}")
+        previous = sink.messages
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP sink")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--fail-rate", type=float, default=0)
+    args = parser.parse_args()
+    try:
+        asyncio.run(main(args.host, args.port, args.fail_rate))
+    except KeyboardInterrupt:
+        pass
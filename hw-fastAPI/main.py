@@ -1,19 +1,24 @@
-import re
-import redis.asyncio as aioredis
-from ipaddress import ip_address, ip_network
-from typing import Callable
-
-from fastapi import FastAPI, Depends, HTTPException, Request, status
+from fastapi import FastAPI, Depends, HTTPException
 from fastapi_limiter import FastAPILimiter
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-from src.database.db import get_db
+from src.database.db import get_db, sessionmanager
 from src.routes import auth, birthday_contacts, contacts, search_contacts, users
 from src.conf.config import config
+from src.entity.models import Role
+from src.services.avatars import avatar_pipeline
+from src.services.blocklist import IPBlocklist
+from src.services.metrics import metrics
+from src.services.request_filters import RequestFilterMiddleware, ip_filter, user_agent_filter
+from src.services.user_agents import UserAgentFilter
+from src.services.passwords import password_pool
+from src.services.redis_client import redis_client
+from src.services.roles import RoleAccess
+from src.services.thumbnails import thumbnail_store
 
 # Запуск проекту:
 # uvicorn main:app --host localhost --port 8000 --reload
@@ -33,48 +38,27 @@ app.add_middleware(
     #allow_methods=["GET", "POST", "PUT", "DELETE"],
     #allow_headers=["Authorization"],
     allow_methods=["*"],
-    allow_headers=["*"],)
+    allow_headers=["*"],
+    # курсор keyset-пагiнацiї вiддається заголовком, браузеру його треба явно дозволити
+    expose_headers=["X-Next-Cursor"],)
 
 
 
 # Black list
-banned_ips = [
-    ip_network("10.0.0.0/8"),
-    ip_network("172.16.0.0/12"),
-    ip_network("192.168.0.0/16"),]
-    # ip_network("127.0.0.1")]
-
-@app.middleware("http")
-async def black_list(request: Request, call_next: Callable):
-    client_ip = ip_address(request.client.host)
-    # if client_ip in banned_ips:
-    #     return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"detail": "You are banned"})
-
-    for banned_ip in banned_ips:
-        if client_ip in banned_ip:
-            # у лекції зазначаться, що <middleware> не вміє повертати json, тож потрiбно це робити за неї
-            # raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="You are banned") -> "Internal Server Error"
-            return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"detail": "You are banned"})
-        
-    response = await call_next(request)
-    return response
-
-
+# Правила (CIDR, IPv4 та IPv6) беруться з налаштувань BLOCKLIST_NETWORKS, файлу BLOCKLIST_FILE та Redis set
+# BLOCKLIST_REDIS_KEY i перезавантажуються на льоту, див. src/services/blocklist.py
+ip_blocklist = IPBlocklist(config.BLOCKLIST_NETWORKS, file_path=config.BLOCKLIST_FILE,
+                           redis_key=config.BLOCKLIST_REDIS_KEY, reload_interval=config.BLOCKLIST_RELOAD_INTERVAL)
 
 # Окрiм того, яблоки та яблочники не прокатяться
 # user_agent_ban_list = [r"Macintosh", r"iPhone", r"iPad", r"AppleWebKit"]
-user_agent_ban_list = [r"yandexbot", r"yandex-bot"]
-
-@app.middleware("http")
-async def user_agent_ban_middleware(request: Request, call_next: Callable):
-    user_agent = request.headers.get("user-agent", "")
-    
-    for ban_pattern in user_agent_ban_list:
-        if re.search(ban_pattern, user_agent, re.IGNORECASE):
-            return JSONResponse(status_code=status.HTTP_403_FORBIDDEN, content={"detail": "You are banned"},)
+# перелiк шаблонiв - у налаштуваннях USER_AGENT_BAN_LIST, див. src/services/user_agents.py
+user_agents = UserAgentFilter(config.USER_AGENT_BAN_LIST, ignore_case=config.USER_AGENT_BAN_IGNORE_CASE,
+                              cache_size=config.USER_AGENT_CACHE_SIZE)
 
-    response = await call_next(request)
-    return response
+# Обидва фiльтри - в одному чистому ASGI-middleware (src/services/request_filters.py) замiсть двох
+# @app.middleware("http"): заборонений запит отримує 403 ще до маршрутизацiї.
+app.add_middleware(RequestFilterMiddleware, filters=[ip_filter(ip_blocklist), user_agent_filter(user_agents)])
 
 
 
@@ -85,16 +69,27 @@ app.include_router(search_contacts.router, prefix='/api')
 app.include_router(birthday_contacts.router, prefix='/api')
 app.include_router(users.router, prefix="/api")
 
+# аватари з AVATAR_STORAGE=local роздає сам застосунок
+if config.AVATAR_STORAGE == "local":
+    app.mount(config.AVATAR_LOCAL_URL, StaticFiles(directory=config.AVATAR_LOCAL_ROOT, check_dir=False), name="media")
+
 
 # Ratelimit iнiцiюється тут з тегом "startup", а потiм ще додається його реалiзацiя у src/routes
 @app.on_event("startup")
 async def startup():
-    redis_memory = await aioredis.Redis(
-        host=config.REDIS_DOMAIN,
-        port=config.REDIS_PORT,
-        db=0,
-        password=config.REDIS_PASSWORD,)
-    await FastAPILimiter.init(redis_memory)
+    # спiльний клiєнт з src/services/redis_client.py, а не ще один пул з'єднань
+    await FastAPILimiter.init(redis_client)
+    await ip_blocklist.start(redis_client)
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    await ip_blocklist.stop()
+    await avatar_pipeline.shutdown()
+    thumbnail_store.shutdown()
+    password_pool.shutdown()
+    await sessionmanager.close()
+    await redis_client.close()
 
 
 @app.get("/")
@@ -102,6 +97,12 @@ def index():
     return {"message": "Contacts Application"}
 
 
+# метрики розкривають внутрiшнiй стан (правила blocklist, пули, кешi) - лише для адмiнiстраторiв
+@app.get("/api/metrics", dependencies=[Depends(RoleAccess([Role.admin]))])
+async def get_metrics():
+    return metrics.snapshot()
+
+
 @app.get("/api/healthchecker")
 async def healthchecker(db: AsyncSession = Depends(get_db)):
     try:
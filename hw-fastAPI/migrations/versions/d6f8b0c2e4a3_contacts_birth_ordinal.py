@@ -0,0 +1,43 @@
+"""contacts birth ordinal
+
+Revision ID: d6f8b0c2e4a3
+Revises: c5e7a9b1d3f2
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# копiя src.entity.models.BIRTH_ORDINAL_SQL на момент мiграцiї: iсторична мiграцiя не повинна змiнюватися
+# разом з кодом застосунку
+BIRTH_ORDINAL_SQL = (
+    "CAST(CAST(EXTRACT(DOY FROM birth_date) AS INTEGER) + "
+    "CASE WHEN EXTRACT(MONTH FROM birth_date) > 2 AND NOT ("
+    "MOD(CAST(EXTRACT(YEAR FROM birth_date) AS INTEGER), 4) = 0 AND ("
+    "MOD(CAST(EXTRACT(YEAR FROM birth_date) AS INTEGER), 100) <> 0 OR "
+    "MOD(CAST(EXTRACT(YEAR FROM birth_date) AS INTEGER), 400) = 0)) "
+    "THEN 1 ELSE 0 END AS SMALLINT)"
+)
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6f8b0c2e4a3'
+down_revision: Union[str, None] = 'c5e7a9b1d3f2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # generated-колонка (STORED): Postgres сам заповнює її для всiх iснуючих рядкiв пiд час ADD COLUMN,
+    # тож окремий backfill не потрiбен
+    op.add_column('contacts', sa.Column('birth_ordinal', sa.SmallInteger(),
+                                        sa.Computed(BIRTH_ORDINAL_SQL, persisted=True), nullable=True))
+    op.create_index(op.f('ix_contacts_birth_ordinal'), 'contacts', ['birth_ordinal'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_contacts_birth_ordinal'), table_name='contacts')
+    op.drop_column('contacts', 'birth_ordinal')
@@ -0,0 +1,27 @@
+"""drop users refresh_token
+
+Revision ID: e1a3c5d7f9b2
+Revises: d6f8b0c2e4a3
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1a3c5d7f9b2'
+down_revision: Union[str, None] = 'd6f8b0c2e4a3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # поточнi refresh-токени живуть у Redis (src/services/revocation.py), колонка бiльше нiким не читається
+    op.drop_column('users', 'refresh_token')
+
+
+def downgrade() -> None:
+    op.add_column('users', sa.Column('refresh_token', sa.String(length=255), nullable=True))
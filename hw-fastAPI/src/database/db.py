@@ -1,21 +1,100 @@
+import asyncio
 import contextlib
+import itertools
+import time
 
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.conf.config import config
+from src.services.metrics import metrics
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    # [_do_get] - це саме той момент, коли сесiя чекає на вiльне з'єднання з пулу
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics.observe("db.pool.checkout_wait", time.perf_counter() - started)
+
+
+def create_engine(url: str) -> AsyncEngine:
+    url = make_url(url)
+    connect_args = {}
+    if url.get_driver_name() == "asyncpg":
+        # <statement_cache_size> - кеш prepared statements самого asyncpg (0 - для pgbouncer у transaction mode),
+        # <prepared_statement_cache_size> - кеш SQLAlchemy над ним
+        connect_args["statement_cache_size"] = config.DB_STATEMENT_CACHE_SIZE
+        url = url.update_query_dict({"prepared_statement_cache_size": str(config.DB_PREPARED_STATEMENT_CACHE_SIZE)})
+    return create_async_engine(url, poolclass=InstrumentedQueuePool, pool_size=config.DB_POOL_SIZE,
+                               max_overflow=config.DB_MAX_OVERFLOW, pool_timeout=config.DB_POOL_TIMEOUT,
+                               pool_recycle=config.DB_POOL_RECYCLE, pool_pre_ping=config.DB_POOL_PRE_PING,
+                               query_cache_size=config.DB_QUERY_CACHE_SIZE, echo=config.DB_ECHO,
+                               connect_args=connect_args)
+
+
+def register_pool_metrics(engine: AsyncEngine, prefix: str) -> None:
+    pool = engine.pool
+    metrics.gauge(f"{prefix}.size", pool.size)
+    metrics.gauge(f"{prefix}.checked_out", pool.checkedout)
+    # QueuePool.overflow() вiд'ємний, поки пул не заповнений повнiстю
+    metrics.gauge(f"{prefix}.overflow", lambda: max(pool.overflow(), 0))
+
+
+# На реплiцi: 0, якщо все отримане WAL вже застосовано, iнакше - скiльки секунд тому була остання транзакцiя
+REPLICA_LAG_SQL = text("SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                       "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END")
+
+
+class Replica:
+    def __init__(self, url: str, index: int):
+        self.engine: AsyncEngine = create_engine(url)
+        self.session_maker: async_sessionmaker = async_sessionmaker(autoflush=False, autocommit=False,
+                                                                    bind=self.engine)
+        self.lag: float | None = None
+        self.checked_at: float = 0
+        self._lock = asyncio.Lock()
+        register_pool_metrics(self.engine, f"db.replica{index}.pool")
+        metrics.gauge(f"db.replica{index}.lag", lambda: -1 if self.lag is None else self.lag)
+
+    async def current_lag(self, interval: float) -> float | None:
+        # лаг перевiряється не на кожен запит, а не частiше нiж раз на <interval> секунд;
+        # None означає, що реплiка недоступна
+        if time.monotonic() - self.checked_at < interval:
+            return self.lag
+        async with self._lock:
+            if time.monotonic() - self.checked_at >= interval:
+                try:
+                    async with self.engine.connect() as connection:
+                        self.lag = float((await connection.execute(REPLICA_LAG_SQL)).scalar() or 0)
+                except Exception as err:
+                    print(err)
+                    self.lag = None
+                self.checked_at = time.monotonic()
+        return self.lag
 
 
 class DatabaseSessionManager:
-    def __init__(self, url: str):
-        self._engine: AsyncEngine | None = create_async_engine(url)
+    def __init__(self, url: str, replica_urls: list[str] | None = None, max_replica_lag: float = 5,
+                 replica_check_interval: float = 5):
+        self._engine: AsyncEngine | None = create_engine(url)
         self._session_maker: async_sessionmaker = async_sessionmaker(autoflush=False, autocommit=False,
                                                                      bind=self._engine)
+        register_pool_metrics(self._engine, "db.pool")
+        self._replicas = [Replica(replica_url, index) for index, replica_url in enumerate(replica_urls or [])]
+        self._replica_cycle = itertools.cycle(self._replicas)
+        self.max_replica_lag = max_replica_lag
+        self.replica_check_interval = replica_check_interval
 
     @contextlib.asynccontextmanager
-    async def session(self):
-        if self._session_maker is None:
+    async def _session(self, session_maker: async_sessionmaker | None):
+        if session_maker is None:
             raise Exception("Session is not initialized")
-        session = self._session_maker()
+        session = session_maker()
         try:
             yield session
         except Exception as err:
@@ -24,10 +103,51 @@ class DatabaseSessionManager:
         finally:
             await session.close()
 
+    def session(self):
+        return self._session(self._session_maker)
+
+    async def _pick_replica(self) -> Replica | None:
+        # round-robin по реплiках; пропускаємо недоступнi та тi, що вiдстали бiльше нiж на <max_replica_lag>
+        for _ in range(len(self._replicas)):
+            replica = next(self._replica_cycle)
+            lag = await replica.current_lag(self.replica_check_interval)
+            if lag is not None and lag <= self.max_replica_lag:
+                return replica
+        return None
+
+    async def read_session(self):
+        """ Сесiя тiльки для читання: реплiка, якщо вона є та не вiдстає, iнакше - primary. """
+        if self._session_maker is None:
+            raise Exception("Session is not initialized")
+        replica = await self._pick_replica() if self._replicas else None
+        if replica is None:
+            if self._replicas:
+                metrics.inc("db.read.primary_fallback")
+            return self._session(self._session_maker)
+        metrics.inc("db.read.replica")
+        return self._session(replica.session_maker)
 
-sessionmanager = DatabaseSessionManager(config.DB_URL)
+    async def close(self):
+        # викликається на shutdown у main.py - коректно закриває всi з'єднання пулiв
+        if self._engine is None:
+            return
+        await self._engine.dispose()
+        for replica in self._replicas:
+            await replica.engine.dispose()
+        self._engine = None
+        self._session_maker = None
+
+
+sessionmanager = DatabaseSessionManager(config.DB_URL, config.DB_REPLICA_URLS, config.DB_REPLICA_MAX_LAG,
+                                        config.DB_REPLICA_CHECK_INTERVAL)
 
 
 async def get_db():
     async with sessionmanager.session() as session:
         yield session
+
+
+# для маршрутiв, якi лише читають (списки, пошук, днi народження) - можуть пiти на реплiку
+async def get_read_db():
+    async with await sessionmanager.read_session() as session:
+        yield session
@@ -5,7 +5,8 @@ from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy import String, Integer, ForeignKey, DateTime, func, Enum
 from sqlalchemy.orm import DeclarativeBase
 
-from sqlalchemy import Column, Integer, String, Boolean, Date, ForeignKey, DateTime, func, Enum
+from sqlalchemy import Column, Integer, SmallInteger, String, Boolean, Date, ForeignKey, DateTime, func, Enum, Index
+from sqlalchemy import Computed
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from sqlalchemy.ext.declarative import declarative_base
 
@@ -13,6 +14,24 @@ from sqlalchemy.ext.declarative import declarative_base
 Base = declarative_base()
 
 
+# Порядковий номер дня народження у "високосному" роцi (1..366): 29 лютого завжди 60, 1 березня - 61,
+# незалежно вiд року народження. Рахується самою БД як generated-колонка, тож однаково заповнюється
+# будь-яким шляхом запису (ORM, bulk insert, UPDATE ... RETURNING).
+BIRTH_ORDINAL_SQL = (
+    "CAST(CAST(EXTRACT(DOY FROM birth_date) AS INTEGER) + "
+    "CASE WHEN EXTRACT(MONTH FROM birth_date) > 2 AND NOT ("
+    "MOD(CAST(EXTRACT(YEAR FROM birth_date) AS INTEGER), 4) = 0 AND ("
+    "MOD(CAST(EXTRACT(YEAR FROM birth_date) AS INTEGER), 100) <> 0 OR "
+    "MOD(CAST(EXTRACT(YEAR FROM birth_date) AS INTEGER), 400) = 0)) "
+    "THEN 1 ELSE 0 END AS SMALLINT)"
+)
+
+
+def birthday_ordinal(value: date) -> int:
+    # те саме, що й BIRTH_ORDINAL_SQL, але на боцi Python - для меж дiапазону у запитi
+    return (date(2000, value.month, value.day) - date(2000, 1, 1)).days + 1
+
+
 class Contact(Base):
     __tablename__ = 'contacts'
 
@@ -22,6 +41,7 @@ class Contact(Base):
     email = Column(String(64), unique=True, nullable=False, index=True)
     phone_number = Column(String(24), nullable=False, index=True)
     birth_date = Column(Date, nullable=False, index=True)
+    birth_ordinal = Column(SmallInteger, Computed(BIRTH_ORDINAL_SQL, persisted=True), index=True)
     crm_status = Column(String, default='operational')
     created_at: Mapped[date] = mapped_column('created_at', DateTime, default=func.now(), nullable=True)
     updated_at: Mapped[date] = mapped_column('updated_at', DateTime, default=func.now(), onupdate=func.now(),
@@ -29,6 +49,17 @@ class Contact(Base):
     user_id: Mapped[int] = mapped_column(Integer, ForeignKey('users.id'), nullable=True)
     user: Mapped["User"] = relationship("User", backref="contacts", lazy="joined")
 
+    # складений iндекс для keyset-пагiнацiї контактiв користувача: WHERE user_id = ? AND id > ? ORDER BY id
+    # GIN-iндекси pg_trgm пiд пошук ILIKE '%q%' у src/repository/contacts.py -> search_contacts()
+    __table_args__ = (
+        Index('ix_contacts_user_id_id', 'user_id', 'id'),
+        Index('ix_contacts_first_name_trgm', 'first_name', postgresql_using='gin',
+              postgresql_ops={'first_name': 'gin_trgm_ops'}),
+        Index('ix_contacts_last_name_trgm', 'last_name', postgresql_using='gin',
+              postgresql_ops={'last_name': 'gin_trgm_ops'}),
+        Index('ix_contacts_email_trgm', 'email', postgresql_using='gin',
+              postgresql_ops={'email': 'gin_trgm_ops'}),)
+
 
 class Role(enum.Enum):
     admin: str = "admin"
@@ -47,7 +78,6 @@ class User(Base):
     # тип даних у БД, а також надати iнструкцiю що робити при зворотньому вiдкатi...
     role: Mapped[Enum] = mapped_column('role', Enum(Role), default=Role.user, nullable=True)
     avatar: Mapped[str] = mapped_column(String(255), nullable=True)
-    refresh_token: Mapped[str] = mapped_column(String(255), nullable=True)
     created_at: Mapped[date] = mapped_column('created_at', DateTime, default=func.now())
     updated_at: Mapped[date] = mapped_column('updated_at', DateTime, default=func.now(), onupdate=func.now())
     confirmed: Mapped[bool] = mapped_column(Boolean, default=False, nullable=True)
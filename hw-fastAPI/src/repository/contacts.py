@@ -1,25 +1,65 @@
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from fastapi import HTTPException
-from sqlalchemy import Date, func, select, and_, or_
+from sqlalchemy import Date, func, select, update, delete, and_, or_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.entity.models import Contact, User
-from src.schemas.contact import ContactSchema, ContactResponseSchema
+from src.entity.models import Contact, User, birthday_ordinal
+from src.schemas.contact import (ContactSchema, ContactPatchSchema, ContactResponseSchema, ContactBatchSchema,
+                                ContactBatchUpdateSchema)
+from src.services.generations import contact_generations
 
 
-async def get_contacts(limit: int, offset: int, db: AsyncSession, user: User):
-    # user=user це посиланя на властивiсть класу [Contact] -> Contact.user; оскiльки у функцiю заходить модель User
-    # то [sqlalchemy] зрозумiє цю властивiсть через Mapped["User"] = relationship("User", ... 
-    # АЛЕ, можна скористатися й таким записом user_id = user.id  
-    statement = select(Contact).filter_by(user=user).offset(offset).limit(limit)
-    contacts = await db.execute(statement)
-    return contacts.scalars().all()
+def paginate(statement, limit: int, offset: int, after_id: int | None):
+    # <after_id> - keyset-режим (WHERE id > after_id), iнакше старий режим з OFFSET для сумiсностi;
+    # в обох випадках порядок стабiльний завдяки ORDER BY id
+    if after_id is not None:
+        statement = statement.where(Contact.id > after_id)
+    else:
+        statement = statement.offset(offset)
+    return statement.order_by(Contact.id).limit(limit)
 
 
-async def get_contacts_all(limit: int, offset: int, db: AsyncSession):
-    statement = select(Contact).offset(offset).limit(limit)
-    contacts = await db.execute(statement)
-    return contacts.scalars().all()
+# Колонки для списку контактiв: те саме, що вiддає [ContactResponseSchema], без ORM-об'єктiв
+# i без зайвих колонок [User] (пароль, дати ...), якi тягне lazy="joined"
+LIST_COLUMNS = (Contact.id, Contact.first_name, Contact.last_name, Contact.email, Contact.phone_number,
+                Contact.birth_date, Contact.crm_status, Contact.created_at, Contact.updated_at)
+LIST_USER_COLUMNS = (User.id.label("user_id"), User.username, User.email.label("user_email"), User.role, User.avatar)
+
+
+def contact_row(row) -> dict:
+    # рядок проекцiї -> словник у формi [ContactResponseSchema] з вкладеним <user>
+    contact = {column.key: row[column.key] for column in LIST_COLUMNS}
+    contact["user"] = None if row["user_id"] is None else {
+        "id": row["user_id"], "username": row["username"], "email": row["user_email"],
+        "role": row["role"], "avatar": row["avatar"]}
+    return contact
+
+
+async def get_contact_rows(limit: int, offset: int, db: AsyncSession, user: User | None = None,
+                           after_id: int | None = None) -> list[dict]:
+    """ Сторiнка контактiв проекцiєю: вибираються лише потрiбнi колонки, результат - готовi до серiалiзацiї
+        словники (без гiдрацiї ORM та повторної валiдацiї через Pydantic). <user> = None - усi контакти. """
+    statement = select(*LIST_COLUMNS, *LIST_USER_COLUMNS).outerjoin(User, Contact.user_id == User.id)
+    if user is not None:
+        statement = statement.where(Contact.user_id == user.id)
+    result = await db.execute(paginate(statement, limit, offset, after_id))
+    return [contact_row(row) for row in result.mappings()]
+
+
+EXPORT_COLUMNS = (Contact.id, Contact.first_name, Contact.last_name, Contact.email, Contact.phone_number,
+                  Contact.birth_date, Contact.crm_status, Contact.created_at, Contact.updated_at, Contact.user_id)
+
+
+async def stream_contacts(db: AsyncSession, user: User | None = None, yield_per: int = 1000):
+    """ Серверний курсор по таблицi контактiв: рядки приходять з БД пачками по <yield_per>,
+        лише потрiбнi колонки, без ORM-об'єктiв та JOIN з [User]. <user> = None - усi контакти. """
+    statement = select(*EXPORT_COLUMNS).order_by(Contact.id).execution_options(yield_per=yield_per)
+    if user is not None:
+        statement = statement.where(Contact.user_id == user.id)
+    result = await db.stream(statement)
+    async for row in result.mappings():
+        yield row
 
 
 async def get_contact(contact_id: int, db: AsyncSession, user: User):
@@ -33,76 +73,156 @@ async def create_contact(body: ContactSchema, db: AsyncSession, user: User):
     # (first_name=body.first_name, last_name=body.last_name, ...)
     # Параметр <exclude_unset> = True вказує, що в результуючий словник повинні бути включені тільки поля,
     # які були встановлені (тобто не мають значення за замовчуванням).
-    contact = Contact(**body.model_dump(exclude_unset=True), user=user)
+    # <user_id> замiсть <user>: користувач приходить з кешу як detached-об'єкт i не повинен приєднуватися до сесiї
+    contact = Contact(**body.model_dump(exclude_unset=True), user_id=user.id)
     db.add(contact)
     await db.commit()
     await db.refresh(contact)
+    # нове поколiння контактiв користувача: ETag-и та кешованi вiдповiдi стають недiйсними
+    await contact_generations.bump(user.id)
     return contact
 
 
-async def update_contact(contact_id: int, body: ContactSchema, db: AsyncSession, user: User):
-    statement = select(Contact).filter_by(id=contact_id, user=user)
+async def create_contacts_bulk(rows: list[dict], db: AsyncSession, user: User) -> set[str]:
+    """ Один багаторядковий INSERT ... ON CONFLICT (email) DO NOTHING на всю пачку.
+        Повертає множину email, якi реально вставлено - решта вже iснувала у БД. """
+    statement = (insert(Contact)
+                 .values([{**row, "user_id": user.id} for row in rows])
+                 .on_conflict_do_nothing(index_elements=[Contact.email])
+                 .returning(Contact.email))
     result = await db.execute(statement)
-    contact = result.scalar_one_or_none()
-    if contact:
-        contact.first_name = body.first_name
-        contact.last_name = body.last_name
-        contact.email = body.email
-        contact.phone_number = body.phone_number
-        contact.birth_date = body.birth_date
-        contact.crm_status = body.crm_status
-        await db.commit()
-        await db.refresh(contact)
-    return contact
+    await db.commit()
+    inserted = set(result.scalars().all())
+    if inserted:
+        await contact_generations.bump(user.id)
+    return inserted
+
+
+def owner_row(user: User) -> dict:
+    # <user> у вiдповiдi - завжди сам власник (WHERE user_id = user.id), тож JOIN не потрiбен
+    return {"id": user.id, "username": user.username, "email": user.email, "role": user.role, "avatar": user.avatar}
+
+
+async def write_contact(statement, db: AsyncSession, user: User) -> dict | None:
+    """ Один запит замiсть SELECT -> змiна -> COMMIT -> refresh: UPDATE/DELETE ... WHERE id AND user_id
+        RETURNING повертає змiнений рядок, з якого одразу будується вiдповiдь у формi [ContactResponseSchema].
+        Рядок читається до COMMIT, тож <expire_on_commit> на нього не впливає. """
+    result = await db.execute(statement.returning(*LIST_COLUMNS))
+    row = result.mappings().one_or_none()
+    await db.commit()
+    if row is None:
+        return None
+    await contact_generations.bump(user.id)
+    return {**row, "user": owner_row(user)}
+
+
+def owned_contact(contact_id: int, user: User):
+    return and_(Contact.id == contact_id, Contact.user_id == user.id)
+
+
+async def update_contact(contact_id: int, body: ContactSchema, db: AsyncSession, user: User):
+    statement = update(Contact).where(owned_contact(contact_id, user)).values(**body.model_dump())
+    return await write_contact(statement, db, user)
+
+
+async def patch_contact(contact_id: int, body: ContactPatchSchema, db: AsyncSession, user: User):
+    # оновлюються лише переданi поля; порожнє тiло - просто поточний стан контакту
+    values = body.model_dump(exclude_unset=True)
+    if not values:
+        result = await db.execute(select(*LIST_COLUMNS).where(owned_contact(contact_id, user)))
+        row = result.mappings().one_or_none()
+        return None if row is None else {**row, "user": owner_row(user)}
+    statement = update(Contact).where(owned_contact(contact_id, user)).values(**values)
+    return await write_contact(statement, db, user)
 
 
 async def delete_contact(contact_id: int, db: AsyncSession, user: User):
-    statement = select(Contact).filter_by(id=contact_id, user=user)
-    contact = await db.execute(statement)
-    contact = contact.scalar_one_or_none()
-    if contact:
-        await db.delete(contact)
-        await db.commit()
-    return contact
+    return await write_contact(delete(Contact).where(owned_contact(contact_id, user)), db, user)
+
+
+def batch_target(body: ContactBatchSchema, user: User, limit: int):
+    """ Умова пакетної операцiї, завжди в межах контактiв власника. Для <filter> вибiрка обмежується
+        <limit> найменшими id (Postgres не має UPDATE ... LIMIT), тож великi набори обробляються
+        кiлькома запитами. """
+    owned = Contact.user_id == user.id
+    if body.ids is not None:
+        return and_(owned, Contact.id.in_(body.ids))
+    conditions = [owned]
+    if body.filter.crm_status is not None:
+        conditions.append(Contact.crm_status == body.filter.crm_status)
+    if body.filter.created_before is not None:
+        conditions.append(Contact.created_at < body.filter.created_before)
+    chosen = select(Contact.id).where(*conditions).order_by(Contact.id).limit(limit)
+    return and_(owned, Contact.id.in_(chosen.scalar_subquery()))
+
+
+async def write_contacts_batch(statement, body: ContactBatchSchema, db: AsyncSession, user: User) -> dict:
+    # один set-based UPDATE/DELETE ... RETURNING id на весь пакет; вiдповiдь - результат по кожному id
+    result = await db.execute(statement.returning(Contact.id))
+    affected = sorted(result.scalars().all())
+    await db.commit()
+    if affected:
+        await contact_generations.bump(user.id)
+    not_found = sorted(set(body.ids or ()) - set(affected))
+    return {"affected": affected, "not_found": not_found}
 
 
-async def search_contact_by_firstname(contact_first_name: str, db: AsyncSession):
-    statement = select(Contact).where(Contact.first_name.ilike(f'%{contact_first_name}%'))
-    result = await db.execute(statement)
-    if result:
-        return result.scalars().all()
-    # raise ValueError("204 No Content. The Search did not get results.")
-    raise HTTPException(status_code=204, detail="No Content. The Search did not get results.")
+async def update_contacts_batch(body: ContactBatchUpdateSchema, db: AsyncSession, user: User, limit: int) -> dict:
+    statement = update(Contact).where(batch_target(body, user, limit)).values(crm_status=body.crm_status)
+    return await write_contacts_batch(statement, body, db, user)
 
 
-async def search_contact_by_lastname(contact_last_name: str, db: AsyncSession):
-    statement = select(Contact).where(Contact.last_name.ilike(f'%{contact_last_name}%'))
-    result = await db.execute(statement)
-    if result:
-        return result.scalars().all()
-    # raise ValueError("204 No Content. The Search did not get results.")
-    raise HTTPException(status_code=204, detail="No Content. The Search did not get results.")
+async def delete_contacts_batch(body: ContactBatchSchema, db: AsyncSession, user: User, limit: int) -> dict:
+    statement = delete(Contact).where(batch_target(body, user, limit))
+    return await write_contacts_batch(statement, body, db, user)
 
 
-async def search_contact_by_email(contact_email: str, db: AsyncSession):
-    statement = select(Contact).where(Contact.email.ilike(f'%{contact_email}%'))
-    result = await db.execute(statement)
-    if result:
-        return result.scalars().all()
-    # raise ValueError("204 No Content. The Search did not get results.")
-    raise HTTPException(status_code=204, detail="No Content. The Search did not get results.")
-
-
-async def search_contact_complex(query: str, db: AsyncSession):
-    statement = select(Contact).where(or_(
-        Contact.first_name.ilike(f'%{query}%'),
-        Contact.last_name.ilike(f'%{query}%'),
-        Contact.email.ilike(f'%{query}%')
-    ))
+def escape_like(value: str) -> str:
+    # щоб символи % та _ з запиту користувача не ставали шаблонами LIKE
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def search_contacts(columns: list, query: str, limit: int, db: AsyncSession):
+    """ Пошук пiдрядка у полях контакту. ILIKE '%q%' обслуговується GIN-iндексами pg_trgm
+        (ix_contacts_*_trgm), а результати ранжуються за триграмною схожiстю [similarity()]
+        i обмежуються <limit>. Для кiлькох полiв умови об'єднуються через OR в одному запитi -
+        Postgres збирає їх через BitmapOr по iндексах замiсть повного сканування таблицi. """
+    pattern = f"%{escape_like(query)}%"
+    condition = or_(*(column.ilike(pattern, escape="\\") for column in columns))
+    similarities = [func.similarity(column, query) for column in columns]
+    rank = similarities[0] if len(similarities) == 1 else func.greatest(*similarities)
+    statement = select(Contact).where(condition).order_by(rank.desc(), Contact.id).limit(limit)
     result = await db.execute(statement)
     return result.scalars().all()
 
 
+async def search_contact_by_firstname(contact_first_name: str, db: AsyncSession, limit: int = 50):
+    return await search_contacts([Contact.first_name], contact_first_name, limit, db)
+
+
+async def search_contact_by_lastname(contact_last_name: str, db: AsyncSession, limit: int = 50):
+    return await search_contacts([Contact.last_name], contact_last_name, limit, db)
+
+
+async def search_contact_by_email(contact_email: str, db: AsyncSession, limit: int = 50):
+    return await search_contacts([Contact.email], contact_email, limit, db)
+
+
+async def search_contact_complex(query: str, db: AsyncSession, limit: int = 50):
+    return await search_contacts([Contact.first_name, Contact.last_name, Contact.email], query, limit, db)
+
+
+def birthday_window(current_date: date, forward_shift_days: int) -> list[tuple[int, int]]:
+    """ Дiапазони <birth_ordinal> (включно) для днiв народження у наступнi <forward_shift_days> днiв.
+        Якщо дiапазон переходить через новий рiк, вiн розбивається на два: [start..366] та [1..end]. """
+    end_of_shift_date = current_date + timedelta(forward_shift_days)
+    start_ordinal = birthday_ordinal(current_date)
+    end_ordinal = birthday_ordinal(end_of_shift_date)
+    if end_of_shift_date.year == current_date.year:
+        return [(start_ordinal, end_ordinal)]
+    return [(start_ordinal, 366), (1, end_ordinal)]
+
+
 """ У FastAPI є спеціальні класи і функції для повернення помилок користувача і їх відображення в Swagger.
     Щоб повернути помилку користувача з кодом відповіді <422> (Unprocessable Entity) і відповідним повідомленням,
     можна використати клас [HTTPException] з FastAPI. """
@@ -112,21 +232,17 @@ async def search_contact_by_birthdate(forward_shift_days: int, db: AsyncSession)
         # raise ValueError("The <forward_shift_days> parameter should be 364 or less.")
         raise HTTPException(status_code=422, detail="The <forward_shift_days> parameter should be 364 or less.")
     current_date = datetime.now().date()
-    end_of_shift_date = current_date + timedelta(forward_shift_days)
     # statement = select(Contact).where(between(Contact.birth_date, current_date, end_of_shift_date))
     # statement = select(Contact).where(Contact.birth_date.between(current_date, end_of_shift_date))
-    # statement = select(Contact).where(and_(func.extract("month", Contact.birth_date) == current_date.month,
-    #                                     func.extract("day", Contact.birth_date) >= current_date.day,
-    #                                     func.extract("day", Contact.birth_date) <= end_of_shift_date.day))
-    # if current_date.year == end_of_shift_date.year:
-    statement = select(Contact).where(or_(
-                and_(func.extract("month", Contact.birth_date) == current_date.month,
-                    func.extract("day", Contact.birth_date) >= current_date.day,),
-                and_(func.extract("month", Contact.birth_date) <= end_of_shift_date.month,
-                    func.extract("day", Contact.birth_date) <= end_of_shift_date.day)))
+    # Замiсть func.extract("month"/"day") по <birth_date> (повне сканування таблицi та помилки на межi
+    # мiсяця/року) - дiапазон(и) по iндексованiй колонцi <birth_ordinal>, див. [birthday_window]
+    condition = or_(*(Contact.birth_ordinal.between(start, end)
+                      for start, end in birthday_window(current_date, forward_shift_days)))
+    start_ordinal = birthday_ordinal(current_date)
+    # найближчi днi народження - першими
+    days_ahead = (Contact.birth_ordinal - start_ordinal + 366) % 366
+    statement = select(Contact).where(condition).order_by(days_ahead, Contact.id)
 
     result = await db.execute(statement)
-    if result:
-        return result.scalars().all()
-    # raise ValueError("204 No Content. The Search did not get results.")
-    raise HTTPException(status_code=204, detail="No Content. The Search did not get results.")
+    # порожнiй результат - це просто порожнiй список, а не помилка
+    return result.scalars().all()
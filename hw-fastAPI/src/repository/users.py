@@ -1,11 +1,12 @@
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from libgravatar import Gravatar
 
 from src.database.db import get_db
 from src.entity.models import User
 from src.schemas.user import UserSchema
+from src.services.generations import contact_generations
 
 
 async def get_user_by_email(email: str, db: AsyncSession = Depends(get_db)):
@@ -30,11 +31,6 @@ async def create_user(body: UserSchema, db: AsyncSession = Depends(get_db)):
     return new_user
 
 
-async def update_token(user: User, token: str | None, db: AsyncSession):
-    user.refresh_token = token
-    await db.commit()
-
-
 # async def confirmed_email(email: str, db: AsyncSession) -> None:
 #     user = await get_user_by_email(email, db)
 #     user.confirmed = True
@@ -42,14 +38,12 @@ async def update_token(user: User, token: str | None, db: AsyncSession):
 
 
 async def confirmed_email(email: str, db: AsyncSession) -> None:
-    user = await get_user_by_email(email, db)
-    
-    if user is not None:
-        user.confirmed = True
-        await db.commit()
-        await db.refresh(user)
-    else:
+    # один UPDATE ... RETURNING замiсть попереднього SELECT користувача
+    result = await db.execute(update(User).where(User.email == email).values(confirmed=True).returning(User.id))
+    if result.scalar_one_or_none() is None:
+        await db.rollback()
         raise ValueError("User not found for email: {}".format(email))
+    await db.commit()
     
 
 # чому тут на прийом не <user>: [User], а <email>: str
@@ -57,8 +51,12 @@ async def confirmed_email(email: str, db: AsyncSession) -> None:
 # певними параметрами, а зараз при iнiцiюваннi нових змiн вже потрiбна iнша сесiя до БД, тому
 # як якорь беремо незмiнний парамерт <email>  
 async def update_avatar_url(email: str, url: str | None, db: AsyncSession) -> User:
-    user = await get_user_by_email(email, db)
-    user.avatar = url
+    # UPDATE ... RETURNING повертає вже оновленого [User]; expunge до COMMIT, щоб його атрибути
+    # не протухли (expire_on_commit) i об'єкт можна було кешувати без повторного SELECT
+    result = await db.execute(update(User).where(User.email == email).values(avatar=url).returning(User))
+    user = result.scalar_one()
+    db.expunge(user)
     await db.commit()
-    await db.refresh(user)
-    return user
\ No newline at end of file
+    # контакти вiддаються разом з вкладеним <user>, тож їх ETag-и теж мають змiнитися
+    await contact_generations.bump(user.id)
+    return user
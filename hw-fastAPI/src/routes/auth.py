@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends, status, BackgroundTasks, Request
+from fastapi import APIRouter, HTTPException, Depends, status, Request
 from fastapi.security import OAuth2PasswordRequestForm, HTTPAuthorizationCredentials, HTTPBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -10,6 +10,7 @@ from pathlib import Path
 
 
 from src.database.db import get_db
+from src.entity.models import User
 from src.repository import users as rep_users
 from src.schemas.user import UserSchema, TokenSchema, UserResponseSchema, RequestEmail
 from src.services.auth import auth_service
@@ -29,18 +30,20 @@ router = APIRouter(prefix='/auth', tags=['auth'])
 get_refresh_token = HTTPBearer()
 
 
-# Email про підтвердження рестрації відправляється тут за допомогою класу [BackgroundTasks]
+# Email про підтвердження рестрації ставиться у чергу в Redis (src/services/email_queue.py), а вiдправляє його
+# окремий процес src/workers/email_worker.py - лист не губиться, навiть якщо SMTP тимчасово недоступний.
+# Якщо недоступний сам Redis, [send_email] лише логує це: акаунт уже створено, лист можна перезапросити
 @router.post("/signup", response_model=UserResponseSchema, status_code=status.HTTP_201_CREATED)
-async def signup(body: UserSchema, bg_task: BackgroundTasks, request: Request, db: AsyncSession = Depends(get_db)):
+async def signup(body: UserSchema, request: Request, db: AsyncSession = Depends(get_db)):
     exist_user = await rep_users.get_user_by_email(body.email, db)
     if exist_user:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Account already exists")
-    body.password = auth_service.get_password_hash(body.password)
+    body.password = await auth_service.get_password_hash(body.password)
     new_user = await rep_users.create_user(body, db)
     # TODO send email notification
     # Функція [send_email()] приймає <user.email>, <user.username> та <host>. <host> потрібно взяти з класу Request ->
     # request.base_url та добавити отримання екземпляру цього класу у [signup()].
-    bg_task.add_task(send_email, new_user.email, new_user.username, str(request.base_url))
+    await send_email(new_user.email, new_user.username, str(request.base_url))
     return new_user
 
 
@@ -53,29 +56,27 @@ async def login(body: OAuth2PasswordRequestForm = Depends(), db: AsyncSession =
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Wrong credentials")
     if not user.confirmed:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Email not confirmed")
-    if not auth_service.verify_password(body.password, user.password):
+    if not await auth_service.verify_password(body.password, user.password):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Wrong credentials")
-    # Generate JWT
-    access_token = await auth_service.create_access_token(data={"sub": user.email, "DB-class": "PSQL"})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": user.email})
-    await rep_users.update_token(user, refresh_token, db)
-    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+    # Generate JWT: нова родина refresh-токенiв у Redis (src/services/revocation.py)
+    return await auth_service.issue_tokens(user.email)
 
 
+# Ротацiя refresh-токена повнiстю у Redis, без читання <users.refresh_token> з БД
 @router.get('/refresh_token', response_model=TokenSchema)
-async def refresh_token(credentials: HTTPAuthorizationCredentials = Depends(get_refresh_token),
-                        db: AsyncSession = Depends(get_db)):
-    token = credentials.credentials
-    email = await auth_service.decode_refresh_token(token)
-    user = await rep_users.get_user_by_email(email, db)
-    if user.refresh_token != token:
-        await rep_users.update_token(user, None, db)
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+async def refresh_token(credentials: HTTPAuthorizationCredentials = Depends(get_refresh_token)):
+    return await auth_service.rotate_tokens(credentials.credentials)
+
+
+@router.post('/logout', status_code=status.HTTP_204_NO_CONTENT)
+async def logout(token: str = Depends(auth_service.oauth2_scheme), user: User = Depends(auth_service.get_current_user)):
+    await auth_service.revoke_token(token)
+
 
-    access_token = await auth_service.create_access_token(data={"sub": email, "DB-class": "PSQL"})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": email})
-    await rep_users.update_token(user, refresh_token, db)
-    return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}
+# вихiд на всiх пристроях: вiдкликаються всi родини refresh-токенiв користувача
+@router.post('/logout_all', status_code=status.HTTP_204_NO_CONTENT)
+async def logout_all(user: User = Depends(auth_service.get_current_user)):
+    await auth_service.revoke_user_tokens(user.email)
 
 
 """ Це вiдповiдь просто повiдомленням зi словника {bson}"""
@@ -103,6 +104,9 @@ async def confirmed_email(token: str, request: Request, db: AsyncSession = Depen
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Verification error")
     if user.confirmed:
         return templates.TemplateResponse("email_already_confirmed.html", {"request": request, "user": user})
+    # <user> вiд'єднується вiд сесiї: COMMIT у [confirmed_email] iнакше протухне його атрибути,
+    # i шаблон не зможе прочитати {{ user.username }} без нового SELECT
+    db.expunge(user)
     await rep_users.confirmed_email(email, db)
     print(user.username)
     # return {"message": "Email confirmed"}
@@ -116,12 +120,11 @@ async def confirmed_email(token: str, request: Request, db: AsyncSession = Depen
 
 
 @router.post('/request_email', response_class=HTMLResponse)
-async def request_email(body: RequestEmail, background_tasks: BackgroundTasks, request: Request,
-                        db: AsyncSession = Depends(get_db)):
+async def request_email(body: RequestEmail, request: Request, db: AsyncSession = Depends(get_db)):
     user = await rep_users.get_user_by_email(body.email, db)
 
     if user.confirmed:
         return templates.TemplateResponse("email_already_confirmed.html", {"request": request, "user": user})
     if user:
-        background_tasks.add_task(send_email, user.email, user.username, str(request.base_url))
+        await send_email(user.email, user.username, str(request.base_url))
     return templates.TemplateResponse("check_for_confirmation.html", {"request": request, "user": user})
@@ -1,15 +1,20 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Path, Query
 from typing import Optional
+from datetime import date
+
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
+from src.database.db import get_read_db
 from src.entity.models import User, Role
 from src.repository import contacts as rep_contacts
 from src.schemas.contact import ContactSchema, ContactUpdateSchema, ContactResponseSchema
 from src.services.auth import auth_service
+from src.services.result_cache import result_cache
 from src.services.roles import RoleAccess
 
 router = APIRouter(prefix='/birthday', tags=['birthday'])
+contacts_adapter = TypeAdapter(list[ContactResponseSchema])
 
 # Цей функтор буде пропускати тiльки тi запити, ролi в користувачiв яких спiвпадають
 access_elevated = RoleAccess([Role.admin, Role.moderator])
@@ -17,7 +22,11 @@ access_elevated = RoleAccess([Role.admin, Role.moderator])
 
 # Знайдена міцна залежність між шляхом {shift_days} та назвою змінної у функції -> search_contact_by_birthdate(shift_days, ... 
 @router.get("/{shift_days}", response_model=list[ContactResponseSchema], dependencies=[Depends(access_elevated)])
-async def search_contact_by_birthdate(shift_days: int = Path(..., description="Кількість найближчих днів у запитi"),
-                                      db: AsyncSession = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
-    contacts = await rep_contacts.search_contact_by_birthdate(shift_days, db)
-    return contacts
\ No newline at end of file
+# межi - тут, до кешу результатiв: вiд'ємний зсув "загорнув" би вiкно назад майже на весь рiк
+async def search_contact_by_birthdate(shift_days: int = Path(..., ge=0, le=364,
+                                                             description="Кількість найближчих днів у запитi"),
+                                      db: AsyncSession = Depends(get_read_db), user: User = Depends(auth_service.get_current_user)):
+    # результат залежить вiд поточної дати, тож вона теж входить у ключ кешу
+    return await result_cache.get_or_compute("birthday", {"shift_days": shift_days, "today": date.today()},
+                                             lambda: rep_contacts.search_contact_by_birthdate(shift_days, db),
+                                             contacts_adapter)
\ No newline at end of file
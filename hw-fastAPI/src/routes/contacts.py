@@ -1,12 +1,23 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Path, Query
+from typing import Literal
+
+from fastapi import APIRouter, HTTPException, Depends, status, Path, Query, Request, Response, UploadFile, File
+from fastapi.responses import ORJSONResponse
 from fastapi_limiter.depends import RateLimiter
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
+from src.conf.config import config
+from src.database.db import get_db, get_read_db
 from src.repository import contacts as rep_contacts
 from src.entity.models import User, Role
-from src.schemas.contact import ContactSchema, ContactUpdateSchema, ContactResponseSchema
+from src.schemas.contact import (ContactSchema, ContactUpdateSchema, ContactPatchSchema, ContactResponseSchema,
+                                ContactImportReport, ContactBatchSchema, ContactBatchUpdateSchema, BatchResult)
 from src.services.auth import auth_service
+from src.services.contacts_export import export_response
+from src.services.contacts_import import ContactImport, detect_format
+from src.services.etag import contact_etags, if_none_match, not_modified, set_etag
+from src.services.generations import ContactGenerations
+from src.services.pagination import NEXT_CURSOR_HEADER, decode_cursor, next_cursor
+from src.services.rate_limit import batch_limiter
 from src.services.roles import RoleAccess
 
 router = APIRouter(prefix='/contacts', tags=['contacts'])
@@ -17,27 +28,68 @@ access_elevated = RoleAccess([Role.admin, Role.moderator])
 
 @router.get("/", response_model=list[ContactResponseSchema], description="No more than 10 requests per minute",
             dependencies=[Depends(RateLimiter(times=10, seconds=60))])
-async def get_contacts(limit: int = Query(10, ge=10, le=500), offset: int = Query(0, ge=0),
-                    db: AsyncSession = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
-    contact = await rep_contacts.get_contacts(limit, offset, db, user)
-    return contact
+async def get_contacts(request: Request, limit: int = Query(10, ge=10, le=500),
+                    offset: int = Query(0, ge=0),
+                    cursor: str | None = Query(None, description="Курсор з заголовка X-Next-Cursor, замiнює offset"),
+                    db: AsyncSession = Depends(get_read_db), user: User = Depends(auth_service.get_current_user)):
+    after_id = decode_cursor(cursor) if cursor else None
+    # If-None-Match перевiряється ще до запиту в БД (src/services/etag.py)
+    etag = await contact_etags.etag(user.id, "list", limit, offset, after_id)
+    if etag is not None and if_none_match(request, etag):
+        return not_modified(etag)
+    contact = await rep_contacts.get_contact_rows(limit, offset, db, user, after_id)
+    # словники з проекцiї вже мають форму схеми - серiалiзуються напряму через orjson, без повторної валiдацiї
+    response = ORJSONResponse(contact)
+    if cursor_value := next_cursor(contact, limit):
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
+    set_etag(response, etag)
+    return response
 
 
 
 @router.get("/all", response_model=list[ContactResponseSchema], dependencies=[Depends(access_elevated)])
-async def get_contacts_all(limit: int = Query(10, ge=10, le=500), offset: int = Query(0, ge=0),
-                    db: AsyncSession = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
-    contact = await rep_contacts.get_contacts_all(limit, offset, db)
-    return contact
+async def get_contacts_all(request: Request, limit: int = Query(10, ge=10, le=500),
+                    offset: int = Query(0, ge=0),
+                    cursor: str | None = Query(None, description="Курсор з заголовка X-Next-Cursor, замiнює offset"),
+                    db: AsyncSession = Depends(get_read_db), user: User = Depends(auth_service.get_current_user)):
+    after_id = decode_cursor(cursor) if cursor else None
+    etag = await contact_etags.etag(ContactGenerations.GLOBAL, "list", limit, offset, after_id)
+    if etag is not None and if_none_match(request, etag):
+        return not_modified(etag)
+    contact = await rep_contacts.get_contact_rows(limit, offset, db, None, after_id)
+    # словники з проекцiї вже мають форму схеми - серiалiзуються напряму через orjson, без повторної валiдацiї
+    response = ORJSONResponse(contact)
+    if cursor_value := next_cursor(contact, limit):
+        response.headers[NEXT_CURSOR_HEADER] = cursor_value
+    set_etag(response, etag)
+    return response
+
+
+# Експорт вiддається потоково, тож маршрути /export мають стояти вище за /{contact_id}
+@router.get("/export", description="No more than 2 exports per minute",
+            dependencies=[Depends(RateLimiter(times=2, seconds=60))])
+async def export_contacts(format: Literal["ndjson", "csv"] = Query("ndjson"),
+                          user: User = Depends(auth_service.get_current_user)):
+    return export_response(format, user)
+
+
+@router.get("/export/all", dependencies=[Depends(access_elevated), Depends(RateLimiter(times=2, seconds=60))])
+async def export_contacts_all(format: Literal["ndjson", "csv"] = Query("ndjson"),
+                              user: User = Depends(auth_service.get_current_user)):
+    return export_response(format, None)
 
 
 @router.get("/{contact_id}", response_model=ContactResponseSchema, description="No more than 10 requests per minute",
             dependencies=[Depends(RateLimiter(times=10, seconds=60))])
-async def get_contact(contact_id: int = Path(ge=1), db: AsyncSession = Depends(get_db),
-                      user: User = Depends(auth_service.get_current_user)):
+async def get_contact(request: Request, response: Response, contact_id: int = Path(ge=1),
+                      db: AsyncSession = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
+    etag = await contact_etags.etag(user.id, "contact", contact_id)
+    if etag is not None and if_none_match(request, etag):
+        return not_modified(etag)
     contact = await rep_contacts.get_contact(contact_id, db, user)
     if contact is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="ENTITY NOT FOUND.")
+    set_etag(response, etag)
     return contact
 
 
@@ -49,6 +101,53 @@ async def create_contact(body: ContactSchema, db: AsyncSession = Depends(get_db)
     return contact
 
 
+# Масовий iмпорт: файл читається потоково, рядки вставляються пачками; у вiдповiдi - звiт по кожному рядку з помилкою
+@router.post("/import", response_model=ContactImportReport, description="No more than 2 imports per minute",
+             dependencies=[Depends(RateLimiter(times=2, seconds=60))])
+async def import_contacts(response: Response, file: UploadFile = File(description="CSV з заголовком або NDJSON (один контакт на рядок)"),
+                          format: Literal["csv", "ndjson"] | None = Query(None, description="Якщо не вказано - за розширенням файлу"),
+                          db: AsyncSession = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
+    report = await ContactImport(db, user).run(file, detect_format(file, format))
+    if report.aborted is not None:
+        response.status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    return report
+
+
+async def batch_charge(body: ContactBatchSchema, user: User) -> None:
+    # перелiк <ids> оплачується одразу за розмiром; для <filter> розмiр вiдомий лише пiсля запиту,
+    # тож спершу списується одна одиниця, а решта - у [batch_settle]
+    size = len(body.ids) if body.ids is not None else 1
+    await batch_limiter.hit(f"contacts:{user.id}", batch_limiter.weight(size))
+
+
+async def batch_settle(body: ContactBatchSchema, user: User, result: dict) -> None:
+    if body.filter is not None and len(result["affected"]) > batch_limiter.unit_size:
+        await batch_limiter.charge(f"contacts:{user.id}", batch_limiter.weight(len(result["affected"])) - 1)
+
+
+# Пакетнi операцiї - POST, щоб i видалення мало тiло запиту; шляхи /batch/* не перетинаються з /{contact_id}
+@router.post("/batch/update", response_model=BatchResult,
+             description=f"Weighted limit: {config.BATCH_RATE_UNITS} units per {config.BATCH_RATE_SECONDS}s, "
+                         f"one unit per {config.BATCH_UNIT_SIZE} contacts")
+async def update_contacts_batch(body: ContactBatchUpdateSchema, db: AsyncSession = Depends(get_db),
+                                user: User = Depends(auth_service.get_current_user)):
+    await batch_charge(body, user)
+    result = await rep_contacts.update_contacts_batch(body, db, user, config.BATCH_MAX_SIZE)
+    await batch_settle(body, user, result)
+    return result
+
+
+@router.post("/batch/delete", response_model=BatchResult,
+             description=f"Weighted limit: {config.BATCH_RATE_UNITS} units per {config.BATCH_RATE_SECONDS}s, "
+                         f"one unit per {config.BATCH_UNIT_SIZE} contacts")
+async def delete_contacts_batch(body: ContactBatchSchema, db: AsyncSession = Depends(get_db),
+                                user: User = Depends(auth_service.get_current_user)):
+    await batch_charge(body, user)
+    result = await rep_contacts.delete_contacts_batch(body, db, user, config.BATCH_MAX_SIZE)
+    await batch_settle(body, user, result)
+    return result
+
+
 @router.put("/{contact_id}", description="No more than 5 requests per minute",
             dependencies=[Depends(RateLimiter(times=5, seconds=60))])
 async def update_contact(body: ContactSchema, contact_id: int = Path(ge=1), db: AsyncSession = Depends(get_db),
@@ -59,6 +158,16 @@ async def update_contact(body: ContactSchema, contact_id: int = Path(ge=1), db:
     return contact
 
 
+@router.patch("/{contact_id}", description="No more than 5 requests per minute",
+              dependencies=[Depends(RateLimiter(times=5, seconds=60))])
+async def patch_contact(body: ContactPatchSchema, contact_id: int = Path(ge=1), db: AsyncSession = Depends(get_db),
+                        user: User = Depends(auth_service.get_current_user)):
+    contact = await rep_contacts.patch_contact(contact_id, body, db, user)
+    if contact is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="ENTITY NOT FOUND.")
+    return contact
+
+
 @router.delete("/{contact_id}", status_code=status.HTTP_204_NO_CONTENT, description="No more than 3 graveyards per minute",
             dependencies=[Depends(RateLimiter(times=3, seconds=60))])
 async def delete_contact(contact_id: int = Path(ge=1), db: AsyncSession = Depends(get_db),
@@ -1,15 +1,18 @@
 from fastapi import APIRouter, HTTPException, Depends, status, Path, Query
 from typing import Optional
+from pydantic import TypeAdapter
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
+from src.database.db import get_read_db
 from src.repository import contacts as rep_contacts
 from src.schemas.contact import ContactSchema, ContactUpdateSchema, ContactResponseSchema
 from src.entity.models import User, Role
 from src.services.auth import auth_service
+from src.services.result_cache import result_cache
 from src.services.roles import RoleAccess
 
 router = APIRouter(prefix='/search', tags=['search'])
+contacts_adapter = TypeAdapter(list[ContactResponseSchema])
 
 # Цей функтор буде пропускати тiльки тi запити, ролi в користувачiв яких спiвпадають
 access_elevated = RoleAccess([Role.admin, Role.moderator])
@@ -33,31 +36,41 @@ access_elevated = RoleAccess([Role.admin, Role.moderator])
 #         raise ValueError("Необхідно вказати: ім'я, прізвище або e-mail контакту.")
 
 
+# Результати кешуються у Redis (src/services/result_cache.py); ILIKE та similarity() не залежать вiд регiстру,
+# тож запит нормалiзується до нижнього регiстру, щоб "Anna" та "anna" влучали в один ключ
 """ У цьому випадку Path(..., <default>, <title>, <description>) означає, що параметр
     <contact_first_name> є обов'язковим і повинен бути вказаний в [URL]. Якщо параметр не вказано,
     буде викликано виняток. """
 @router.get("/by_firstname/{contact_first_name}", response_model=list[ContactResponseSchema])
 async def search_contact_by_firstname(contact_first_name: str = Path(..., description="Ім'я контакту"),
-                              db: AsyncSession = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
-    contacts = await rep_contacts.search_contact_by_firstname(contact_first_name, db)
-    return contacts
+                              limit: int = Query(50, ge=1, le=500, description="Максимальна кількість результатів"),
+                              db: AsyncSession = Depends(get_read_db), user: User = Depends(auth_service.get_current_user)):
+    query = contact_first_name.lower()
+    return await result_cache.get_or_compute("search.by_firstname", {"q": query, "limit": limit},
+                                             lambda: rep_contacts.search_contact_by_firstname(query, db, limit), contacts_adapter)
 
 @router.get("/by_lastname/{contact_last_name}", response_model=list[ContactResponseSchema])
 async def search_contact_by_lastname(contact_last_name: str = Path(..., description="Прізвище контакту"),
-                              db: AsyncSession = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
-    contacts = await rep_contacts.search_contact_by_lastname(contact_last_name, db)
-    return contacts
+                              limit: int = Query(50, ge=1, le=500, description="Максимальна кількість результатів"),
+                              db: AsyncSession = Depends(get_read_db), user: User = Depends(auth_service.get_current_user)):
+    query = contact_last_name.lower()
+    return await result_cache.get_or_compute("search.by_lastname", {"q": query, "limit": limit},
+                                             lambda: rep_contacts.search_contact_by_lastname(query, db, limit), contacts_adapter)
 
 @router.get("/by_email/{contact_email}", response_model=list[ContactResponseSchema])
 async def search_contact_by_email(contact_email: str = Path(..., description="Електронна адреса контакту"),
-                              db: AsyncSession = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
-    contacts = await rep_contacts.search_contact_by_email(contact_email, db)
-    return contacts
+                              limit: int = Query(50, ge=1, le=500, description="Максимальна кількість результатів"),
+                              db: AsyncSession = Depends(get_read_db), user: User = Depends(auth_service.get_current_user)):
+    query = contact_email.lower()
+    return await result_cache.get_or_compute("search.by_email", {"q": query, "limit": limit},
+                                             lambda: rep_contacts.search_contact_by_email(query, db, limit), contacts_adapter)
 
 
 # Знайдена міцна залежність між шляхом {value} та назвою змінної у функції -> search_contact_complex(value, ... 
 @router.get("/by_complex/{value}", response_model=list[ContactResponseSchema], dependencies=[Depends(access_elevated)])
 async def search_contact_complex(value: str = Path(..., description="Здійснює пошук у полях контакту: Ім'я, Прізвище та Електронна адреса"),
-                              db: AsyncSession = Depends(get_db), user: User = Depends(auth_service.get_current_user)):
-    contacts = await rep_contacts.search_contact_complex(value, db)
-    return contacts
\ No newline at end of file
+                              limit: int = Query(50, ge=1, le=500, description="Максимальна кількість результатів"),
+                              db: AsyncSession = Depends(get_read_db), user: User = Depends(auth_service.get_current_user)):
+    query = value.lower()
+    return await result_cache.get_or_compute("search.complex", {"q": query, "limit": limit},
+                                             lambda: rep_contacts.search_contact_complex(query, db, limit), contacts_adapter)
\ No newline at end of file
@@ -1,50 +1,40 @@
-import json, pickle
-
-import cloudinary
-import cloudinary.uploader
-from fastapi import APIRouter, HTTPException, Depends, status, Path, Query, UploadFile, File
+from fastapi import APIRouter, HTTPException, Depends, status, Path, Query, UploadFile, File, Request, Response
 from fastapi_limiter.depends import RateLimiter
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.db import get_db
-from src.conf.config import config
-from src.repository import users as rep_users
-from src.schemas.user import UserResponseSchema
+from src.schemas.user import AvatarJobSchema, UserResponseSchema
 from src.entity.models import User, Role
 from src.services.auth import auth_service
+from src.services.avatars import avatar_pipeline
+from src.services.etag import if_none_match, make_etag, not_modified, set_etag
 # from src.services.roles import RoleAccess
 
 
 router = APIRouter(prefix="/users", tags=["users"])
 
-cloudinary.config(cloud_name=config.CLOUDINARY_NAME, api_key=config.CLOUDINARY_API_KEY,
-                  api_secret=config.CLOUDINARY_API_SECRET, secure=True,)
-
 
+# ETag будується з полiв кешованого знiмка користувача - 304 вiддається без звернення до БД
 @router.get("/me", response_model=UserResponseSchema, dependencies=[Depends(RateLimiter(times=1, seconds=20))],)
-async def get_current_user(user: User = Depends(auth_service.get_current_user)):
+async def get_current_user(request: Request, response: Response, user: User = Depends(auth_service.get_current_user)):
+    etag = make_etag("me", user.id, user.username, user.email, user.role, user.avatar, user.updated_at)
+    if if_none_match(request, etag):
+        return not_modified(etag)
+    set_etag(response, etag)
     return user
 
 
 # [patch] -> так як змiна тiльки одного параметра
-@router.patch("/avatar", response_model=UserResponseSchema, dependencies=[Depends(RateLimiter(times=1, seconds=20))],)
-async def get_current_user(file: UploadFile = File(), user: User = Depends(auth_service.get_current_user),
-                           db: AsyncSession = Depends(get_db),):
-    
-    # це значення Metadata сервiсу 
-    public_id = f"Py16-Web/{user.email}"
-    # у uploader.upload є параметр chunk_size (й декiлька iнших), завдяки яким можна вiдкорегувати параметри завантаженого
-    # зображення, до того моменту, поки воно ще не потрапило у Сloudinary (тобто ще у пам'ятi)
-    # <chunk_size> -> обмеження розмiру зображення (перед передачею до хмари) 
-    resourse = cloudinary.uploader.upload(file.file, public_id=public_id, owerite=True)
-    print(resourse)
-    resourse_url = cloudinary.CloudinaryImage(public_id).build_url(width=250, height=250, crop="fill",
-                                                                   version=resourse.get("version"))
-    
-    user = await rep_users.update_avatar_url(user.email, resourse_url, db)
-
-    # вiдразу кешування <user> з новим URL для аватари
-    auth_service.cache.set(user.email, pickle.dumps(user))
-    auth_service.cache.expire(user.email, 300)
-
-    return user
\ No newline at end of file
+# Завантаження у сховище (Cloudinary / локальний диск / S3) йде у фонi, див. src/services/avatars.py:
+# вiдповiдь 202 з <job_id> приходить одразу, а <user.avatar> оновлюється пiсля завершення
+@router.patch("/avatar", response_model=AvatarJobSchema, status_code=status.HTTP_202_ACCEPTED,
+              dependencies=[Depends(RateLimiter(times=1, seconds=20))],)
+async def update_avatar(file: UploadFile = File(), user: User = Depends(auth_service.get_current_user)):
+    return await avatar_pipeline.submit(user, file)
+
+
+@router.get("/avatar/{job_id}", response_model=AvatarJobSchema)
+async def get_avatar_job(job_id: str = Path(max_length=32), user: User = Depends(auth_service.get_current_user)):
+    job = await avatar_pipeline.status(job_id, user.email)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Avatar job not found")
+    return job
+
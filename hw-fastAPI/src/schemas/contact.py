@@ -2,8 +2,9 @@ import re
 from datetime import datetime
 from datetime import date
 
-from pydantic import BaseModel, EmailStr, Field, validator
+from pydantic import BaseModel, EmailStr, Field, validator, model_validator
 from typing import Optional, Literal, Generic
+from src.conf.config import config
 from src.schemas.user import UserResponseSchema
 
 
@@ -41,6 +42,17 @@ class ContactUpdateSchema(ContactSchema):
     pass
 
 
+class ContactPatchSchema(ContactSchema):
+    # PATCH: усi поля необов'язковi, у БД пишуться лише переданi (model_dump(exclude_unset=True));
+    # тип лишається <str>, тож явний null вiдсiкається ще до валiдаторiв ContactSchema
+    first_name: str = Field(None, min_length=3, max_length=32)
+    last_name: str = Field(None, min_length=3, max_length=32)
+    email: EmailStr = Field(None, min_length=8, max_length=64)
+    phone_number: str = Field(None, max_length=24)
+    birth_date: str = Field(None, max_length=10)
+    crm_status: Literal['operational', 'analitic', 'corporative'] = None
+
+
 class ContactResponseSchema(BaseModel):
     id: int = 1
     first_name: str
@@ -58,3 +70,59 @@ class ContactResponseSchema(BaseModel):
 
     class Config:
         from_orm = True
+
+
+
+class ContactImportError(BaseModel):
+    row: int
+    email: str | None = None
+    detail: str
+
+
+class ContactImportReport(BaseModel):
+    total: int = 0
+    inserted: int = 0
+    failed: int = 0
+    # перелiк помилок обрiзається до CONTACTS_IMPORT_MAX_ERRORS, лiчильник <failed> - нi
+    errors: list[ContactImportError] = []
+    # файл довший за CONTACTS_IMPORT_MAX_ROWS - решту рядкiв пропущено
+    truncated: bool = False
+    # чому iмпорт зупинено до кiнця файлу (не UTF-8, зламаний CSV); рядки до цього мiсця вже iмпортованi
+    aborted: str | None = None
+
+
+CrmStatus = Literal['operational', 'analitic', 'corporative']
+
+
+class ContactBatchFilter(BaseModel):
+    # хоча б одна умова: порожнiй фiльтр збiгся б з усiма контактами власника
+    crm_status: CrmStatus | None = None
+    created_before: datetime | None = None
+
+    @model_validator(mode='after')
+    def validate_criteria(self):
+        if self.crm_status is None and self.created_before is None:
+            raise ValueError("Filter must have at least one of <crm_status> or <created_before>.")
+        return self
+
+
+class ContactBatchSchema(BaseModel):
+    # рiвно одне з двох: перелiк <ids> (не бiльше BATCH_MAX_SIZE) або <filter>
+    ids: list[int] | None = Field(None, min_length=1, max_length=config.BATCH_MAX_SIZE)
+    filter: ContactBatchFilter | None = None
+
+    @model_validator(mode='after')
+    def validate_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("Exactly one of <ids> or <filter> must be given.")
+        return self
+
+
+class ContactBatchUpdateSchema(ContactBatchSchema):
+    crm_status: CrmStatus
+
+
+class BatchResult(BaseModel):
+    # <affected> - змiненi/видаленi id; <not_found> - id з запиту, яких немає серед контактiв власника
+    affected: list[int] = []
+    not_found: list[int] = []
@@ -24,6 +24,13 @@ class UserResponseSchema(BaseModel):
         from_orm = True
 
 
+class AvatarJobSchema(BaseModel):
+    job_id: str
+    status: Literal["pending", "done", "failed"]
+    avatar: Optional[str] = None
+    detail: Optional[str] = None
+
+
 class TokenSchema(BaseModel):
     access_token: str
     refresh_token: str
@@ -1,10 +1,8 @@
-import pickle
-import redis
 from datetime import datetime, timedelta
 from typing import Optional
+from uuid import uuid4
 
 from fastapi import Depends, HTTPException, status
-from passlib.context import CryptContext
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
 from jose import JWTError, jwt
@@ -12,20 +10,33 @@ from jose import JWTError, jwt
 from src.database.db import get_db
 from src.repository import users as rep_users
 from src.conf.config import config
+from src.services.cache import TokenCache, UserCache
+from src.services.passwords import password_pool, pwd_context
+from src.services.redis_client import redis_client
+from src.services.revocation import TokenRevocation
 
 
 class Auth:
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = pwd_context
     SECRET_KEY = config.SECRET_KEY_JWT
     ALGORITHM = config.ALGORITHM
-    cache = redis.Redis(host=config.REDIS_DOMAIN, port=config.REDIS_PORT, db=0,
-                        password=config.REDIS_PASSWORD,)
-
-    def verify_password(self, plain_password, hashed_password):
-        return self.pwd_context.verify(plain_password, hashed_password)
-
-    def get_password_hash(self, password: str):
-        return self.pwd_context.hash(password)
+    cache = redis_client
+    # L1 у пам'ятi воркера + L2 у Redis, детальнiше у src/services/cache.py
+    user_cache = UserCache(cache, ttl=config.USER_CACHE_TTL, l1_maxsize=config.USER_CACHE_L1_SIZE,
+                           l1_ttl=config.USER_CACHE_L1_TTL)
+    # вже перевiренi access-токени, щоб не робити jwt.decode на кожен запит
+    token_cache = TokenCache(maxsize=config.TOKEN_CACHE_SIZE)
+    # denylist по <jti> та родини refresh-токенiв, детальнiше у src/services/revocation.py
+    revocation = TokenRevocation(cache)
+    ACCESS_TOKEN_LIFETIME = timedelta(minutes=16)
+    REFRESH_TOKEN_LIFETIME = timedelta(days=7)
+
+    # bcrypt виконується у пулi (src/services/passwords.py), щоб не зупиняти event loop
+    async def verify_password(self, plain_password, hashed_password):
+        return await password_pool.verify(plain_password, hashed_password)
+
+    async def get_password_hash(self, password: str):
+        return await password_pool.hash(password)
 
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/auth/login")
 
@@ -48,8 +59,9 @@ class Auth:
         if expires_delta:
             expire = datetime.utcnow() + timedelta(seconds=expires_delta)
         else:
-            expire = datetime.utcnow() + timedelta(minutes=16)
-        to_encode.update({"iat": datetime.utcnow(), "exp": expire, "scope": "access_token"})
+            expire = datetime.utcnow() + self.ACCESS_TOKEN_LIFETIME
+        # <jti> - унiкальний iдентифiкатор токена для denylist, <fam> (якщо є) - родина refresh-токена
+        to_encode.update({"iat": datetime.utcnow(), "exp": expire, "scope": "access_token", "jti": uuid4().hex})
         encoded_access_token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
         return encoded_access_token
 
@@ -59,22 +71,53 @@ class Auth:
         if expires_delta:
             expire = datetime.utcnow() + timedelta(seconds=expires_delta)
         else:
-            expire = datetime.utcnow() + timedelta(days=7)
-        to_encode.update({"iat": datetime.utcnow(), "exp": expire, "scope": "refresh_token"})
+            expire = datetime.utcnow() + self.REFRESH_TOKEN_LIFETIME
+        to_encode.setdefault("fam", uuid4().hex)
+        to_encode.update({"iat": datetime.utcnow(), "exp": expire, "scope": "refresh_token", "jti": uuid4().hex})
         encoded_refresh_token = jwt.encode(to_encode, self.SECRET_KEY, algorithm=self.ALGORITHM)
         return encoded_refresh_token
 
     async def decode_refresh_token(self, refresh_token: str):
+        payload = await self._decode_refresh(refresh_token)
+        return payload['sub']
+
+    async def _decode_refresh(self, refresh_token: str) -> dict:
         try:
             # далi у рядку параметр <algorithms=[self.ALGORITHM]> є списком з-за того, що функцiя decode може
             # принiмати декiлька типiв алгоритмiв для декодування (вона так реалiзована)
             payload = jwt.decode(refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            if payload['scope'] == 'refresh_token':
-                email = payload['sub']
-                return email
-            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid scope for token')
         except JWTError:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Could not validate credentials')
+        if payload['scope'] != 'refresh_token':
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid scope for token')
+        if payload.get('jti') is None or payload.get('fam') is None:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail='Invalid refresh token')
+        return payload
+
+    async def _token_pair(self, email: str, family: str) -> tuple[dict, dict]:
+        access_token = await self.create_access_token(data={"sub": email, "DB-class": "PSQL", "fam": family})
+        refresh_token = await self.create_refresh_token(data={"sub": email, "fam": family})
+        refresh_claims = jwt.get_unverified_claims(refresh_token)
+        return {"access_token": access_token, "refresh_token": refresh_token, "token_type": "bearer"}, refresh_claims
+
+    # login: нова родина refresh-токенiв, її поточний <jti> лежить у Redis, а не у <users.refresh_token>
+    async def issue_tokens(self, email: str) -> dict:
+        tokens, claims = await self._token_pair(email, uuid4().hex)
+        await self.revocation.start_family(email, claims["fam"], claims["jti"], claims["exp"])
+        return tokens
+
+    # refresh без звернення до БД: один атомарний скрипт у Redis перевiряє, що токен поточний, i ротує його
+    async def rotate_tokens(self, refresh_token: str) -> dict:
+        payload = await self._decode_refresh(refresh_token)
+        tokens, claims = await self._token_pair(payload["sub"], payload["fam"])
+        result = await self.revocation.rotate(payload["sub"], payload["fam"], payload["jti"], claims["jti"],
+                                              claims["exp"])
+        if result == TokenRevocation.REUSED:
+            # старий refresh-токен пред'явлено вдруге - вважаємо його викраденим i закриваємо всю сесiю
+            await self.revocation.revoke_family(payload["fam"], int(self.REFRESH_TOKEN_LIFETIME.total_seconds()))
+        if result != TokenRevocation.ROTATED:
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid refresh token")
+        return tokens
 
     # розiбрати [token] на атоми та виокремити з нього <user.email>
     # [oauth2_scheme] це вiдповiдна дефолтна схема яку використовує [OAuth2PasswordBearer] - визначена у кодi вище
@@ -85,36 +128,48 @@ class Auth:
             detail="Could not validate credentials",
             headers={"WWW-Authenticate": "Bearer"},)
 
-        try:
-            # Decode JWT
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
-            if payload['scope'] == 'access_token':
-                email = payload["sub"]
-                if email is None:
-                    raise credentials_exception
-            else:
+        payload = self.token_cache.get(token)
+        if payload is None:
+            try:
+                # Decode JWT
+                payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            except JWTError as e:
                 raise credentials_exception
-        except JWTError as e:
+            if payload.get('scope') != 'access_token' or payload.get("sub") is None or payload.get("jti") is None:
+                raise credentials_exception
+            # кешуються лише валiднi access-токени i рiвно до їх <exp>
+            self.token_cache.put(token, payload)
+        # вiдкликанi токени та родини - один MGET у Redis (claims вже можуть бути з кешу вище)
+        if await self.revocation.is_revoked(payload["jti"], payload.get("fam")):
             raise credentials_exception
+        email = payload["sub"]
 
-        # Кешування <user>
-        user_hash = str(email)
-
-        user = self.cache.get(user_hash)
-
+        # Кешування <user>: L1 (пам'ять воркера) -> L2 (Redis) -> БД, без блокування event loop
+        user = await self.user_cache.get_or_load(str(email), lambda: rep_users.get_user_by_email(email, db))
         if user is None:
-            print("User from database")
-            user = await rep_users.get_user_by_email(email, db)
-            if user is None:
-                raise credentials_exception
-            self.cache.set(user_hash, pickle.dumps(user))
-            self.cache.expire(user_hash, 300)
-        else:
-            print("User from cache")
-            user = pickle.loads(user)
+            raise credentials_exception
         return user
 
 
+    # Хуки вiдкликання: викликаються з routes/auth.py при logout
+    async def revoke_token(self, token: str):
+        # logout з одного пристрою: сам access-токен у denylist, а його родина - разом з refresh-токеном
+        payload = self.token_cache.get(token)
+        if payload is None:
+            try:
+                payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            except JWTError:
+                return
+        if payload.get("jti") is not None:
+            await self.revocation.revoke(payload["jti"], payload["exp"])
+        if payload.get("fam") is not None:
+            await self.revocation.revoke_family(payload["fam"], int(self.REFRESH_TOKEN_LIFETIME.total_seconds()))
+        self.token_cache.evict(token)
+
+    async def revoke_user_tokens(self, email: str):
+        await self.revocation.revoke_user(email, int(self.REFRESH_TOKEN_LIFETIME.total_seconds()))
+        self.token_cache.evict_subject(email)
+
     async def create_email_token(self, data: dict):
         to_encode = data.copy()
         expire = datetime.utcnow() + timedelta(days=2)
@@ -12,14 +12,14 @@ from jose import JWTError, jwt
 from src.database.db import get_db
 from src.repository import users as rep_users
 from src.conf.config import config
+from src.services.redis_client import redis_client
 
 
 class Auth:
     pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
     SECRET_KEY = config.SECRET_KEY_JWT
     ALGORITHM = config.ALGORITHM
-    cache = aioredis.Redis(host=config.REDIS_DOMAIN, port=config.REDIS_PORT, db=0,
-                        password=config.REDIS_PASSWORD,)
+    cache = redis_client
 
     
     # Функцiя залежностi [get_redis()] для наступної функцiї [get_current_user()], яка у тому числi кешує <user>
@@ -0,0 +1,241 @@
+import abc
+import asyncio
+import io
+import mimetypes
+import os
+import shutil
+import time
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+from typing import BinaryIO
+from uuid import uuid4
+
+import cloudinary
+import cloudinary.uploader
+import redis.asyncio as aioredis
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+
+from src.conf.config import config
+from src.database.db import sessionmanager
+from src.repository import users as rep_users
+from src.services.auth import auth_service
+from src.services.metrics import metrics
+from src.services.thumbnails import THUMBNAIL_CONTENT_TYPE, ThumbnailStore, thumbnail_store
+
+
+CHUNK_SIZE = 64 * 1024
+# маркер вже завантажених мiнiатюр (digest -> URL найбiльшої), спiльний для всiх iнстансiв
+THUMBNAIL_MARKER_TTL = 30 * 24 * 3600
+
+
+def with_extension(key: str, content_type: str | None) -> str:
+    # файлам на диску та в S3 потрiбне розширення, щоб їх вiддавали з правильним Content-Type
+    return key + (mimetypes.guess_extension(content_type or "") or "")
+
+
+class AvatarStorage(abc.ABC):
+    """ Бекенд зберiгання аватар. [save] приймає вже прочитаний у тимчасовий файл потiк i повертає
+        публiчний URL (з версiєю, щоб браузер i CDN не вiддавали стару картинку з кешу).
+        Уся блокуюча робота (мережа, диск) виконується у пулi потокiв, а не в event loop. """
+
+    @abc.abstractmethod
+    async def save(self, key: str, file: BinaryIO, content_type: str | None) -> str:
+        ...
+
+
+class CloudinaryStorage(AvatarStorage):
+    def __init__(self, width: int = 250, height: int = 250):
+        self.width = width
+        self.height = height
+        cloudinary.config(cloud_name=config.CLOUDINARY_NAME, api_key=config.CLOUDINARY_API_KEY,
+                          api_secret=config.CLOUDINARY_API_SECRET, secure=True,)
+
+    def _upload(self, key: str, file: BinaryIO) -> str:
+        resource = cloudinary.uploader.upload(file, public_id=key, overwrite=True)
+        return cloudinary.CloudinaryImage(key).build_url(width=self.width, height=self.height, crop="fill",
+                                                         version=resource.get("version"))
+
+    async def save(self, key: str, file: BinaryIO, content_type: str | None) -> str:
+        return await run_in_threadpool(self._upload, key, file)
+
+
+class LocalStorage(AvatarStorage):
+    # файли роздаються самим застосунком через StaticFiles (див. main.py)
+    def __init__(self, root: str, base_url: str):
+        self.root = Path(root)
+        self.base_url = base_url.rstrip("/")
+
+    def _write(self, key: str, file: BinaryIO) -> str:
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # запис у тимчасовий файл i атомарна пiдмiна - читачi не побачать напiвзаписану картинку
+        tmp = path.with_name(f".{path.name}.{uuid4().hex}")
+        with open(tmp, "wb") as target:
+            shutil.copyfileobj(file, target, CHUNK_SIZE)
+        os.replace(tmp, path)
+        return f"{self.base_url}/{key}?v={path.stat().st_mtime_ns}"
+
+    async def save(self, key: str, file: BinaryIO, content_type: str | None) -> str:
+        return await run_in_threadpool(self._write, with_extension(key, content_type), file)
+
+
+class S3Storage(AvatarStorage):
+    # будь-яке S3-сумiсне сховище, зокрема локальний MinIO; boto3 - необов'язкова залежнiсть
+    def __init__(self, endpoint_url: str | None, bucket: str, access_key: str | None, secret_key: str | None,
+                 public_url: str | None = None):
+        try:
+            import boto3
+        except ImportError as err:
+            raise RuntimeError("AVATAR_STORAGE=s3 requires boto3 to be installed") from err
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, aws_access_key_id=access_key,
+                                   aws_secret_access_key=secret_key)
+        self.bucket = bucket
+        self.public_url = (public_url or f"{endpoint_url}/{bucket}").rstrip("/")
+
+    def _upload(self, key: str, file: BinaryIO, content_type: str | None) -> str:
+        extra = {"ContentType": content_type} if content_type else None
+        self.client.upload_fileobj(file, self.bucket, key, ExtraArgs=extra)
+        return f"{self.public_url}/{key}?v={time.time_ns()}"
+
+    async def save(self, key: str, file: BinaryIO, content_type: str | None) -> str:
+        return await run_in_threadpool(self._upload, with_extension(key, content_type), file, content_type)
+
+
+def create_storage(kind: str) -> AvatarStorage:
+    if kind == "local":
+        return LocalStorage(config.AVATAR_LOCAL_ROOT, config.AVATAR_LOCAL_URL)
+    if kind == "s3":
+        return S3Storage(config.AVATAR_S3_ENDPOINT, config.AVATAR_S3_BUCKET, config.AVATAR_S3_ACCESS_KEY,
+                         config.AVATAR_S3_SECRET_KEY, config.AVATAR_S3_PUBLIC_URL)
+    return CloudinaryStorage()
+
+
+class AvatarPipeline:
+    """ Завантаження аватари без блокування воркера:
+        1) запит лише копiює тiло у тимчасовий файл (у пулi потокiв, з лiмiтом розмiру) i одразу
+           отримує 202 + <job_id>;
+        2) фонова задача (не бiльше <concurrency> одночасно) вiдправляє файл у [AvatarStorage],
+           оновлює <users.avatar> у власнiй сесiї до БД та кеш користувача;
+        3) стан задачi лежить у Redis (<avatar:job:ID>), його вiддає GET /api/users/avatar/{job_id}.
+        Якщо передано [ThumbnailStore], замiсть оригiналу у те саме сховище йдуть мiнiатюри,
+        i <users.avatar> вказує на найбiльшу з них (src/services/thumbnails.py). Повторне завантаження
+        тiєї ж картинки (маркер <avatar:thumbnail:DIGEST> у Redis) не запускає нi обробку, нi вiдправку. """
+
+    def __init__(self, storage: AvatarStorage, redis: aioredis.Redis, concurrency: int = 4, job_ttl: int = 3600,
+                 max_size: int = 5 * 1024 * 1024, thumbnails: ThumbnailStore | None = None):
+        self.storage = storage
+        self.thumbnails = thumbnails
+        self.redis = redis
+        self.job_ttl = job_ttl
+        self.max_size = max_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._tasks: set[asyncio.Task] = set()
+        metrics.gauge("avatars.in_progress", lambda: len(self._tasks))
+
+    def _spool(self, source: BinaryIO) -> SpooledTemporaryFile:
+        target = SpooledTemporaryFile(max_size=1024 * 1024)
+        size = 0
+        while chunk := source.read(CHUNK_SIZE):
+            size += len(chunk)
+            if size > self.max_size:
+                target.close()
+                raise HTTPException(status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                                    detail=f"Avatar must not exceed {self.max_size} bytes")
+            target.write(chunk)
+        target.seek(0)
+        return target
+
+    async def _set_job(self, job_id: str, email: str, **fields) -> None:
+        key = f"avatar:job:{job_id}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, mapping={"email": email, **{name: value for name, value in fields.items()
+                                                       if value is not None}})
+            pipe.expire(key, self.job_ttl)
+            await pipe.execute()
+
+    async def submit(self, user, upload: UploadFile) -> dict:
+        if not (upload.content_type or "").startswith("image/"):
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Avatar must be an image")
+        # UploadFile закривається разом з запитом, тож задача працює з власною копiєю
+        source = await run_in_threadpool(self._spool, upload.file)
+        job_id = uuid4().hex
+        await self._set_job(job_id, user.email, status="pending")
+        task = asyncio.create_task(self._run(job_id, user.email, source, upload.content_type))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return {"job_id": job_id, "status": "pending"}
+
+    @staticmethod
+    async def _save_url(email: str, url: str):
+        # [sessionmanager.session] лише друкує помилку БД i не пробрасує її далi,
+        # тож тут вона перехоплюється сама, щоб задача завершилася "failed" зi справжньою причиною
+        error = None
+        async with sessionmanager.session() as db:
+            try:
+                return await rep_users.update_avatar_url(email, url, db)
+            except Exception as err:
+                await db.rollback()
+                error = err
+        raise RuntimeError(f"Avatar URL was not saved: {error}") from error
+
+    async def _save_thumbnails(self, data: bytes) -> str:
+        digest = self.thumbnails.digest(data)
+        marker = f"avatar:thumbnail:{digest}"
+        url = await self.redis.get(marker)
+        if url is not None:
+            metrics.inc("thumbnails.reused")
+            return url.decode()
+        # невалiдне зображення вiдсiкається тут (415), до сховища нiчого не доходить
+        thumbnails = await self.thumbnails.render(data)
+        urls = await asyncio.gather(*(self.storage.save(self.thumbnails.key(digest, size), io.BytesIO(content),
+                                                        THUMBNAIL_CONTENT_TYPE)
+                                      for size, content in thumbnails.items()))
+        url = dict(zip(thumbnails, urls))[max(thumbnails)]
+        # маркер ставиться лише пiсля того, як усi розмiри вже у сховищi
+        await self.redis.set(marker, url, ex=THUMBNAIL_MARKER_TTL)
+        metrics.inc("thumbnails.created")
+        return url
+
+    async def _run(self, job_id: str, email: str, source: BinaryIO, content_type: str | None) -> None:
+        started = time.perf_counter()
+        try:
+            async with self._semaphore:
+                if self.thumbnails is not None:
+                    url = await self._save_thumbnails(await run_in_threadpool(source.read))
+                else:
+                    # той самий public_id, що й до фонового завантаження, - iснуючi аватари у Cloudinary
+                    # перезаписуються
+                    url = await self.storage.save(f"Py16-Web/{email}", source, content_type)
+            user = await self._save_url(email, url)
+            # вiдразу кешування <user> з новим URL для аватари
+            await auth_service.user_cache.set(email, user)
+            await self._set_job(job_id, email, status="done", avatar=url)
+            metrics.inc("avatars.done")
+        except Exception as err:
+            print(err)
+            metrics.inc("avatars.failed")
+            detail = err.detail if isinstance(err, HTTPException) else str(err)
+            await self._set_job(job_id, email, status="failed", detail=detail[:200])
+        finally:
+            await run_in_threadpool(source.close)
+            metrics.observe("avatars.upload_time", time.perf_counter() - started)
+
+    async def status(self, job_id: str, email: str) -> dict | None:
+        job = await self.redis.hgetall(f"avatar:job:{job_id}")
+        job = {key.decode(): value.decode() for key, value in job.items()}
+        # чужi задачi не показуємо
+        if job.pop("email", None) != email:
+            return None
+        return {"job_id": job_id, **job}
+
+    async def shutdown(self) -> None:
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+avatar_pipeline = AvatarPipeline(create_storage(config.AVATAR_STORAGE), auth_service.cache,
+                                 concurrency=config.AVATAR_UPLOAD_CONCURRENCY, job_ttl=config.AVATAR_JOB_TTL,
+                                 max_size=config.AVATAR_MAX_SIZE,
+                                 thumbnails=thumbnail_store if config.AVATAR_THUMBNAILS else None)
@@ -0,0 +1,144 @@
+import asyncio
+import os
+from bisect import bisect_right
+from ipaddress import IPv4Network, IPv6Network, ip_address, ip_network
+from typing import Iterable
+
+import redis.asyncio as aioredis
+from fastapi.concurrency import run_in_threadpool
+
+from src.services.metrics import metrics
+
+
+class CompiledBlocklist:
+    """ Вiдсортований масив iнтервалiв [start, end] для кожної версiї IP.
+        CIDR-мережi або вкладенi одна в одну, або не перетинаються, тож для кожного iнтервалу достатньо
+        пам'ятати найближчого "батька": пошук - це bisect (O(log n)) плюс пiдйом по вкладеностi
+        (не глибше за довжину префiкса). Повертається найбiльш специфiчне правило. """
+
+    def __init__(self, networks: Iterable[IPv4Network | IPv6Network]):
+        self.size = 0
+        self._tables = {4: self._build([n for n in networks if n.version == 4]),
+                        6: self._build([n for n in networks if n.version == 6])}
+
+    def _build(self, networks: list) -> tuple[list[int], list[int], list[int], list]:
+        networks = sorted(set(networks), key=lambda n: (int(n.network_address), -int(n.broadcast_address)))
+        starts, ends, parents, open_intervals = [], [], [], []
+        for index, network in enumerate(networks):
+            start, end = int(network.network_address), int(network.broadcast_address)
+            while open_intervals and ends[open_intervals[-1]] < start:
+                open_intervals.pop()
+            parents.append(open_intervals[-1] if open_intervals else -1)
+            starts.append(start)
+            ends.append(end)
+            open_intervals.append(index)
+        self.size += len(networks)
+        return starts, ends, parents, networks
+
+    def match(self, address) -> IPv4Network | IPv6Network | None:
+        if address.version == 6 and address.ipv4_mapped is not None:
+            address = address.ipv4_mapped
+        starts, ends, parents, networks = self._tables[address.version]
+        value = int(address)
+        index = bisect_right(starts, value) - 1
+        while index >= 0:
+            if value <= ends[index]:
+                return networks[index]
+            index = parents[index]
+        return None
+
+
+def parse_rules(lines: Iterable[str]) -> set[IPv4Network | IPv6Network]:
+    networks = set()
+    for line in lines:
+        rule = line.split("#", 1)[0].strip()
+        if not rule:
+            continue
+        try:
+            networks.add(ip_network(rule, strict=False))
+        except ValueError:
+            metrics.inc("blocklist.invalid_rules")
+    return networks
+
+
+class IPBlocklist:
+    """ Чорний список IP: статичнi правила з налаштувань + файл (по одному CIDR на рядок) + Redis set.
+        Скомпiльована структура пiдмiняється атомарно, тож перезавантаження не потребує рестарту
+        i не блокує запити, що вже йдуть. Кожне спрацювання рахується окремо для правила:
+        лiчильники <blocklist.hits.CIDR> у /api/metrics. """
+
+    def __init__(self, rules: Iterable[str] = (), file_path: str | None = None, redis_key: str | None = None,
+                 reload_interval: float = 30):
+        self.static_rules = parse_rules(rules)
+        self.file_path = file_path
+        self.redis_key = redis_key
+        self.reload_interval = reload_interval
+        self.rules = set(self.static_rules)
+        self.compiled = CompiledBlocklist(self.rules)
+        self._file_mtime: float | None = None
+        self._file_rules: set = set()
+        self._task: asyncio.Task | None = None
+        metrics.gauge("blocklist.rules", lambda: self.compiled.size)
+
+    def match(self, host: str | None) -> IPv4Network | IPv6Network | None:
+        if not host:
+            return None
+        try:
+            address = ip_address(host)
+        except ValueError:
+            return None
+        rule = self.compiled.match(address)
+        if rule is not None:
+            metrics.inc(f"blocklist.hits.{rule}")
+        return rule
+
+    def _read_file(self) -> set | None:
+        # None - файл не змiнився з минулого разу
+        mtime = os.stat(self.file_path).st_mtime
+        if mtime == self._file_mtime:
+            return None
+        with open(self.file_path, encoding="utf-8") as file:
+            rules = parse_rules(file)
+        self._file_mtime = mtime
+        return rules
+
+    async def reload(self, redis: aioredis.Redis | None = None) -> None:
+        if self.file_path:
+            try:
+                file_rules = await run_in_threadpool(self._read_file)
+                if file_rules is not None:
+                    self._file_rules = file_rules
+            except OSError as err:
+                print(err)
+        redis_rules = set()
+        if redis is not None and self.redis_key:
+            members = await redis.smembers(self.redis_key)
+            redis_rules = parse_rules(member.decode() if isinstance(member, bytes) else member for member in members)
+
+        rules = self.static_rules | self._file_rules | redis_rules
+        if rules != self.rules:
+            self.compiled = CompiledBlocklist(rules)
+            self.rules = rules
+            metrics.inc("blocklist.reloads")
+
+    async def _watch(self, redis: aioredis.Redis | None) -> None:
+        while True:
+            await asyncio.sleep(self.reload_interval)
+            try:
+                await self.reload(redis)
+            except Exception as err:
+                print(err)
+
+    async def start(self, redis: aioredis.Redis | None = None) -> None:
+        try:
+            await self.reload(redis)
+        except Exception as err:
+            # недоступний Redis не повинен валити старт застосунку - лишаються статичнi правила та файл
+            print(err)
+        if (self.file_path or self.redis_key) and self._task is None:
+            self._task = asyncio.create_task(self._watch(redis))
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
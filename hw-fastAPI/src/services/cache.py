@@ -0,0 +1,219 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Awaitable, Callable
+
+import redis.asyncio as aioredis
+from sqlalchemy.orm import make_transient_to_detached
+
+from src.entity.models import Role, User
+
+
+class LocalTTLCache:
+    """ Обмежений in-process кеш (LRU + TTL) - перший рiвень (L1) перед Redis.
+        Живе у пам'ятi воркера, тож не потребує жодного мережевого запиту.
+        <on_evict(key, value)> викликається для кожного запису, що покидає кеш (TTL, LRU, delete). """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 30, on_evict: Callable[[str, Any], None] | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def _evicted(self, key: str, value: Any) -> None:
+        if self.on_evict is not None:
+            self.on_evict(key, value)
+
+    def get(self, key: str) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._data[key]
+            self._evicted(key, value)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl: float | None = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._data[key] = (expires_at, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            evicted, (_, old) = self._data.popitem(last=False)
+            self._evicted(evicted, old)
+
+    def delete(self, key: str) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._evicted(key, item[1])
+
+    def clear(self) -> None:
+        items = list(self._data.items())
+        self._data.clear()
+        for key, (_, value) in items:
+            self._evicted(key, value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class TokenCache:
+    """ Кеш вже перевiрених access-токенiв: sha256(token) -> claims до моменту <exp>.
+        Повторний запит з тим самим токеном не перевiряє HMAC-пiдпис i не розбирає JSON знову.
+        Сам токен у пам'ятi не зберiгається - лише його дайджест. Iндекс <sub> -> дайджести
+        потрiбен для вiдкликання всiх токенiв користувача (logout, змiна refresh-токена); вiн чиститься
+        разом з витiсненням з L1, тож не може перерости сам кеш. """
+
+    def __init__(self, maxsize: int = 10000):
+        self.local = LocalTTLCache(maxsize=maxsize, on_evict=self._unindex)
+        self._by_subject: dict[str, set[str]] = {}
+
+    def _unindex(self, digest: str, payload: dict) -> None:
+        digests = self._by_subject.get(payload["sub"])
+        if digests is None:
+            return
+        digests.discard(digest)
+        if not digests:
+            del self._by_subject[payload["sub"]]
+
+    @staticmethod
+    def digest(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> dict | None:
+        return self.local.get(self.digest(token))
+
+    def put(self, token: str, payload: dict) -> None:
+        ttl = payload["exp"] - time.time()
+        if ttl <= 0:
+            return
+        digest = self.digest(token)
+        self.local.set(digest, payload, ttl=ttl)
+        self._by_subject.setdefault(payload["sub"], set()).add(digest)
+
+    def evict(self, token: str) -> None:
+        self.local.delete(self.digest(token))
+
+    def evict_subject(self, subject: str) -> None:
+        for digest in self._by_subject.pop(subject, ()):
+            self.local.delete(digest)
+
+
+@dataclass(frozen=True, slots=True)
+class UserSnapshot:
+    """ Компактний знiмок автентифiкованого користувача для кешу замiсть pickle ORM-об'єкта [User].
+        Зберiгає лише те, що потрiбно маршрутам (без <password>), а у Redis лягає
+        як JSON-масив з номером версiї схеми першим елементом. Якщо модель змiнилася - збiльшуємо
+        VERSION, i старi записи просто вважаються промахом кешу. """
+
+    VERSION = 1
+
+    id: int
+    username: str
+    email: str
+    role: str | None
+    avatar: str | None
+    confirmed: bool
+    updated_at: str | None
+
+    @classmethod
+    def from_user(cls, user: User) -> "UserSnapshot":
+        role = user.role.value if user.role is not None else None
+        updated_at = user.updated_at.isoformat() if user.updated_at else None
+        return cls(user.id, user.username, user.email, role, user.avatar, bool(user.confirmed), updated_at)
+
+    def dumps(self) -> bytes:
+        return json.dumps([self.VERSION, self.id, self.username, self.email, self.role, self.avatar,
+                           self.confirmed, self.updated_at], separators=(",", ":")).encode()
+
+    @classmethod
+    def loads(cls, payload: bytes) -> "UserSnapshot | None":
+        try:
+            version, *fields = json.loads(payload)
+        except (ValueError, TypeError):
+            return None
+        if version != cls.VERSION:
+            return None
+        return cls(*fields)
+
+    def to_user(self) -> User:
+        # гiдрацiя без сесiї до БД: об'єкт одразу позначається як <detached> з вiдомим первинним ключем,
+        # тож filter_by(user=user) та iншi звернення працюють так само, як з об'єктом з БД
+        user = User(id=self.id, username=self.username, email=self.email, role=Role(self.role) if self.role else None,
+                    avatar=self.avatar, confirmed=self.confirmed,
+                    updated_at=datetime.fromisoformat(self.updated_at) if self.updated_at else None)
+        make_transient_to_detached(user)
+        return user
+
+
+class UserCache:
+    """ Дворiвневий кеш користувачiв: L1 (LocalTTLCache) -> L2 (asyncio Redis) -> loader (Postgres).
+        Одночаснi запити по одному й тому ж ключу чекають на один спiльний [loader] (single-flight),
+        тож при холодному кешi до БД iде лише один запит.
+        У L1 лежить незмiнний [UserSnapshot], кожен запит отримує з нього власний об'єкт [User]. """
+
+    def __init__(self, redis: aioredis.Redis, ttl: int = 300, l1_maxsize: int = 1024, l1_ttl: float = 30,
+                 prefix: str = "user:"):
+        self.redis = redis
+        self.ttl = ttl
+        self.prefix = prefix
+        self.local = LocalTTLCache(maxsize=l1_maxsize, ttl=l1_ttl)
+        self._inflight: dict[str, asyncio.Future] = {}
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    async def get_snapshot(self, key: str, loader: Callable[[], Awaitable[User | None]]) -> UserSnapshot | None:
+        snapshot = self.local.get(key)
+        if snapshot is not None:
+            return snapshot
+
+        future = self._inflight.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            snapshot = await self._fetch(key, loader)
+        except BaseException as err:
+            future.set_exception(err)
+            # щоб не було "Future exception was never retrieved", коли нiхто не чекав
+            future.exception()
+            raise
+        else:
+            future.set_result(snapshot)
+        finally:
+            self._inflight.pop(key, None)
+        return snapshot
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[User | None]]) -> User | None:
+        snapshot = await self.get_snapshot(key, loader)
+        return None if snapshot is None else snapshot.to_user()
+
+    async def _fetch(self, key: str, loader: Callable[[], Awaitable[User | None]]) -> UserSnapshot | None:
+        payload = await self.redis.get(self._key(key))
+        snapshot = None if payload is None else UserSnapshot.loads(payload)
+        if snapshot is None:
+            user = await loader()
+            if user is None:
+                return None
+            snapshot = UserSnapshot.from_user(user)
+            await self.redis.set(self._key(key), snapshot.dumps(), ex=self.ttl)
+        self.local.set(key, snapshot)
+        return snapshot
+
+    async def set(self, key: str, user: User) -> None:
+        snapshot = UserSnapshot.from_user(user)
+        await self.redis.set(self._key(key), snapshot.dumps(), ex=self.ttl)
+        self.local.set(key, snapshot)
+
+    async def invalidate(self, key: str) -> None:
+        self.local.delete(key)
+        await self.redis.delete(self._key(key))
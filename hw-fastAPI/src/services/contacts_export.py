@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+from datetime import date
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+from src.conf.config import config
+from src.database.db import sessionmanager
+from src.entity.models import User
+from src.repository import contacts as rep_contacts
+
+
+EXPORT_FIELDS = [column.key for column in rep_contacts.EXPORT_COLUMNS]
+MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def _json_default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+async def _rows(user: User | None) -> AsyncIterator:
+    # власна сесiя (на реплiцi, якщо є) живе рiвно стiльки, скiльки триває вiдправка вiдповiдi
+    async with await sessionmanager.read_session() as db:
+        async for row in rep_contacts.stream_contacts(db, user, config.CONTACTS_EXPORT_BATCH_SIZE):
+            yield row
+
+
+async def ndjson_chunks(user: User | None) -> AsyncIterator[str]:
+    buffer = []
+    async for row in _rows(user):
+        buffer.append(json.dumps(dict(row), default=_json_default, ensure_ascii=False))
+        if len(buffer) >= config.CONTACTS_EXPORT_BATCH_SIZE:
+            yield "\n".join(buffer) + "\n"
+            buffer.clear()
+    if buffer:
+        yield "\n".join(buffer) + "\n"
+
+
+async def csv_chunks(user: User | None) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    count = 0
+    async for row in _rows(user):
+        writer.writerow([row[field] for field in EXPORT_FIELDS])
+        count += 1
+        if count % config.CONTACTS_EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def export_response(format: str, user: User | None) -> StreamingResponse:
+    """ Потоковий експорт: пам'ять не залежить вiд розмiру таблицi - у кожен момент у нiй лише одна пачка рядкiв. """
+    chunks = csv_chunks(user) if format == "csv" else ndjson_chunks(user)
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format],
+                             headers={"Content-Disposition": f'attachment; filename="contacts.{format}"'})
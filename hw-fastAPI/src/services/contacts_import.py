@@ -0,0 +1,150 @@
+import csv
+import io
+import json
+from itertools import islice
+from typing import Iterator
+
+from fastapi import HTTPException, UploadFile, status
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.conf.config import config
+from src.entity.models import User
+from src.repository import contacts as rep_contacts
+from src.schemas.contact import ContactSchema, ContactImportError, ContactImportReport
+
+
+IMPORT_FORMATS = {".csv": "csv", ".ndjson": "ndjson", ".jsonl": "ndjson",
+                  "text/csv": "csv", "application/x-ndjson": "ndjson", "application/jsonl": "ndjson"}
+
+
+def detect_format(file: UploadFile, format: str | None) -> str:
+    if format:
+        return format
+    filename = (file.filename or "").lower()
+    for extension in (".csv", ".ndjson", ".jsonl"):
+        if filename.endswith(extension):
+            return IMPORT_FORMATS[extension]
+    if file.content_type in IMPORT_FORMATS:
+        return IMPORT_FORMATS[file.content_type]
+    raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                        detail="Unsupported import format, use CSV or NDJSON.")
+
+
+class ImportAborted(Exception):
+    # файл неможливо читати далi (не UTF-8, зламаний CSV) - на вiдмiну вiд помилки в окремому рядку
+    def __init__(self, row: int, detail: str):
+        super().__init__(detail)
+        self.row = row
+        self.detail = detail
+
+
+def iter_rows(stream: io.TextIOBase, format: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    # (номер рядка, данi, помилка розбору)
+    line_number = 0
+    try:
+        if format == "csv":
+            reader = csv.DictReader(stream)
+            for row in reader:
+                line_number = reader.line_num
+                yield line_number, row, None
+            return
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as err:
+                yield line_number, None, f"Invalid JSON: {err}"
+                continue
+            if not isinstance(row, dict):
+                yield line_number, None, "Each line must be a JSON object"
+                continue
+            yield line_number, row, None
+    except UnicodeDecodeError:
+        raise ImportAborted(line_number, f"File is not valid UTF-8 (after line {line_number})")
+    except csv.Error as err:
+        raise ImportAborted(line_number, f"Malformed CSV after line {line_number}: {err}")
+
+
+def read_batch(rows: Iterator, size: int) -> tuple[list, ImportAborted | None]:
+    # рядки, прочитанi до фатальної помилки, не губляться - їх пачка ще буде iмпортована
+    batch = []
+    try:
+        for item in islice(rows, size):
+            batch.append(item)
+    except ImportAborted as err:
+        return batch, err
+    return batch, None
+
+
+class ContactImport:
+    """ Потоковий iмпорт контактiв з CSV / NDJSON.
+        Файл читається пачками по CONTACTS_IMPORT_BATCH_SIZE рядкiв (читання та розбiр - у threadpool),
+        кожна пачка валiдується через [ContactSchema] i вставляється одним INSERT ... ON CONFLICT (email),
+        тож у пам'ятi нiколи не лежить бiльше однiєї пачки. """
+
+    def __init__(self, db: AsyncSession, user: User):
+        self.db = db
+        self.user = user
+        self.report = ContactImportReport()
+        self._seen_emails: set[str] = set()
+
+    def fail(self, row: int, detail: str, email: str | None = None) -> None:
+        self.report.failed += 1
+        if len(self.report.errors) < config.CONTACTS_IMPORT_MAX_ERRORS:
+            self.report.errors.append(ContactImportError(row=row, email=email, detail=detail))
+
+    async def run(self, file: UploadFile, format: str) -> ContactImportReport:
+        stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        rows = iter_rows(stream, format)
+        try:
+            while True:
+                batch, aborted = await run_in_threadpool(read_batch, rows, config.CONTACTS_IMPORT_BATCH_SIZE)
+                if self.report.total + len(batch) > config.CONTACTS_IMPORT_MAX_ROWS:
+                    # обрiзання файлу - не помилка рядка, тож <failed> не змiнюється
+                    await self.import_batch(batch[:config.CONTACTS_IMPORT_MAX_ROWS - self.report.total])
+                    self.report.truncated = True
+                    break
+                await self.import_batch(batch)
+                if aborted is not None:
+                    self.report.aborted = aborted.detail
+                    break
+                if not batch:
+                    break
+        finally:
+            # не закриваємо сам [UploadFile] разом з обгорткою
+            stream.detach()
+        return self.report
+
+    async def import_batch(self, batch: list[tuple[int, dict | None, str | None]]) -> None:
+        valid: list[tuple[int, dict]] = []
+        for row_number, row, error in batch:
+            self.report.total += 1
+            if error is not None:
+                self.fail(row_number, error)
+                continue
+            # порожнi клiтинки CSV вважаємо незаповненими полями (тодi спрацюють значення за замовчуванням)
+            row = {key: value for key, value in row.items() if key and value not in (None, "")}
+            try:
+                contact = ContactSchema.model_validate(row).model_dump(warnings=False)
+            except ValidationError as err:
+                # у NDJSON <email> може бути числом чи списком - у звiт потрапляє лише рядок
+                email = row.get("email")
+                self.fail(row_number, "; ".join(f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in err.errors()),
+                          email if isinstance(email, str) else None)
+                continue
+            if contact["email"] in self._seen_emails:
+                self.fail(row_number, "Duplicate email in the file", contact["email"])
+                continue
+            self._seen_emails.add(contact["email"])
+            valid.append((row_number, contact))
+
+        if not valid:
+            return
+        inserted = await rep_contacts.create_contacts_bulk([contact for _, contact in valid], self.db, self.user)
+        self.report.inserted += len(inserted)
+        for row_number, contact in valid:
+            if contact["email"] not in inserted:
+                self.fail(row_number, "Contact with this email already exists", contact["email"])
@@ -0,0 +1,108 @@
+import json
+import time
+
+import redis.asyncio as aioredis
+from redis.exceptions import ResponseError
+
+from src.conf.config import config
+from src.services.redis_client import redis_client
+
+
+# перенесення листа з retry sorted set назад у stream: або обидвi операцiї, або жодної
+PROMOTE_SCRIPT = """
+if redis.call('ZREM', KEYS[1], ARGV[1]) == 0 then
+    return 0
+end
+redis.call('XADD', KEYS[2], 'MAXLEN', '~', ARGV[2], '*', unpack(ARGV, 3))
+return 1
+"""
+
+
+class EmailQueue:
+    """ Персистентна черга вихiдних листiв у Redis Stream.
+        Веб-воркер лише робить XADD (один запит до Redis), а вiдправляє листи окремий процес
+        src/workers/email_worker.py через consumer group: повiдомлення лишається у PEL до XACK,
+        тож пiсля падiння воркера його пiдхоплює iнший (XAUTOCLAIM).
+        Повторнi спроби чекають у sorted set <retry_key> (score - час наступної спроби),
+        а листи, що вичерпали спроби, переносяться у окремий stream <dead_stream>. """
+
+    def __init__(self, redis: aioredis.Redis, stream: str, group: str, retry_key: str, dead_stream: str,
+                 maxlen: int = 100_000):
+        self.redis = redis
+        self.stream = stream
+        self.group = group
+        self.retry_key = retry_key
+        self.dead_stream = dead_stream
+        self.maxlen = maxlen
+        self._promote = redis.register_script(PROMOTE_SCRIPT)
+
+    async def enqueue(self, recipient: str, subject: str, template: str, body: dict) -> str:
+        fields = {"recipient": recipient, "subject": subject, "template": template,
+                  "body": json.dumps(body), "attempts": 0}
+        return await self.redis.xadd(self.stream, fields, maxlen=self.maxlen, approximate=True)
+
+    async def ensure_group(self) -> None:
+        try:
+            await self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except ResponseError as err:
+            if "BUSYGROUP" not in str(err):
+                raise
+
+    async def read(self, consumer: str, count: int, block_ms: int, claim_idle_ms: int) -> list[tuple[str, dict]]:
+        # спочатку забираємо "завислi" повiдомлення воркерiв, що впали, потiм - новi
+        _, claimed, *_ = await self.redis.xautoclaim(self.stream, self.group, consumer, claim_idle_ms,
+                                                     start_id="0-0", count=count)
+        messages = [(message_id, fields) for message_id, fields in claimed if fields]
+        if messages:
+            return [self._decode(message_id, fields) for message_id, fields in messages]
+        response = await self.redis.xreadgroup(self.group, consumer, {self.stream: ">"}, count=count, block=block_ms)
+        return [self._decode(message_id, fields) for _, entries in response for message_id, fields in entries]
+
+    @staticmethod
+    def _decode(message_id, fields: dict) -> tuple[str, dict]:
+        decoded = {(key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes)
+                                                                       else value)
+                   for key, value in fields.items()}
+        return message_id.decode() if isinstance(message_id, bytes) else message_id, decoded
+
+    async def ack(self, message_ids: list[str]) -> None:
+        if not message_ids:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.xack(self.stream, self.group, *message_ids)
+            pipe.xdel(self.stream, *message_ids)
+            await pipe.execute()
+
+    async def retry(self, message_id: str, fields: dict, delay: float) -> None:
+        member = json.dumps({**fields, "origin": message_id})
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zadd(self.retry_key, {member: time.time() + delay})
+            pipe.xack(self.stream, self.group, message_id)
+            pipe.xdel(self.stream, message_id)
+            await pipe.execute()
+
+    async def dead_letter(self, message_id: str, fields: dict, error: str) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.xadd(self.dead_stream, {**fields, "origin": message_id, "error": error[:500]},
+                      maxlen=self.maxlen, approximate=True)
+            pipe.xack(self.stream, self.group, message_id)
+            pipe.xdel(self.stream, message_id)
+            await pipe.execute()
+
+    async def promote_due(self, limit: int = 100) -> int:
+        # листи, для яких настав час повторної спроби, повертаються у stream;
+        # ZREM повертає 1 лише одному з воркерiв, тож дублiв не буде, а ZREM + XADD - один Lua-скрипт,
+        # i лист не загубиться мiж ними
+        members = await self.redis.zrangebyscore(self.retry_key, "-inf", time.time(), start=0, num=limit)
+        promoted = 0
+        for member in members:
+            fields = json.loads(member)
+            fields.pop("origin", None)
+            pairs = [item for name, value in fields.items() for item in (name, value)]
+            promoted += await self._promote(keys=[self.retry_key, self.stream], args=[member, self.maxlen, *pairs])
+        return promoted
+
+
+email_queue = EmailQueue(redis_client, stream=config.MAIL_QUEUE_STREAM, group=config.MAIL_QUEUE_GROUP,
+                         retry_key=config.MAIL_QUEUE_RETRY_KEY, dead_stream=config.MAIL_QUEUE_DEAD_STREAM,
+                         maxlen=config.MAIL_QUEUE_MAXLEN)
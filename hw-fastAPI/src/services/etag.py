@@ -0,0 +1,62 @@
+import hashlib
+import time
+
+from fastapi import Request, Response, status
+
+from src.conf.config import config
+from src.services.generations import ContactGenerations, contact_generations
+from src.services.metrics import metrics
+
+
+# змiнюється разом зi схемами вiдповiдей, щоб старi ETag не збiгалися з новим форматом
+REPRESENTATION_VERSION = 1
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b("|".join(map(str, (REPRESENTATION_VERSION, *parts))).encode(), digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def if_none_match(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in (value.strip().removeprefix("W/") for value in header.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    metrics.inc("etag.not_modified")
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+
+
+def set_etag(response: Response, etag: str | None) -> None:
+    if etag is not None:
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+
+
+class ContactETags:
+    """ Сильнi ETag для читання контактiв без звернення до Postgres: тег будується з поколiння контактiв
+        власника (src/services/generations.py) i параметрiв запиту, тож перевiрка If-None-Match коштує
+        один HMGET у Redis. Поки з останньої змiни не минув <settle> (макс. вiдставання репiк),
+        тег не видається зовсiм - iнакше стара вiдповiдь з репiки закрiпилася б за новим поколiнням. """
+
+    def __init__(self, generations: ContactGenerations, settle: float = 0):
+        self.generations = generations
+        self.settle = settle
+
+    async def etag(self, owner: int | str, *parts) -> str | None:
+        try:
+            generation, changed_at = await self.generations.get(owner)
+        except Exception as err:
+            print(err)
+            return None
+        if time.time() - changed_at < self.settle:
+            return None
+        return make_etag("contacts", owner, generation, *parts)
+
+
+contact_etags = ContactETags(contact_generations, settle=config.DB_REPLICA_MAX_LAG if config.DB_REPLICA_URLS else 0)
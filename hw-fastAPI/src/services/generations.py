@@ -0,0 +1,77 @@
+import time
+
+import redis.asyncio as aioredis
+
+from src.services.metrics import metrics
+from src.services.redis_client import redis_client
+
+
+class GenerationsUnavailable(Exception):
+    """ Поколiння не можна вважати актуальними: збiльшення лiчильника не дiйшло до Redis. """
+
+
+class ContactGenerations:
+    """ Лiчильники змiн контактiв у Redis: окремий для кожного власника та глобальний <all> (для /contacts/all
+        i глобального пошуку). Кожен запис (create/update/delete, змiна аватари власника) збiльшує лiчильник,
+        тож ETag-и та кешованi результати, що мiстять номер поколiння, застарiвають самi - без сканування ключiв.
+        Поряд з лiчильником зберiгається час останньої змiни: вiдповiдь з репiки, що вiдстає, не повинна
+        отримати ETag нового поколiння.
+        Якщо [bump] не дiйшов до Redis, власник запам'ятовується у <_pending>: поки збiльшення не вдасться
+        повторити, [get] пiднiмає [GenerationsUnavailable], i ETag-и та кеш результатiв просто вимикаються
+        замiсть того, щоб вiддавати старе поколiння. """
+
+    GLOBAL = "all"
+
+    def __init__(self, redis: aioredis.Redis, prefix: str = "contacts:gen:"):
+        self.redis = redis
+        self.prefix = prefix
+        self._pending: set[int] = set()
+        metrics.gauge("contacts.generation_pending", lambda: len(self._pending))
+
+    async def _retry_pending(self) -> None:
+        if not self._pending:
+            return
+        owners = set(self._pending)
+        try:
+            await self._increment(owners)
+        except Exception as err:
+            raise GenerationsUnavailable(str(err)) from err
+        self._pending -= owners
+        metrics.inc("contacts.generation_recovered", len(owners))
+
+    async def get(self, owner: int | str) -> tuple[int, float]:
+        await self._retry_pending()
+        generation, changed_at = await self.redis.hmget(f"{self.prefix}{owner}", "n", "at")
+        return int(generation or 0), float(changed_at or 0)
+
+    async def get_many(self, *owners: int | str) -> list[tuple[int, float]]:
+        await self._retry_pending()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for owner in owners:
+                pipe.hmget(f"{self.prefix}{owner}", "n", "at")
+            values = await pipe.execute()
+        return [(int(generation or 0), float(changed_at or 0)) for generation, changed_at in values]
+
+    async def _increment(self, owners: set[int]) -> None:
+        now = time.time()
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in [f"{self.prefix}{owner}" for owner in owners] + [f"{self.prefix}{self.GLOBAL}"]:
+                pipe.hincrby(key, "n", 1)
+                pipe.hset(key, "at", now)
+            await pipe.execute()
+
+    async def bump(self, owner: int) -> None:
+        owners = self._pending | {owner}
+        try:
+            await self._increment(owners)
+        except Exception as err:
+            # запис у БД вже зафiксовано - недоступний Redis не повинен перетворювати його на 500,
+            # але й кешi цього воркера не повиннi далi вiрити старому поколiнню
+            print(err)
+            metrics.inc("contacts.generation_errors")
+            self._pending.add(owner)
+            return
+        self._pending -= owners
+
+
+contact_generations = ContactGenerations(redis_client)
@@ -0,0 +1,37 @@
+from collections import defaultdict
+from typing import Callable
+
+
+class Metrics:
+    """ Мiнiмальний реєстр метрик воркера: лiчильники, гейджi та таймiнги.
+        Значення вiддаються як словник через маршрут /api/metrics у main.py. """
+
+    def __init__(self):
+        self._counters: dict[str, int] = defaultdict(int)
+        self._gauges: dict[str, Callable[[], float]] = {}
+        self._timings: dict[str, list[float]] = {}
+
+    def inc(self, name: str, value: int = 1) -> None:
+        self._counters[name] += value
+
+    def gauge(self, name: str, callback: Callable[[], float]) -> None:
+        # гейдж рахується лише в момент запиту метрик, тож на гарячому шляху нiчого не коштує
+        self._gauges[name] = callback
+
+    def observe(self, name: str, seconds: float) -> None:
+        # [count, sum, max]
+        timing = self._timings.setdefault(name, [0, 0.0, 0.0])
+        timing[0] += 1
+        timing[1] += seconds
+        timing[2] = max(timing[2], seconds)
+
+    def snapshot(self) -> dict:
+        return {
+            "counters": dict(self._counters),
+            "gauges": {name: callback() for name, callback in self._gauges.items()},
+            "timings": {name: {"count": count, "sum": total, "max": maximum}
+                        for name, (count, total, maximum) in self._timings.items()},
+        }
+
+
+metrics = Metrics()
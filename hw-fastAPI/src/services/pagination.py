@@ -0,0 +1,36 @@
+import base64
+import json
+
+from fastapi import HTTPException, status
+
+
+""" Keyset-пагiнацiя: замiсть OFFSET клiєнт отримує непрозорий курсор (заголовок X-Next-Cursor),
+    у якому закодовано <id> останнього рядка сторiнки. Наступна сторiнка - це WHERE id > :last_id
+    ORDER BY id LIMIT :limit, тобто index range scan незалежно вiд глибини. """
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(last_id: int) -> str:
+    raw = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        last_id = json.loads(raw)["id"]
+        if not isinstance(last_id, int):
+            raise ValueError(last_id)
+        return last_id
+    except (ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+
+
+def next_cursor(items: list, limit: int) -> str | None:
+    # неповна сторiнка означає, що далi рядкiв немає
+    if len(items) < limit:
+        return None
+    last = items[-1]
+    # елементи - ORM-об'єкти або словники з проекцiї (src/repository/contacts.py -> get_contact_rows)
+    return encode_cursor(last["id"] if isinstance(last, dict) else last.id)
@@ -0,0 +1,86 @@
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+from src.conf.config import config
+from src.services.metrics import metrics
+
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+# функцiї на рiвнi модуля, щоб [ProcessPoolExecutor] мiг їх серiалiзувати у дочiрнiй процес
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+class PasswordPool:
+    """ bcrypt навмисно повiльний (~100-300 ms), тож хешування та перевiрка паролiв виконуються у пулi,
+        а не в event loop. Черга обмежена: якщо зайнятi всi <workers> i ще <queue_size> задач чекають,
+        запит одразу вiдхиляється з 503 + Retry-After замiсть того, щоб накопичуватися. """
+
+    def __init__(self, kind: str = "thread", workers: int = 4, queue_size: int = 64, retry_after: int = 1):
+        self.kind = kind
+        self.workers = workers
+        self.capacity = workers + queue_size
+        self.retry_after = retry_after
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._running = 0
+        self._slots = asyncio.Semaphore(workers)
+        metrics.gauge("passwords.pending", lambda: self._pending)
+        metrics.gauge("passwords.queue_depth", lambda: max(self._pending - self._running, 0))
+
+    @property
+    def executor(self) -> Executor:
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="passwords")
+        return self._executor
+
+    async def run(self, func, *args):
+        if self._pending >= self.capacity:
+            metrics.inc("passwords.rejected")
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Server is busy, try again later",
+                                headers={"Retry-After": str(self.retry_after)})
+        self._pending += 1
+        started = time.perf_counter()
+        try:
+            # зайнятi слоти рахуються на боцi event loop (без гонок мiж потоками i однаково для пулу процесiв):
+            # задача, що тримає слот, виконується, решта чекає в черзi
+            async with self._slots:
+                metrics.observe("passwords.queue_wait", time.perf_counter() - started)
+                self._running += 1
+                try:
+                    return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+                finally:
+                    self._running -= 1
+        finally:
+            self._pending -= 1
+            metrics.observe("passwords.total_time", time.perf_counter() - started)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(_verify, plain_password, hashed_password)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(_hash, password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_pool = PasswordPool(kind=config.PASSWORD_POOL_KIND, workers=config.PASSWORD_POOL_WORKERS,
+                             queue_size=config.PASSWORD_POOL_QUEUE_SIZE,
+                             retry_after=config.PASSWORD_POOL_RETRY_AFTER)
@@ -0,0 +1,8 @@
+import redis.asyncio as aioredis
+
+from src.conf.config import config
+
+
+# Один клiєнт (i один пул з'єднань) на процес для всiх сервiсiв: кеш користувачiв, вiдкликання токенiв,
+# черга листiв, поколiння контактiв, ratelimit i blocklist. Закривається на shutdown у main.py
+redis_client = aioredis.Redis(host=config.REDIS_DOMAIN, port=config.REDIS_PORT, db=0, password=config.REDIS_PASSWORD)
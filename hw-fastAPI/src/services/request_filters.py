@@ -0,0 +1,56 @@
+import json
+from typing import Callable, Sequence
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.services.blocklist import IPBlocklist
+from src.services.user_agents import UserAgentFilter
+
+
+# фiльтр отримує ASGI <scope> i повертає True, якщо запит треба вiдхилити
+RequestFilter = Callable[[Scope], bool]
+
+
+class RequestFilterMiddleware:
+    """ Чистий ASGI-middleware з ланцюжком фiльтрiв замiсть кiлькох @app.middleware("http").
+        Кожен @app.middleware("http") - це окремий [BaseHTTPMiddleware] зi своїм task group та
+        перепакуванням тiла вiдповiдi у стрiм. Тут же фiльтри перевiряють лише <scope> (адреса клiєнта,
+        заголовки), i заборонений запит отримує 403 ще до маршрутизацiї, а дозволений передається далi
+        без жодних обгорток. """
+
+    def __init__(self, app: ASGIApp, filters: Sequence[RequestFilter], status_code: int = 403,
+                 detail: str = "You are banned"):
+        self.app = app
+        self.filters = tuple(filters)
+        self.status_code = status_code
+        self._body = json.dumps({"detail": detail}).encode()
+        self._headers = [(b"content-type", b"application/json"), (b"content-length", str(len(self._body)).encode())]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            for request_filter in self.filters:
+                if request_filter(scope):
+                    await send({"type": "http.response.start", "status": self.status_code, "headers": self._headers})
+                    await send({"type": "http.response.body", "body": self._body})
+                    return
+        await self.app(scope, receive, send)
+
+
+def get_header(scope: Scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+def ip_filter(blocklist: IPBlocklist) -> RequestFilter:
+    def check(scope: Scope) -> bool:
+        client = scope.get("client")
+        return client is not None and blocklist.match(client[0]) is not None
+    return check
+
+
+def user_agent_filter(user_agents: UserAgentFilter) -> RequestFilter:
+    def check(scope: Scope) -> bool:
+        return user_agents.is_banned(get_header(scope, b"user-agent"))
+    return check
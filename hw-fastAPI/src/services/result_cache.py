@@ -0,0 +1,72 @@
+import hashlib
+import json
+import time
+from typing import Any, Awaitable, Callable
+
+import redis.asyncio as aioredis
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from src.conf.config import config
+from src.services.generations import ContactGenerations, contact_generations
+from src.services.metrics import metrics
+
+
+class ResultCache:
+    """ Cache-aside для результатiв пошуку та днiв народження. Ключ - назва запиту, нормалiзованi параметри,
+        i поточне поколiння контактiв (src/services/generations.py); результати однаковi для всiх користувачiв,
+        тож <user.id> до ключа не входить. Будь-який запис контакту збiльшує поколiння, тож старi ключi просто
+        перестають запитуватися i зникають по TTL - жодного сканування чи видалення ключiв. У Redis лежить
+        вже готовий JSON вiдповiдi, тож влучання не потребує нi БД, нi серiалiзацiї.
+        Результат рахується на реплiцi: поки з останньої змiни не минув <settle> (макс. вiдставання реплiк),
+        вiн вiддається, але не кешується - iнакше стара вiдповiдь закрiпилася б за новим поколiнням. """
+
+    def __init__(self, redis: aioredis.Redis, generations: ContactGenerations, ttl: int = 300,
+                 prefix: str = "results:", settle: float = 0):
+        self.redis = redis
+        self.generations = generations
+        self.ttl = ttl
+        self.settle = settle
+        self.prefix = prefix
+        self.hits = 0
+        self.misses = 0
+        metrics.gauge("result_cache.hit_ratio", lambda: self.hits / (self.hits + self.misses or 1))
+
+    def key(self, name: str, generation: int, params: dict) -> str:
+        digest = hashlib.blake2b(json.dumps(params, sort_keys=True, default=str).encode(), digest_size=16).hexdigest()
+        return f"{self.prefix}{name}:{generation}:{digest}"
+
+    async def get_or_compute(self, name: str, params: dict, compute: Callable[[], Awaitable[Any]],
+                             adapter: TypeAdapter, owner: int | str = ContactGenerations.GLOBAL) -> Response:
+        # <owner> - чиє поколiння стежить за актуальнiстю; пошук йде по всiх контактах, тож за замовчуванням глобальне
+        key = None
+        changed_at = 0.0
+        try:
+            generation, changed_at = await self.generations.get(owner)
+            key = self.key(name, generation, params)
+            payload = await self.redis.get(key)
+        except Exception as err:
+            # недоступний Redis - просто працюємо без кешу
+            print(err)
+            payload = None
+        if payload is not None:
+            self.hits += 1
+            metrics.inc(f"result_cache.hits.{name}")
+            return Response(content=payload, media_type="application/json")
+
+        self.misses += 1
+        metrics.inc(f"result_cache.misses.{name}")
+        result = await compute()
+        payload = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+        if key is not None and time.time() - changed_at < self.settle:
+            metrics.inc(f"result_cache.unsettled.{name}")
+        elif key is not None:
+            try:
+                await self.redis.set(key, payload, ex=self.ttl)
+            except Exception as err:
+                print(err)
+        return Response(content=payload, media_type="application/json")
+
+
+result_cache = ResultCache(contact_generations.redis, contact_generations, ttl=config.RESULT_CACHE_TTL,
+                           settle=config.DB_REPLICA_MAX_LAG if config.DB_REPLICA_URLS else 0)
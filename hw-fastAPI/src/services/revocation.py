@@ -0,0 +1,94 @@
+import time
+
+import redis.asyncio as aioredis
+
+
+# атомарна ротацiя: новий <jti> записується лише якщо пред'явлений токен є поточним у своїй родинi;
+# там само родина повертається у множину користувача, i та живе не менше за новий refresh-токен
+ROTATE_SCRIPT = """
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    return -1
+end
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+    redis.call('SADD', KEYS[3], ARGV[4])
+    redis.call('EXPIRE', KEYS[3], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+
+def _ttl(exp: float) -> int:
+    return max(int(exp - time.time()) + 1, 1)
+
+
+class TokenRevocation:
+    """ Стан токенiв у Redis замiсть колонки <users.refresh_token> у Postgres.
+        - <revoked:jti:ID>  - denylist окремих токенiв, живе рiвно до <exp> самого токена;
+        - <refresh:fam:ID>  - <jti> поточного refresh-токена родини (одна родина = один login);
+        - <revoked:fam:ID>  - вiдкликана родина: i її refresh-, i всi її access-токени;
+        - <refresh:user:EMAIL> - множина родин користувача, для "вийти на всiх пристроях".
+        Повторне використання вже ротованого refresh-токена означає його крадiжку - родина вiдкликається цiлком. """
+
+    ROTATED = 1
+    REUSED = 0
+    REVOKED = -1
+
+    def __init__(self, redis: aioredis.Redis):
+        self.redis = redis
+        self._rotate = redis.register_script(ROTATE_SCRIPT)
+
+    @staticmethod
+    def _jti_key(jti: str) -> str:
+        return f"revoked:jti:{jti}"
+
+    @staticmethod
+    def _family_key(family: str) -> str:
+        return f"refresh:fam:{family}"
+
+    @staticmethod
+    def _revoked_family_key(family: str) -> str:
+        return f"revoked:fam:{family}"
+
+    @staticmethod
+    def _user_key(email: str) -> str:
+        return f"refresh:user:{email}"
+
+    async def is_revoked(self, jti: str, family: str | None) -> bool:
+        # гарячий шлях get_current_user: один MGET, тобто один мережевий виклик
+        keys = [self._jti_key(jti)]
+        if family:
+            keys.append(self._revoked_family_key(family))
+        return any(value is not None for value in await self.redis.mget(keys))
+
+    async def start_family(self, email: str, family: str, jti: str, exp: float) -> None:
+        ttl = _ttl(exp)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(self._family_key(family), jti, ex=ttl)
+            pipe.sadd(self._user_key(email), family)
+            pipe.expire(self._user_key(email), ttl)
+            await pipe.execute()
+
+    async def rotate(self, email: str, family: str, jti: str, new_jti: str, exp: float) -> int:
+        keys = [self._family_key(family), self._revoked_family_key(family), self._user_key(email)]
+        return await self._rotate(keys=keys, args=[jti, new_jti, _ttl(exp), family])
+
+    async def revoke(self, jti: str, exp: float) -> None:
+        await self.redis.set(self._jti_key(jti), 1, ex=_ttl(exp))
+
+    async def revoke_family(self, family: str, ttl: int) -> None:
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(self._revoked_family_key(family), 1, ex=ttl)
+            pipe.delete(self._family_key(family))
+            await pipe.execute()
+
+    async def revoke_user(self, email: str, ttl: int) -> None:
+        families = await self.redis.smembers(self._user_key(email))
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for family in families:
+                family = family.decode() if isinstance(family, bytes) else family
+                pipe.set(self._revoked_family_key(family), 1, ex=ttl)
+                pipe.delete(self._family_key(family))
+            pipe.delete(self._user_key(email))
+            await pipe.execute()
@@ -1,12 +1,15 @@
 from pathlib import Path
 
-from fastapi_mail import FastMail, MessageSchema, ConnectionConfig, MessageType
-from fastapi_mail.errors import ConnectionErrors
+from fastapi_mail import ConnectionConfig
 from pydantic import EmailStr
+from redis.exceptions import RedisError
 
 from src.services.auth import auth_service
+from src.services.email_queue import email_queue
 from src.conf.config import config
+from src.services.metrics import metrics
 
+# параметри SMTP; самим з'єднанням користується лише src/workers/email_worker.py
 conf = ConnectionConfig(
     MAIL_USERNAME=config.MAIL_USERNAME,
     MAIL_PASSWORD=config.MAIL_PASSWORD,
@@ -14,23 +17,22 @@ conf = ConnectionConfig(
     MAIL_PORT=config.MAIL_PORT,
     MAIL_SERVER=config.MAIL_SERVER,
     MAIL_FROM_NAME="Global BASE of Contacts",
-    MAIL_STARTTLS=True,
-    MAIL_SSL_TLS=False,
-    USE_CREDENTIALS=True,
-    VALIDATE_CERTS=False,
+    MAIL_STARTTLS=config.MAIL_STARTTLS,
+    MAIL_SSL_TLS=config.MAIL_SSL_TLS,
+    USE_CREDENTIALS=config.MAIL_USE_CREDENTIALS,
+    VALIDATE_CERTS=config.MAIL_VALIDATE_CERTS,
     TEMPLATE_FOLDER=Path(__file__).parent / 'templates',)
 
 
-async def send_email(email: EmailStr, username: str, host: str):
+# Лист не вiдправляється з веб-воркера: вiн лише ставиться у чергу (src/services/email_queue.py).
+# Недоступний Redis не валить запит: користувач уже створений i може попросити лист ще раз через /request_email
+async def send_email(email: EmailStr, username: str, host: str) -> bool:
+    token_verification = await auth_service.create_email_token({"sub": email})
     try:
-        token_verification = await auth_service.create_email_token({"sub": email})
-        message = MessageSchema(
-            subject="Confirm your email, please",
-            recipients=[email],
-            template_body={"host": host, "username": username, "token": token_verification},
-            subtype=MessageType.html)
-
-        fast_m = FastMail(conf)
-        await fast_m.send_message(message, template_name="verify_email.html")
-    except ConnectionErrors as err:
-        print(err)
\ No newline at end of file
+        await email_queue.enqueue(recipient=email, subject="Confirm your email, please", template="verify_email.html",
+                                  body={"host": host, "username": username, "token": token_verification})
+    except RedisError as err:
+        print(f"Email enqueue failed for {email}: {err}")
+        metrics.inc("email.enqueue_errors")
+        return False
+    return True
@@ -0,0 +1,70 @@
+import asyncio
+import hashlib
+import io
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException, status
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from src.conf.config import config
+
+
+# захист вiд "decompression bomb": аватара бiльша за 64 Мпiкс - це вже не аватара
+Image.MAX_IMAGE_PIXELS = 64_000_000
+THUMBNAIL_FORMAT = "WEBP"
+THUMBNAIL_CONTENT_TYPE = "image/webp"
+
+
+# функцiя на рiвнi модуля, щоб [ProcessPoolExecutor] мiг її серiалiзувати у дочiрнiй процес
+def make_thumbnails(data: bytes, sizes: tuple[int, ...]) -> dict[int, bytes]:
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image)
+        image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+        thumbnails = {}
+        for size in sizes:
+            thumbnail = ImageOps.fit(image, (size, size), Image.LANCZOS)
+            buffer = io.BytesIO()
+            thumbnail.save(buffer, THUMBNAIL_FORMAT, quality=85, method=4)
+            thumbnails[size] = buffer.getvalue()
+    return thumbnails
+
+
+class ThumbnailStore:
+    """ Мiнiатюри аватар фiксованих розмiрiв, адресованi вмiстом: ключ у сховищi - sha256 вихiдного
+        зображення + розмiр. Декодування та ресайз (Pillow) робляться у пулi процесiв, а готовi файли
+        пишуться через той самий [AvatarStorage], що й звичайнi аватари (src/services/avatars.py), тож
+        мiнiатюри доступнi з будь-якого iнстансу, а не лише з локального диска того, хто їх зробив. """
+
+    def __init__(self, sizes: list[int], workers: int = 2, prefix: str = "Py16-Web/thumbnails"):
+        self.sizes = tuple(sorted(set(sizes)))
+        self.workers = workers
+        self.prefix = prefix.rstrip("/")
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    @staticmethod
+    def digest(data: bytes) -> str:
+        return hashlib.sha256(data).hexdigest()
+
+    def key(self, digest: str, size: int) -> str:
+        return f"{self.prefix}/{digest}-{size}"
+
+    async def render(self, data: bytes) -> dict[int, bytes]:
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self.executor, make_thumbnails, data, self.sizes)
+        except (UnidentifiedImageError, Image.DecompressionBombError, OSError, SyntaxError):
+            raise HTTPException(status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE, detail="Invalid image")
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+thumbnail_store = ThumbnailStore(config.AVATAR_THUMBNAIL_SIZES, workers=config.AVATAR_THUMBNAIL_WORKERS)
@@ -0,0 +1,37 @@
+import re
+from functools import lru_cache
+from typing import Iterable
+
+from src.services.metrics import metrics
+
+
+class UserAgentFilter:
+    """ Усi шаблони бан-листа компiлюються в один regex-альтернативу, тож на запит - один прохiд по рядку
+        замiсть re.search на кожен шаблон. Результат для конкретного User-Agent кешується (LRU), бо ботiв
+        з однаковими заголовками - бiльшiсть трафiку. Дуже довгi заголовки в кеш не потрапляють. """
+
+    MAX_CACHED_LENGTH = 1024
+
+    def __init__(self, patterns: Iterable[str], ignore_case: bool = True, cache_size: int = 4096):
+        self.ignore_case = ignore_case
+        self.cache_size = cache_size
+        self.set_patterns(patterns)
+        metrics.gauge("user_agents.cache_hits", lambda: self._cached.cache_info().hits)
+        metrics.gauge("user_agents.cache_misses", lambda: self._cached.cache_info().misses)
+
+    def set_patterns(self, patterns: Iterable[str]) -> None:
+        patterns = list(patterns)
+        flags = re.IGNORECASE if self.ignore_case else 0
+        # новий бан-лист - новий regex i порожнiй кеш: старi вiдповiдi для User-Agent вже невiрнi
+        self._regex = re.compile("|".join(f"(?:{pattern})" for pattern in patterns), flags) if patterns else None
+        self._cached = lru_cache(maxsize=self.cache_size)(self._search)
+
+    def _search(self, user_agent: str) -> bool:
+        return self._regex.search(user_agent) is not None
+
+    def is_banned(self, user_agent: str | None) -> bool:
+        if self._regex is None or not user_agent:
+            return False
+        if len(user_agent) > self.MAX_CACHED_LENGTH:
+            return self._search(user_agent)
+        return self._cached(user_agent)
@@ -0,0 +1,171 @@
+""" Окремий процес-вiдправник листiв з черги src/services/email_queue.py.
+    Запуск з каталогу hw-fastAPI (можна декiлька екземплярiв - кожен зi своїм <--consumer>):
+        python -m src.workers.email_worker --consumer worker-1 """
+import argparse
+import asyncio
+import json
+import random
+import signal
+import socket
+from email.message import EmailMessage
+from email.utils import formataddr
+
+import aiosmtplib
+
+from src.conf.config import config
+from src.services.email_queue import EmailQueue, email_queue
+from src.services.email_templates import EmailTemplates, email_templates
+from src.services.send_email import conf
+
+
+# SMTP недоступний цiлком: SMTPConnectError, SMTPServerDisconnected та SMTPTimeoutError - теж OSError
+CONNECTION_ERRORS = (OSError, asyncio.TimeoutError)
+
+
+def is_permanent(err: aiosmtplib.SMTPException) -> bool:
+    # вирiшує код вiдповiдi, а не клас помилки: 5xx - постiйна (неiснуюча адреса тощо), повторювати немає сенсу;
+    # 4xx (greylisting 450/451, 421) - тимчасова, лист iде на повтор
+    if isinstance(err, aiosmtplib.SMTPRecipientsRefused):
+        return bool(err.recipients) and all(recipient.code // 100 == 5 for recipient in err.recipients)
+    return isinstance(err, aiosmtplib.SMTPResponseException) and err.code // 100 == 5
+
+
+class EmailWorker:
+    """ Читає чергу пачками по <batch_size> i вiдправляє всю пачку через одне SMTP-з'єднання
+        (воно ж перевикористовується мiж пачками). Кожен лист пiдтверджується (XACK) одразу пiсля вiдправки,
+        тож XAUTOCLAIM iншого воркера не перешле вже доставленi листи повiльної чи перерваної пачки.
+        Тимчасова помилка - повтор через retry_base * 2^(n-1) секунд (з jitter, не бiльше retry_max),
+        пiсля <max_attempts> спроб або на постiйну помилку - dead-letter. Якщо недоступний сам SMTP,
+        решта пачки не перепiдключається лист за листом, а вiдкладається цiлком. """
+
+    def __init__(self, queue: EmailQueue, consumer: str, batch_size: int = 50, max_attempts: int = 6,
+                 retry_base: float = 2, retry_max: float = 600, claim_idle_ms: int = 60_000, block_ms: int = 1000,
+                 templates: EmailTemplates = email_templates):
+        self.queue = queue
+        self.consumer = consumer
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.retry_max = retry_max
+        self.claim_idle_ms = claim_idle_ms
+        self.block_ms = block_ms
+        self.templates = templates
+        self.sender = formataddr((conf.MAIL_FROM_NAME, str(conf.MAIL_FROM)))
+        self._smtp: aiosmtplib.SMTP | None = None
+
+    async def smtp(self) -> aiosmtplib.SMTP:
+        if self._smtp is None or not self._smtp.is_connected:
+            self._smtp = aiosmtplib.SMTP(hostname=conf.MAIL_SERVER, port=conf.MAIL_PORT,
+                                         username=conf.MAIL_USERNAME if conf.USE_CREDENTIALS else None,
+                                         password=conf.MAIL_PASSWORD if conf.USE_CREDENTIALS else None,
+                                         use_tls=conf.MAIL_SSL_TLS, start_tls=conf.MAIL_STARTTLS,
+                                         validate_certs=conf.VALIDATE_CERTS, timeout=conf.TIMEOUT)
+            await self._smtp.connect()
+        return self._smtp
+
+    async def close(self) -> None:
+        if self._smtp is not None and self._smtp.is_connected:
+            try:
+                await self._smtp.quit()
+            except aiosmtplib.SMTPException:
+                self._smtp.close()
+        self._smtp = None
+
+    def build(self, fields: dict, html: str) -> EmailMessage:
+        message = EmailMessage()
+        message["Subject"] = fields["subject"]
+        message["From"] = self.sender
+        message["To"] = fields["recipient"]
+        message.set_content(html, subtype="html")
+        return message
+
+    def render(self, messages: list[tuple[str, dict]]) -> list[str | Exception]:
+        # вся пачка рендериться за один прохiд по кожному шаблону (src/services/email_templates.py)
+        rendered: list[str | Exception] = [None] * len(messages)
+        by_template: dict[str, list[tuple[int, dict]]] = {}
+        for index, (_, fields) in enumerate(messages):
+            try:
+                by_template.setdefault(fields["template"], []).append((index, json.loads(fields["body"])))
+            except (KeyError, ValueError) as err:
+                rendered[index] = err
+        for template, items in by_template.items():
+            try:
+                htmls = self.templates.render_many(template, [context for _, context in items])
+            except Exception as err:
+                htmls = [err] * len(items)
+            for (index, _), html in zip(items, htmls):
+                rendered[index] = html
+        return rendered
+
+    def backoff(self, attempts: int) -> float:
+        delay = min(self.retry_base * 2 ** (attempts - 1), self.retry_max)
+        return delay * random.uniform(0.5, 1)
+
+    async def fail(self, message_id: str, fields: dict, err: Exception, permanent: bool = False) -> None:
+        attempts = int(fields.get("attempts", 0)) + 1
+        fields = {**fields, "attempts": attempts, "error": str(err)[:500]}
+        if permanent or attempts >= self.max_attempts:
+            print(f"Email {message_id} to {fields['recipient']} dead-lettered: {err}")
+            await self.queue.dead_letter(message_id, fields, str(err))
+        else:
+            await self.queue.retry(message_id, fields, self.backoff(attempts))
+
+    async def postpone(self, messages: list[tuple[str, dict]]) -> None:
+        # листи, до яких черга не дiйшла, - без збiльшення <attempts>: спроби вiдправки не було
+        for message_id, fields in messages:
+            await self.queue.retry(message_id, fields, self.backoff(int(fields.get("attempts", 0)) + 1))
+
+    async def send_batch(self, messages: list[tuple[str, dict]]) -> int:
+        sent = 0
+        for index, ((message_id, fields), html) in enumerate(zip(messages, self.render(messages))):
+            if isinstance(html, Exception):
+                # зламаний шаблон або payload - повтор не допоможе
+                await self.fail(message_id, fields, html, permanent=True)
+                continue
+            try:
+                smtp = await self.smtp()
+                await smtp.send_message(self.build(fields, html))
+            except CONNECTION_ERRORS as err:
+                # розiрване з'єднання вiдкриється заново вже у наступнiй пачцi
+                await self.close()
+                await self.fail(message_id, fields, err)
+                await self.postpone(messages[index + 1:])
+                break
+            except aiosmtplib.SMTPException as err:
+                await self.fail(message_id, fields, err, permanent=is_permanent(err))
+                continue
+            await self.queue.ack([message_id])
+            sent += 1
+        return sent
+
+    async def run(self, stop: asyncio.Event) -> None:
+        await self.queue.ensure_group()
+        while not stop.is_set():
+            try:
+                await self.queue.promote_due()
+                messages = await self.queue.read(self.consumer, self.batch_size, self.block_ms, self.claim_idle_ms)
+                if messages:
+                    await self.send_batch(messages)
+            except Exception as err:
+                # недоступний Redis - чекаємо i пробуємо знову, листи лишаються у черзi
+                print(err)
+                await asyncio.sleep(1)
+        await self.close()
+
+
+async def main(consumer: str) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    worker = EmailWorker(email_queue, consumer, batch_size=config.MAIL_QUEUE_BATCH_SIZE,
+                         max_attempts=config.MAIL_QUEUE_MAX_ATTEMPTS, retry_base=config.MAIL_QUEUE_RETRY_BASE,
+                         retry_max=config.MAIL_QUEUE_RETRY_MAX, claim_idle_ms=config.MAIL_QUEUE_CLAIM_IDLE)
+    await worker.run(stop)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Email queue worker")
+    parser.add_argument("--consumer", default=socket.gethostname())
+    args = parser.parse_args()
+    asyncio.run(main(args.consumer))
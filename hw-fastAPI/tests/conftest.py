@@ -0,0 +1,16 @@
+import fakeredis
+import pytest
+
+
+# асинхроннi тести запускаються плагiном anyio (йде разом з FastAPI/Starlette), лише на asyncio
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def redis():
+    # Redis у пам'ятi; з extras [lua] пiдтримує й EVAL для Lua-скриптiв
+    client = fakeredis.FakeAsyncRedis()
+    yield client
+    await client.close()
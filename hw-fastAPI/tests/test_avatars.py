@@ -0,0 +1,118 @@
+import io
+from types import SimpleNamespace
+
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+from starlette.datastructures import Headers
+
+from src.services import avatars
+from src.services.avatars import AvatarPipeline, AvatarStorage
+from src.services.thumbnails import ThumbnailStore
+
+pytestmark = pytest.mark.anyio
+
+EMAIL = "user@example.com"
+
+
+class MemoryStorage(AvatarStorage):
+    def __init__(self):
+        self.saved = {}
+
+    async def save(self, key, file, content_type):
+        self.saved[key] = file.read()
+        return f"https://cdn.example.com/{key}"
+
+
+def upload(data: bytes = b"image") -> UploadFile:
+    return UploadFile(file=io.BytesIO(data), filename="a.png", headers=Headers({"content-type": "image/png"}))
+
+
+async def finish(pipeline: AvatarPipeline, job: dict) -> dict:
+    for task in list(pipeline._tasks):
+        await task
+    return await pipeline.status(job["job_id"], EMAIL)
+
+
+def test_storage_requires_save():
+    with pytest.raises(TypeError):
+        AvatarStorage()
+
+
+async def test_upload_done(redis, monkeypatch):
+    async def update_avatar_url(email, url, db):
+        return SimpleNamespace(email=email, avatar=url)
+
+    cached = {}
+
+    async def cache_set(email, user):
+        cached[email] = user
+
+    monkeypatch.setattr(avatars.rep_users, "update_avatar_url", update_avatar_url)
+    monkeypatch.setattr(avatars.auth_service.user_cache, "set", cache_set)
+    storage = MemoryStorage()
+    pipeline = AvatarPipeline(storage, redis)
+    job = await finish(pipeline, await pipeline.submit(SimpleNamespace(id=1, email=EMAIL), upload()))
+    # ключ той самий, що й до фонового завантаження: iснуючi аватари перезаписуються, а не лишаються сиротами
+    assert storage.saved == {f"Py16-Web/{EMAIL}": b"image"}
+    assert job["status"] == "done" and job["avatar"] == f"https://cdn.example.com/Py16-Web/{EMAIL}"
+    assert cached[EMAIL].avatar == job["avatar"]
+
+
+async def test_database_failure_marks_job_failed(redis, monkeypatch):
+    async def update_avatar_url(email, url, db):
+        raise RuntimeError("connection refused")
+
+    monkeypatch.setattr(avatars.rep_users, "update_avatar_url", update_avatar_url)
+    pipeline = AvatarPipeline(MemoryStorage(), redis)
+    job = await finish(pipeline, await pipeline.submit(SimpleNamespace(id=1, email=EMAIL), upload()))
+    assert job["status"] == "failed"
+    assert job["detail"] == "Avatar URL was not saved: connection refused"
+
+
+def png() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), "red").save(buffer, "PNG")
+    return buffer.getvalue()
+
+
+async def test_thumbnails_go_through_storage(redis, monkeypatch):
+    async def update_avatar_url(email, url, db):
+        return SimpleNamespace(email=email, avatar=url)
+
+    async def cache_set(email, user):
+        pass
+
+    monkeypatch.setattr(avatars.rep_users, "update_avatar_url", update_avatar_url)
+    monkeypatch.setattr(avatars.auth_service.user_cache, "set", cache_set)
+    storage = MemoryStorage()
+    thumbnails = ThumbnailStore([32, 64], workers=1)
+    pipeline = AvatarPipeline(storage, redis, thumbnails=thumbnails)
+    try:
+        job = await finish(pipeline, await pipeline.submit(SimpleNamespace(id=1, email=EMAIL), upload(png())))
+        assert job["status"] == "done"
+        digest = ThumbnailStore.digest(png())
+        assert sorted(storage.saved) == [thumbnails.key(digest, 32), thumbnails.key(digest, 64)]
+        assert job["avatar"] == f"https://cdn.example.com/{thumbnails.key(digest, 64)}"
+        assert Image.open(io.BytesIO(storage.saved[thumbnails.key(digest, 64)])).size == (64, 64)
+        # повторне завантаження тiєї ж картинки не доходить нi до Pillow, нi до сховища
+        storage.saved.clear()
+        monkeypatch.setattr(thumbnails, "render", None)
+        again = await finish(pipeline, await pipeline.submit(SimpleNamespace(id=1, email=EMAIL), upload(png())))
+        assert again["status"] == "done" and again["avatar"] == job["avatar"]
+        assert storage.saved == {}
+    finally:
+        thumbnails.shutdown()
+
+
+async def test_invalid_image_never_reaches_storage(redis):
+    storage = MemoryStorage()
+    thumbnails = ThumbnailStore([32], workers=1)
+    pipeline = AvatarPipeline(storage, redis, thumbnails=thumbnails)
+    try:
+        job = await pipeline.submit(SimpleNamespace(id=1, email=EMAIL), upload(b"not an image"))
+        job = await finish(pipeline, job)
+    finally:
+        thumbnails.shutdown()
+    assert job["status"] == "failed" and job["detail"] == "Invalid image"
+    assert storage.saved == {}
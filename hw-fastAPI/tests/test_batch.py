@@ -0,0 +1,61 @@
+import pytest
+from fastapi import HTTPException
+from fastapi_limiter import FastAPILimiter
+from pydantic import ValidationError
+
+from src.conf.config import config
+from src.schemas.contact import ContactBatchSchema, ContactBatchUpdateSchema
+from src.services.rate_limit import WeightedRateLimiter
+
+pytestmark = pytest.mark.anyio
+
+
+def test_batch_target_is_ids_or_filter():
+    assert ContactBatchSchema.model_validate({"ids": [1, 2]}).ids == [1, 2]
+    assert ContactBatchSchema.model_validate({"filter": {"crm_status": "analitic"}}).filter.crm_status == "analitic"
+    for body in ({}, {"ids": [1], "filter": {"crm_status": "analitic"}}, {"ids": []}):
+        with pytest.raises(ValidationError):
+            ContactBatchSchema.model_validate(body)
+
+
+def test_empty_filter_is_rejected():
+    # порожнiй фiльтр збiгся б з усiма контактами власника
+    for body in ({"filter": {}}, {"filter": {"crm_status": None, "created_before": None}}):
+        with pytest.raises(ValidationError):
+            ContactBatchSchema.model_validate(body)
+        with pytest.raises(ValidationError):
+            ContactBatchUpdateSchema.model_validate({**body, "crm_status": "analitic"})
+    assert ContactBatchSchema.model_validate({"filter": {"created_before": "2026-01-01T00:00:00"}}).filter
+
+
+def test_ids_limited_by_schema():
+    ContactBatchSchema.model_validate({"ids": list(range(config.BATCH_MAX_SIZE))})
+    with pytest.raises(ValidationError):
+        ContactBatchSchema.model_validate({"ids": list(range(config.BATCH_MAX_SIZE + 1))})
+
+
+@pytest.fixture
+def limiter(redis, monkeypatch):
+    monkeypatch.setattr(FastAPILimiter, "redis", redis)
+    return WeightedRateLimiter(units=10, seconds=60, unit_size=100)
+
+
+def test_weight(limiter):
+    assert [limiter.weight(size) for size in (0, 1, 100, 101, 1000)] == [1, 1, 1, 2, 10]
+
+
+async def test_hit_counts_units_not_requests(limiter):
+    await limiter.hit("contacts:1", limiter.weight(800))
+    await limiter.hit("contacts:1", limiter.weight(200))
+    with pytest.raises(HTTPException) as error:
+        await limiter.hit("contacts:1")
+    assert error.value.status_code == 429
+    assert 0 < int(error.value.headers["Retry-After"]) <= 60
+    # iнший ключ - окремий лiчильник
+    await limiter.hit("contacts:2", limiter.weight(1000))
+
+
+async def test_charge_settles_after_the_fact(limiter, redis):
+    await limiter.hit("contacts:1")
+    assert await limiter.charge("contacts:1", limiter.weight(950) - 1) == 10
+    assert 0 < await redis.ttl(next(iter(await redis.keys("ratelimit:weighted:contacts:1:*")))) <= 60
@@ -0,0 +1,61 @@
+from datetime import date, timedelta
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.database.db import get_read_db
+from src.entity.models import birthday_ordinal
+from src.repository.contacts import birthday_window
+from src.routes import birthday_contacts
+from src.services.auth import auth_service
+
+
+def test_ordinal_ignores_birth_year():
+    assert birthday_ordinal(date(1990, 1, 1)) == 1
+    assert birthday_ordinal(date(1992, 2, 29)) == 60
+    assert birthday_ordinal(date(1990, 3, 1)) == birthday_ordinal(date(1992, 3, 1)) == 61
+    assert birthday_ordinal(date(1990, 12, 31)) == 366
+
+
+def test_window_within_year():
+    assert birthday_window(date(2023, 6, 1), 10) == [(birthday_ordinal(date(2023, 6, 1)),
+                                                       birthday_ordinal(date(2023, 6, 11)))]
+
+
+def test_window_wraps_new_year():
+    assert birthday_window(date(2023, 12, 28), 7) == [(birthday_ordinal(date(2023, 12, 28)), 366), (1, 4)]
+
+
+@pytest.mark.parametrize("today", [date(2023, 1, 1), date(2023, 2, 27), date(2024, 2, 28), date(2023, 12, 20),
+                                   date(2024, 12, 31), date(2024, 3, 1)])
+@pytest.mark.parametrize("days", [0, 1, 7, 30, 364])
+def test_window_matches_calendar(today, days):
+    # перевiрка перебором: день народження потрапляє у вiкно тодi й лише тодi, коли вiн настає
+    # протягом <days> днiв вiд <today>; 2001 - невисокосний, тож 29 лютого тут не перевiряється
+    upcoming = {((today + timedelta(k)).month, (today + timedelta(k)).day) for k in range(days + 1)}
+    ranges = birthday_window(today, days)
+    for offset in range(365):
+        birthday = date(2001, 1, 1) + timedelta(offset)
+        ordinal = birthday_ordinal(birthday)
+        in_window = any(start <= ordinal <= end for start, end in ranges)
+        assert in_window == ((birthday.month, birthday.day) in upcoming), birthday
+
+
+def test_route_rejects_out_of_range_shift(monkeypatch):
+    computed = []
+
+    async def get_or_compute(name, params, compute, adapter):
+        computed.append(params["shift_days"])
+        return []
+
+    monkeypatch.setattr(birthday_contacts.result_cache, "get_or_compute", get_or_compute)
+    app = FastAPI()
+    app.include_router(birthday_contacts.router, prefix="/api")
+    for dependency in (birthday_contacts.access_elevated, auth_service.get_current_user, get_read_db):
+        app.dependency_overrides[dependency] = lambda: None
+    client = TestClient(app)
+    assert [client.get(f"/api/birthday/{days}").status_code for days in (-1, -365, 365)] == [422, 422, 422]
+    assert [client.get(f"/api/birthday/{days}").status_code for days in (0, 7, 364)] == [200, 200, 200]
+    # до кешу результатiв доходять лише допустимi значення
+    assert computed == [0, 7, 364]
@@ -0,0 +1,73 @@
+import random
+from ipaddress import IPv4Address, IPv6Address, ip_address, ip_network
+
+import pytest
+
+from src.services.blocklist import CompiledBlocklist, IPBlocklist, parse_rules
+
+pytestmark = pytest.mark.anyio
+
+
+def naive_match(networks, address):
+    # найбiльш специфiчне правило = найдовший префiкс серед тих, що мiстять адресу
+    matches = [network for network in networks if network.version == address.version and address in network]
+    return max(matches, key=lambda network: network.prefixlen, default=None)
+
+
+def test_most_specific_rule_wins():
+    networks = parse_rules(["10.0.0.0/8", "10.1.0.0/16", "10.1.2.0/24", "192.168.0.0/16", "2001:db8::/32"])
+    compiled = CompiledBlocklist(networks)
+    assert compiled.match(ip_address("10.1.2.3")) == ip_network("10.1.2.0/24")
+    assert compiled.match(ip_address("10.1.3.3")) == ip_network("10.1.0.0/16")
+    assert compiled.match(ip_address("10.200.0.1")) == ip_network("10.0.0.0/8")
+    assert compiled.match(ip_address("11.0.0.1")) is None
+    assert compiled.match(ip_address("2001:db8::1")) == ip_network("2001:db8::/32")
+    # IPv4-mapped IPv6 перевiряється за IPv4-правилами
+    assert compiled.match(ip_address("::ffff:192.168.1.1")) == ip_network("192.168.0.0/16")
+
+
+def test_matches_naive_scan():
+    generator = random.Random(11)
+    networks = set()
+    for _ in range(300):
+        prefix = generator.randint(4, 32)
+        networks.add(ip_network((generator.getrandbits(32) & 0xFF0FFFFF, prefix), strict=False))
+    for _ in range(50):
+        networks.add(ip_network((generator.getrandbits(128), generator.randint(16, 128)), strict=False))
+    compiled = CompiledBlocklist(networks)
+    probes = [IPv4Address(generator.getrandbits(32) & 0xFF0FFFFF) for _ in range(3000)]
+    # адреси всерединi та на межах правил
+    for network in list(networks)[:200]:
+        probes += [network.network_address, network.broadcast_address]
+    probes += [IPv6Address(generator.getrandbits(128)) for _ in range(500)]
+    for address in probes:
+        assert compiled.match(address) == naive_match(networks, address), address
+
+
+def test_parse_rules_skips_comments_and_invalid():
+    assert parse_rules(["# comment", "", "10.0.0.1/8  # host bits", "not-an-ip", "::1"]) == {
+        ip_network("10.0.0.0/8"), ip_network("::1/128")}
+
+
+def test_match_ignores_missing_or_invalid_host():
+    blocklist = IPBlocklist(["10.0.0.0/8"])
+    assert blocklist.match(None) is None
+    assert blocklist.match("testclient") is None
+    assert blocklist.match("10.2.3.4") == ip_network("10.0.0.0/8")
+
+
+async def test_reload_from_file_and_redis(tmp_path, redis):
+    rules_file = tmp_path / "blocklist.txt"
+    rules_file.write_text("172.16.0.0/12\n")
+    await redis.sadd("blocklist:ips", "203.0.113.0/24")
+    blocklist = IPBlocklist(["10.0.0.0/8"], file_path=str(rules_file), redis_key="blocklist:ips")
+    assert blocklist.match("172.16.5.5") is None
+
+    await blocklist.reload(redis)
+    assert blocklist.match("172.16.5.5") == ip_network("172.16.0.0/12")
+    assert blocklist.match("203.0.113.9") == ip_network("203.0.113.0/24")
+
+    await redis.srem("blocklist:ips", "203.0.113.0/24")
+    await blocklist.reload(redis)
+    assert blocklist.match("203.0.113.9") is None
+    assert blocklist.match("10.0.0.1") is not None
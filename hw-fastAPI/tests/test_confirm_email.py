@@ -0,0 +1,61 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.database.db import get_db
+from src.entity.models import User
+from src.routes import auth
+from src.services.auth import auth_service
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def session_maker(tmp_path):
+    # Postgres-специфiчнi контакти на SQLite не створюються, але для таблицi users його достатньо
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    async with engine.begin() as connection:
+        await connection.run_sync(User.__table__.create)
+    maker = async_sessionmaker(engine)
+    async with maker() as db:
+        db.add(User(username="kobzar", email="kobzar@example.com", password="x" * 60))
+        await db.commit()
+    yield maker
+    await engine.dispose()
+
+
+@pytest.fixture
+def client(session_maker):
+    async def override_get_db():
+        async with session_maker() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/api")
+    app.dependency_overrides[get_db] = override_get_db
+    return TestClient(app)
+
+
+async def confirmed(session_maker, email: str) -> bool:
+    async with session_maker() as db:
+        return (await db.execute(select(User.confirmed).filter_by(email=email))).scalar_one()
+
+
+async def test_confirmed_email_route(client, session_maker):
+    token = await auth_service.create_email_token({"sub": "kobzar@example.com"})
+    response = client.get(f"/api/auth/confirmed_email/{token}")
+    assert response.status_code == 200
+    assert "successfully confirmed" in response.text
+    assert await confirmed(session_maker, "kobzar@example.com")
+
+    again = client.get(f"/api/auth/confirmed_email/{token}")
+    assert again.status_code == 200
+    assert again.text != response.text
+
+
+async def test_confirmed_email_unknown_user(client):
+    token = await auth_service.create_email_token({"sub": "nobody@example.com"})
+    assert client.get(f"/api/auth/confirmed_email/{token}").status_code == 400
+    assert client.get("/api/auth/confirmed_email/not-a-token").status_code == 422
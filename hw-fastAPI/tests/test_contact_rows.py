@@ -0,0 +1,34 @@
+from datetime import date, datetime
+
+import orjson
+from fastapi.responses import ORJSONResponse
+
+from src.entity.models import Role
+from src.repository.contacts import LIST_COLUMNS, LIST_USER_COLUMNS, contact_row
+from src.schemas.contact import ContactResponseSchema
+from src.schemas.user import UserResponseSchema
+
+
+def projected(**overrides) -> dict:
+    # рядок так, як його повертає result.mappings() для select(*LIST_COLUMNS, *LIST_USER_COLUMNS)
+    row = {"id": 7, "first_name": "Taras", "last_name": "Shevchenko", "email": "taras@example.com",
+           "phone_number": "380501234567", "birth_date": date(1814, 3, 9), "crm_status": "operational",
+           "created_at": datetime(2026, 1, 2, 3, 4, 5, 678901), "updated_at": datetime(2026, 1, 2, 3, 4, 5),
+           "user_id": 3, "username": "kobzar", "user_email": "kobzar@example.com", "role": Role.moderator,
+           "avatar": "/api/users/avatars/kobzar-250.webp"}
+    assert set(row) == {column.key for column in (*LIST_COLUMNS, *LIST_USER_COLUMNS)}
+    return {**row, **overrides}
+
+
+def test_projection_has_schema_fields():
+    contact = contact_row(projected())
+    # маршрути повертають ORJSONResponse, тож response_model вже не вiдсiкає зайвого - форма має збiгатися сама
+    assert set(contact) == set(ContactResponseSchema.model_fields)
+    assert set(contact["user"]) == set(UserResponseSchema.model_fields)
+
+
+def test_projection_serializes_like_response_model():
+    for row in (projected(), projected(user_id=None, username=None, user_email=None, role=None, avatar=None)):
+        contact = contact_row(row)
+        expected = ContactResponseSchema.model_validate(contact).model_dump(mode="json")
+        assert orjson.loads(ORJSONResponse([contact]).body) == [expected]
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+import pytest
+
+from src.services import contacts_export
+from src.services.contacts_export import EXPORT_FIELDS, csv_chunks, export_response, ndjson_chunks
+
+pytestmark = pytest.mark.anyio
+
+
+def contact(contact_id: int, **fields) -> dict:
+    row = {"id": contact_id, "first_name": "Ann", "last_name": "Lee", "email": f"ann{contact_id}@example.com",
+           "phone_number": "+380501234567", "birth_date": date(1990, 2, 28), "crm_status": None,
+           "created_at": datetime(2024, 1, 2, 3, 4, 5), "updated_at": None, "user_id": 1}
+    return {**row, **fields}
+
+
+ROWS = [
+    contact(1),
+    contact(2, first_name='Ann, "the" first', last_name="Line\nbreak"),
+    contact(3, first_name="Олена", last_name="Ковальчук"),
+    contact(4, birth_date=None),
+    contact(5),
+]
+
+
+@pytest.fixture
+def rows(monkeypatch):
+    # БД не потрiбна: рядки вiддаються так само, як з stream_contacts - по одному
+    data = list(ROWS)
+
+    async def fake_rows(user):
+        for row in data:
+            yield row
+
+    monkeypatch.setattr(contacts_export, "_rows", fake_rows)
+    monkeypatch.setattr(contacts_export.config, "CONTACTS_EXPORT_BATCH_SIZE", 2)
+    return data
+
+
+async def collect(chunks) -> list[str]:
+    return [chunk async for chunk in chunks]
+
+
+async def test_ndjson_framing(rows):
+    chunks = await collect(ndjson_chunks(None))
+    # пачки по 2 рядки, i кожна пачка закiнчується цiлим рядком
+    assert len(chunks) == 3 and all(chunk.endswith("\n") for chunk in chunks)
+    lines = "".join(chunks).splitlines()
+    assert len(lines) == len(ROWS)
+    parsed = [json.loads(line) for line in lines]
+    assert parsed[0]["birth_date"] == "1990-02-28" and parsed[0]["created_at"] == "2024-01-02T03:04:05"
+    assert parsed[1]["last_name"] == "Line\nbreak"
+    assert parsed[3]["birth_date"] is None
+    # кирилиця не екранується
+    assert '"Олена"' in lines[2]
+
+
+async def test_ndjson_empty(rows):
+    rows.clear()
+    assert await collect(ndjson_chunks(None)) == []
+
+
+async def test_csv_header_and_escaping(rows):
+    chunks = await collect(csv_chunks(None))
+    assert len(chunks) == 3
+    body = "".join(chunks)
+    assert body.startswith(",".join(EXPORT_FIELDS) + "\r\n")
+    records = list(csv.reader(io.StringIO(body)))
+    assert records[0] == EXPORT_FIELDS
+    assert len(records) == len(ROWS) + 1
+    assert records[2][1:3] == ['Ann, "the" first', "Line\nbreak"]
+    assert '"Ann, ""the"" first"' in body
+    assert records[3][1] == "Олена"
+    assert records[4][EXPORT_FIELDS.index("birth_date")] == ""
+
+
+async def test_csv_empty_has_header(rows):
+    rows.clear()
+    assert "".join(await collect(csv_chunks(None))) == ",".join(EXPORT_FIELDS) + "\r\n"
+
+
+def test_export_response_headers():
+    for format, media_type in (("csv", "text/csv"), ("ndjson", "application/x-ndjson")):
+        response = export_response(format, None)
+        assert response.media_type == media_type
+        assert response.headers["content-disposition"] == f'attachment; filename="contacts.{format}"'
@@ -0,0 +1,92 @@
+import io
+from types import SimpleNamespace
+
+import pytest
+from fastapi import UploadFile
+
+from src.conf.config import config
+from src.repository import contacts as rep_contacts
+from src.services.contacts_import import ContactImport
+
+pytestmark = pytest.mark.anyio
+
+HEADER = "first_name,last_name,email,phone_number,birth_date\n"
+
+
+def row(i: int, **fields) -> str:
+    values = {"first_name": "Anna", "last_name": "Smith", "email": f"anna{i}@example.com",
+              "phone_number": "380501234567", "birth_date": "1990.01.15", **fields}
+    return ",".join(values.values()) + "\n"
+
+
+@pytest.fixture
+def inserted(monkeypatch):
+    # INSERT ... ON CONFLICT пiдмiняється множиною: "iснуючий" у БД email не вставляється
+    rows = []
+    existing = {"taken@example.com"}
+
+    async def create_contacts_bulk(batch, db, user):
+        rows.extend(batch)
+        return {contact["email"] for contact in batch} - existing
+
+    monkeypatch.setattr(rep_contacts, "create_contacts_bulk", create_contacts_bulk)
+    return rows
+
+
+async def run_import(data: bytes, format: str = "csv"):
+    upload = UploadFile(file=io.BytesIO(data), filename=f"contacts.{format}")
+    return await ContactImport(db=None, user=SimpleNamespace(id=1)).run(upload, format)
+
+
+async def test_row_errors_are_reported_with_line_numbers(inserted):
+    data = HEADER + row(1) + row(2, phone_number="12ab") + row(3, email="taken@example.com") + row(1)
+    report = await run_import(data.encode())
+    assert (report.total, report.inserted, report.failed) == (4, 1, 3)
+    assert [(error.row, error.detail.split(":")[0]) for error in report.errors] == [
+        (3, "phone_number"), (5, "Duplicate email in the file"), (4, "Contact with this email already exists")]
+    assert report.aborted is None and not report.truncated
+
+
+async def test_ndjson_invalid_lines(inserted):
+    data = b'{"first_name": "Anna", "last_name": "Smith", "email": "a@example.com", ' \
+           b'"phone_number": "380501234567", "birth_date": "15.01.1990"}\n\n[1, 2]\n{oops\n'
+    report = await run_import(data, "ndjson")
+    assert report.inserted == 1
+    assert [(error.row, error.detail[:12]) for error in report.errors] == [(3, "Each line mu"), (4, "Invalid JSON")]
+
+
+async def test_ndjson_non_string_email(inserted):
+    valid = b'{"first_name": "Anna", "last_name": "Smith", "email": "a@example.com", ' \
+            b'"phone_number": "380501234567", "birth_date": "15.01.1990"}\n'
+    data = valid + b'{"email": 123, "first_name": "Anna"}\n{"email": ["a@example.com"]}\n' \
+                   b'{"email": "b@example.com", "first_name": 5}\n'
+    report = await run_import(data, "ndjson")
+    assert (report.total, report.inserted, report.failed) == (4, 1, 3)
+    assert [(error.row, error.email) for error in report.errors] == [(2, None), (3, None), (4, "b@example.com")]
+    assert "email" in report.errors[0].detail
+
+
+async def test_non_utf8_file_is_aborted(inserted):
+    # файл декодується блоками, тож битi байти ставимо далеко вiд початку
+    valid = HEADER + "".join(row(i) for i in range(500))
+    data = valid.encode() + "Ганна,Smith,x@example.com,380501234567,1990.01.15\n".encode("cp1251")
+    report = await run_import(data)
+    assert report.aborted is not None and "UTF-8" in report.aborted
+    # рядки до битого мiсця вже iмпортовано
+    assert 0 < report.inserted == report.total < 500
+    assert report.failed == 0
+
+
+async def test_malformed_csv_is_aborted(inserted):
+    data = (HEADER + row(1) + "Anna,Smith," + "x" * 200_000 + ",1,1990.01.15\n").encode()
+    report = await run_import(data)
+    assert report.aborted.startswith("Malformed CSV")
+    assert report.inserted == 1
+
+
+async def test_row_limit_truncates_without_failing_rows(inserted, monkeypatch):
+    monkeypatch.setattr(config, "CONTACTS_IMPORT_MAX_ROWS", 2)
+    monkeypatch.setattr(config, "CONTACTS_IMPORT_BATCH_SIZE", 2)
+    report = await run_import((HEADER + row(1) + row(2) + row(3) + row(4)).encode())
+    assert (report.total, report.inserted, report.failed) == (2, 2, 0)
+    assert report.truncated and report.errors == []
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import pytest
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+
+from src.services import email_templates as module
+from src.services.email_templates import EmailTemplates
+
+TEMPLATES = Path(module.__file__).parent / "templates"
+
+CONTEXTS = [
+    {"username": "alice", "host": "http://localhost:8000/", "token": "abc.def"},
+    {"username": "<script>alert('x')</script>", "host": "http://a/?x=1&y=2", "token": '"quoted"'},
+    {"username": "Олена & Co", "host": "", "token": 42},
+]
+
+
+def reference(folder: Path, name: str, context: dict) -> str:
+    env = Environment(loader=FileSystemLoader(folder), autoescape=select_autoescape(["html", "xml"]))
+    return env.get_template(name).render(context)
+
+
+@pytest.fixture
+def folder(tmp_path):
+    (tmp_path / "plain.html").write_text("<p>Hi {{ username }}, {{ host }}{{ username }}</p>")
+    # умова над змiнною - фрагменти не годяться, шаблон має рендеритися звичайним шляхом
+    (tmp_path / "logic.html").write_text("{% if admin %}<b>{{ username|upper }}</b>{% else %}{{ username }}{% endif %}")
+    (tmp_path / "plain.txt").write_text("Hi {{ username }}")
+    return tmp_path
+
+
+def test_verify_email_matches_jinja():
+    templates = EmailTemplates(TEMPLATES, preload=["verify_email.html"])
+    for context in CONTEXTS:
+        assert templates.render("verify_email.html", context) == reference(TEMPLATES, "verify_email.html", context)
+    assert templates.render_many("verify_email.html", CONTEXTS) == [
+        reference(TEMPLATES, "verify_email.html", context) for context in CONTEXTS]
+
+
+def test_user_fields_are_escaped(folder):
+    templates = EmailTemplates(folder)
+    html = templates.render("plain.html", {"username": "<script>x</script>", "host": "a&b"})
+    assert "<script>" not in html
+    assert html == "<p>Hi &lt;script&gt;x&lt;/script&gt;, a&amp;b&lt;script&gt;x&lt;/script&gt;</p>"
+    # без autoescape (не html) значення пiдставляються як є - так само, як у Jinja
+    assert templates.render("plain.txt", {"username": "<b>"}) == "Hi <b>"
+
+
+def test_logic_falls_back_to_jinja(folder):
+    templates = EmailTemplates(folder)
+    contexts = [{"username": "<i>bob</i>", "admin": True}, {"username": "<i>bob</i>", "admin": False}]
+    assert templates.fragments("logic.html", ("admin", "username")) is None
+    assert templates.render_many("logic.html", contexts) == [
+        reference(folder, "logic.html", context) for context in contexts]
+
+
+def test_render_many_with_mixed_variables(folder):
+    templates = EmailTemplates(folder)
+    contexts = [{"username": "a", "host": "h"}, {"username": "b"}, {"username": "<c>", "host": "&"}]
+    assert templates.render_many("plain.html", contexts) == [
+        reference(folder, "plain.html", context) for context in contexts]
+    assert templates.render_many("plain.html", contexts) == [templates.render("plain.html", context)
+                                                             for context in contexts]
@@ -0,0 +1,117 @@
+import json
+import time
+
+import aiosmtplib
+import pytest
+
+from src.services.email_queue import EmailQueue
+from src.workers.email_worker import EmailWorker, is_permanent
+
+pytestmark = pytest.mark.anyio
+
+
+class FakeSMTP:
+    """ SMTP-з'єднання, що вiдповiдає заздалегiдь заданими результатами: None - лист прийнято. """
+
+    def __init__(self, outcomes: list):
+        self.outcomes = outcomes
+        self.sent = []
+        self.connects = 0
+        self.is_connected = True
+
+    async def send_message(self, message):
+        outcome = self.outcomes.pop(0) if self.outcomes else None
+        if outcome is not None:
+            raise outcome
+        self.sent.append(message["To"])
+
+
+@pytest.fixture
+async def queue(redis):
+    queue = EmailQueue(redis, stream="mail", group="senders", retry_key="mail:retry", dead_stream="mail:dead")
+    await queue.ensure_group()
+    return queue
+
+
+def make_worker(queue: EmailQueue, smtp: FakeSMTP) -> EmailWorker:
+    worker = EmailWorker(queue, "worker-1", batch_size=10, retry_base=0.01, retry_max=0.01)
+
+    async def connect():
+        smtp.connects += 1
+        return smtp
+
+    async def close():
+        pass
+    worker.smtp = connect
+    worker.close = close
+    return worker
+
+
+async def enqueue(queue: EmailQueue, count: int) -> list[tuple[str, dict]]:
+    for i in range(count):
+        await queue.enqueue(recipient=f"user{i}@example.com", subject="Confirm", template="verify_email.html",
+                            body={"host": "http://test/", "username": f"user{i}", "token": "t"})
+    return await queue.read("worker-1", count=count, block_ms=10, claim_idle_ms=60_000)
+
+
+def refused(code: int) -> aiosmtplib.SMTPRecipientsRefused:
+    return aiosmtplib.SMTPRecipientsRefused([aiosmtplib.SMTPRecipientRefused(code, "no", "user@example.com")])
+
+
+def test_classification_by_reply_code():
+    assert is_permanent(refused(550)) and is_permanent(aiosmtplib.SMTPDataError(554, "rejected"))
+    assert not is_permanent(refused(450)) and not is_permanent(aiosmtplib.SMTPDataError(451, "try later"))
+    assert not is_permanent(aiosmtplib.SMTPSenderRefused(421, "busy", "from@example.com"))
+    assert not is_permanent(aiosmtplib.SMTPException("unknown"))
+
+
+async def test_greylisting_is_retried_and_hard_bounce_dead_lettered(queue, redis):
+    messages = await enqueue(queue, 3)
+    smtp = FakeSMTP([refused(451), refused(550), None])
+    assert await make_worker(queue, smtp).send_batch(messages) == 1
+    assert smtp.sent == ["user2@example.com"]
+    assert await redis.zcard("mail:retry") == 1
+    dead = await redis.xrange("mail:dead")
+    assert len(dead) == 1 and dead[0][1][b"recipient"] == b"user1@example.com"
+    assert (await redis.xpending("mail", "senders"))["pending"] == 0
+
+
+async def test_each_message_is_acked_after_sending(queue, redis):
+    messages = await enqueue(queue, 3)
+    worker = make_worker(queue, FakeSMTP([]))
+    acked = []
+    ack = queue.ack
+
+    async def recording_ack(message_ids):
+        # до вiдправки наступного листа попереднiй вже не у PEL
+        acked.append((list(message_ids), (await redis.xpending("mail", "senders"))["pending"]))
+        await ack(message_ids)
+    queue.ack = recording_ack
+    await worker.send_batch(messages)
+    assert [pending for _, pending in acked] == [3, 2, 1]
+    assert [ids for ids, _ in acked] == [[message_id] for message_id, _ in messages]
+
+
+async def test_connection_error_postpones_rest_of_batch(queue, redis):
+    messages = await enqueue(queue, 4)
+    smtp = FakeSMTP([None, aiosmtplib.SMTPConnectError("refused")])
+    assert await make_worker(queue, smtp).send_batch(messages) == 1
+    # пiсля першої ж помилки з'єднання решта пачки вже не пробує перепiдключатися
+    assert smtp.connects == 2
+    assert (await redis.xpending("mail", "senders"))["pending"] == 0
+    retried = [json.loads(member) for member in await redis.zrange("mail:retry", 0, -1)]
+    # спроба була лише у першого листа, решта просто вiдкладена
+    assert sorted(int(fields["attempts"]) for fields in retried) == [0, 0, 1]
+
+
+async def test_promote_due_moves_messages_back(queue, redis):
+    messages = await enqueue(queue, 2)
+    for message_id, fields in messages:
+        await queue.retry(message_id, fields, 0)
+    await redis.zadd("mail:retry", {b'{"recipient": "later@example.com"}': time.time() + 3600})
+    assert await queue.promote_due() == 2
+    assert await queue.promote_due() == 0
+    assert await redis.zcard("mail:retry") == 1
+    promoted = await queue.read("worker-1", count=10, block_ms=10, claim_idle_ms=60_000)
+    assert sorted(fields["recipient"] for _, fields in promoted) == ["user0@example.com", "user1@example.com"]
+    assert all("origin" not in fields for _, fields in promoted)
@@ -0,0 +1,69 @@
+import fakeredis
+import pytest
+
+from src.services.etag import ContactETags
+from src.services.generations import ContactGenerations, GenerationsUnavailable
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def server():
+    return fakeredis.FakeServer()
+
+
+@pytest.fixture
+async def generations(server):
+    client = fakeredis.FakeAsyncRedis(server=server)
+    yield ContactGenerations(client)
+    await client.close()
+
+
+async def test_bump_changes_owner_and_global(generations):
+    assert await generations.get(1) == (0, 0)
+    await generations.bump(1)
+    await generations.bump(1)
+    await generations.bump(2)
+    assert (await generations.get(1))[0] == 2
+    assert (await generations.get(2))[0] == 1
+    assert (await generations.get(ContactGenerations.GLOBAL))[0] == 3
+
+
+async def test_etag_changes_with_generation(generations):
+    etags = ContactETags(generations)
+    first = await etags.etag(1, "page", 10)
+    assert first == await etags.etag(1, "page", 10)
+    assert first != await etags.etag(1, "page", 20)
+    await generations.bump(2)
+    assert first == await etags.etag(1, "page", 10)
+    await generations.bump(1)
+    assert first != await etags.etag(1, "page", 10)
+
+
+async def test_no_etag_until_replicas_settle(generations):
+    etags = ContactETags(generations, settle=60)
+    assert await etags.etag(1) is not None
+    await generations.bump(1)
+    assert await etags.etag(1) is None
+
+
+async def test_failed_bump_disables_etags_until_retried(generations, server):
+    etags = ContactETags(generations)
+    before = await etags.etag(1)
+    server.connected = False
+    # запис у БД вже пройшов - bump не падає, але й стару версiю бiльше не видаємо
+    await generations.bump(1)
+    server.connected = True
+    assert await etags.etag(1) != before
+    assert generations._pending == set()
+    assert (await generations.get(1))[0] == 1
+
+
+async def test_get_fails_while_bump_cannot_be_retried(generations, server):
+    server.connected = False
+    await generations.bump(1)
+    with pytest.raises(GenerationsUnavailable):
+        await generations.get(1)
+    assert await ContactETags(generations).etag(1) is None
+    server.connected = True
+    assert (await generations.get(ContactGenerations.GLOBAL))[0] == 1
@@ -0,0 +1,28 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+
+from src.services.pagination import decode_cursor, encode_cursor, next_cursor
+
+
+@pytest.mark.parametrize("last_id", [1, 42, 2**31 + 5])
+def test_cursor_roundtrip(last_id):
+    cursor = encode_cursor(last_id)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == last_id
+
+
+@pytest.mark.parametrize("cursor", ["", "!!!", encode_cursor(1)[:-2], "eyJpZCI6ImEifQ", "eyJ4IjoxfQ"])
+def test_invalid_cursor_is_400(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_next_cursor_only_for_full_page():
+    items = [SimpleNamespace(id=3), SimpleNamespace(id=9)]
+    assert next_cursor(items, limit=3) is None
+    assert decode_cursor(next_cursor(items, limit=2)) == 9
+    # словники з проекцiї (get_contact_rows) так само
+    assert decode_cursor(next_cursor([{"id": 5}], limit=1)) == 5
@@ -0,0 +1,29 @@
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+
+from src.services.passwords import PasswordPool
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_running_and_queued_jobs_are_counted():
+    pool = PasswordPool(workers=1, queue_size=1)
+    release = threading.Event()
+    try:
+        first = asyncio.create_task(pool.run(release.wait, 5))
+        second = asyncio.create_task(pool.run(release.wait, 5))
+        await asyncio.sleep(0.05)
+        assert (pool._pending, pool._running) == (2, 1)
+        # обидва мiсця зайнятi - третiй запит одразу отримує 503
+        with pytest.raises(HTTPException) as error:
+            await pool.run(release.wait, 5)
+        assert error.value.status_code == 503
+        release.set()
+        assert await asyncio.gather(first, second) == [True, True]
+        assert (pool._pending, pool._running) == (0, 0)
+    finally:
+        release.set()
+        pool.shutdown()
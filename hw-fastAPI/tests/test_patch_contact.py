@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql
+
+from src.entity.models import Role
+from src.repository import contacts as rep_contacts
+from src.schemas.contact import ContactPatchSchema
+
+pytestmark = pytest.mark.anyio
+
+USER = SimpleNamespace(id=3, username="kobzar", email="kobzar@example.com", role=Role.user, avatar=None)
+ROW = {"id": 7, "first_name": "Taras", "crm_status": "operational"}
+
+
+class RecordingSession:
+    # замiсть Postgres: запам'ятовує виконанi запити i повертає один рядок (або жодного)
+    def __init__(self, row: dict | None = ROW):
+        self.row = row
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, statement):
+        self.statements.append(statement)
+        return SimpleNamespace(mappings=lambda: SimpleNamespace(one_or_none=lambda: self.row))
+
+    async def commit(self):
+        self.commits += 1
+
+
+@pytest.fixture(autouse=True)
+def generations(monkeypatch):
+    bumped = []
+
+    async def bump(owner):
+        bumped.append(owner)
+    monkeypatch.setattr(rep_contacts.contact_generations, "bump", bump)
+    return bumped
+
+
+def set_columns(statement) -> set[str]:
+    sql = str(statement.compile(dialect=postgresql.dialect()))
+    assignments = sql.split(" SET ", 1)[1].split(" WHERE ", 1)[0]
+    return {assignment.split("=")[0].strip() for assignment in assignments.split(",")}
+
+
+async def test_patch_updates_only_sent_fields(generations):
+    db = RecordingSession()
+    body = ContactPatchSchema.model_validate({"first_name": "Taras", "crm_status": "analitic"})
+    contact = await rep_contacts.patch_contact(7, body, db, USER)
+    # <updated_at> додає сам onupdate моделi
+    assert set_columns(db.statements[0]) == {"first_name", "crm_status", "updated_at"}
+    assert contact["user"]["id"] == USER.id
+    assert db.commits == 1 and generations == [USER.id]
+
+
+async def test_empty_patch_reads_without_writing(generations):
+    db = RecordingSession()
+    contact = await rep_contacts.patch_contact(7, ContactPatchSchema.model_validate({}), db, USER)
+    assert contact["id"] == 7
+    assert str(db.statements[0]).startswith("SELECT")
+    assert db.commits == 0 and generations == []
+
+
+async def test_patch_missing_contact(generations):
+    body = ContactPatchSchema.model_validate({"first_name": "Taras"})
+    assert await rep_contacts.patch_contact(7, body, RecordingSession(row=None), USER) is None
+    assert generations == []
+
+
+def test_explicit_null_is_rejected():
+    with pytest.raises(ValidationError):
+        ContactPatchSchema.model_validate({"first_name": None})
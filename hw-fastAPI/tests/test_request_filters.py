@@ -0,0 +1,77 @@
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, WebSocket
+from fastapi.testclient import TestClient
+
+from src.services.blocklist import IPBlocklist
+from src.services.request_filters import RequestFilterMiddleware, ip_filter, user_agent_filter
+from src.services.user_agents import UserAgentFilter
+
+BANNED_IP = "203.0.113.7"
+BOT = "Mozilla/5.0 (compatible; YandexBot/3.0)"
+
+
+def client_from_header(app):
+    # TestClient завжди приходить з адреси "testclient", тож адреса клiєнта пiдставляється з заголовка
+    async def wrapper(scope, receive, send):
+        if scope["type"] in ("http", "websocket"):
+            for key, value in scope["headers"]:
+                if key == b"x-client-ip":
+                    scope = {**scope, "client": (value.decode(), 50000)}
+        await app(scope, receive, send)
+    return wrapper
+
+
+def make_app():
+    started = []
+
+    @asynccontextmanager
+    async def lifespan(app):
+        started.append(True)
+        yield
+
+    app = FastAPI(lifespan=lifespan)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.websocket("/ws")
+    async def websocket(ws: WebSocket):
+        await ws.accept()
+        await ws.send_text("hello")
+        await ws.close()
+
+    app.add_middleware(RequestFilterMiddleware, filters=[ip_filter(IPBlocklist(["203.0.113.0/24"])),
+                                                         user_agent_filter(UserAgentFilter([r"yandexbot"]))])
+    return app, started
+
+
+def test_blocked_requests_get_the_same_403():
+    app, _ = make_app()
+    client = TestClient(client_from_header(app))
+    by_ip = client.get("/ping", headers={"x-client-ip": BANNED_IP})
+    by_agent = client.get("/ping", headers={"user-agent": BOT})
+    for response in (by_ip, by_agent):
+        assert response.status_code == 403
+        assert response.json() == {"detail": "You are banned"}
+        assert response.headers["content-type"] == "application/json"
+        assert int(response.headers["content-length"]) == len(response.content)
+    assert by_ip.content == by_agent.content
+
+
+def test_allowed_requests_reach_the_app():
+    app, _ = make_app()
+    client = TestClient(client_from_header(app))
+    assert client.get("/ping", headers={"x-client-ip": "198.51.100.1"}).json() == {"ok": True}
+    # без User-Agent i з адресою, що не є IP ("testclient"), запит теж проходить
+    assert client.get("/ping", headers={"user-agent": ""}).json() == {"ok": True}
+
+
+def test_lifespan_and_websocket_pass_through():
+    app, started = make_app()
+    with TestClient(client_from_header(app)) as client:
+        assert started == [True]
+        # фiльтри перевiряють лише HTTP-запити
+        with client.websocket_connect("/ws", headers={"user-agent": BOT, "x-client-ip": BANNED_IP}) as ws:
+            assert ws.receive_text() == "hello"
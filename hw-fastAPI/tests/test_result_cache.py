@@ -0,0 +1,70 @@
+import orjson
+import pytest
+from pydantic import TypeAdapter
+
+from src.services.generations import ContactGenerations
+from src.services.result_cache import ResultCache
+
+pytestmark = pytest.mark.anyio
+
+adapter = TypeAdapter(list[int])
+
+
+@pytest.fixture
+def generations(redis):
+    return ContactGenerations(redis)
+
+
+def counter(result):
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        return result
+    return compute, calls
+
+
+async def test_hit_until_generation_changes(redis, generations):
+    cache = ResultCache(redis, generations)
+    compute, calls = counter([1, 2])
+    for _ in range(3):
+        response = await cache.get_or_compute("search", {"q": "a"}, compute, adapter)
+        assert orjson.loads(response.body) == [1, 2]
+    assert len(calls) == 1
+    await cache.get_or_compute("search", {"q": "b"}, compute, adapter)
+    assert len(calls) == 2
+    await generations.bump(7)
+    await cache.get_or_compute("search", {"q": "a"}, compute, adapter)
+    assert len(calls) == 3
+
+
+async def test_key_is_shared_between_users(redis, generations):
+    cache = ResultCache(redis, generations)
+    # параметри нормалiзуються, користувача у ключi немає
+    assert cache.key("search", 3, {"q": "a", "limit": 5}) == cache.key("search", 3, {"limit": 5, "q": "a"})
+    assert cache.key("search", 3, {"q": "a"}) != cache.key("search", 4, {"q": "a"})
+
+
+async def test_not_stored_while_replicas_may_lag(redis, generations):
+    cache = ResultCache(redis, generations, settle=60)
+    compute, calls = counter([1])
+    await cache.get_or_compute("search", {"q": "a"}, compute, adapter)
+    await cache.get_or_compute("search", {"q": "a"}, compute, adapter)
+    assert len(calls) == 1
+    await generations.bump(7)
+    await cache.get_or_compute("search", {"q": "a"}, compute, adapter)
+    await cache.get_or_compute("search", {"q": "a"}, compute, adapter)
+    assert len(calls) == 3
+
+
+async def test_bypassed_while_generations_unavailable(redis, generations):
+    cache = ResultCache(redis, generations)
+    compute, calls = counter([1])
+    await cache.get_or_compute("search", {"q": "a"}, compute, adapter)
+    generations._pending.add(7)
+
+    async def broken(*args, **kwargs):
+        raise ConnectionError("Redis is down")
+    generations._increment = broken
+    await cache.get_or_compute("search", {"q": "a"}, compute, adapter)
+    assert len(calls) == 2
@@ -0,0 +1,63 @@
+import time
+
+import pytest
+
+from src.services.revocation import TokenRevocation
+
+pytestmark = pytest.mark.anyio
+
+EMAIL = "user@example.com"
+
+
+@pytest.fixture
+async def revocation(redis):
+    return TokenRevocation(redis)
+
+
+async def test_rotation_replaces_current_jti(revocation, redis):
+    exp = time.time() + 3600
+    await revocation.start_family(EMAIL, "fam1", "jti1", exp)
+    assert await revocation.rotate(EMAIL, "fam1", "jti1", "jti2", exp) == TokenRevocation.ROTATED
+    assert await redis.get("refresh:fam:fam1") == b"jti2"
+    # вже ротований токен бiльше не поточний
+    assert await revocation.rotate(EMAIL, "fam1", "jti1", "jti3", exp) == TokenRevocation.REUSED
+    assert await redis.get("refresh:fam:fam1") == b"jti2"
+
+
+async def test_rotation_keeps_family_in_user_set(revocation, redis):
+    await revocation.start_family(EMAIL, "fam1", "jti1", time.time() + 60)
+    # множина користувача протухла б разом з першим токеном, ротацiя продовжує її до нового <exp>
+    await revocation.rotate(EMAIL, "fam1", "jti1", "jti2", time.time() + 3600)
+    assert await redis.smembers(f"refresh:user:{EMAIL}") == {b"fam1"}
+    assert await redis.ttl(f"refresh:user:{EMAIL}") > 60
+
+    await redis.delete(f"refresh:user:{EMAIL}")
+    await revocation.rotate(EMAIL, "fam1", "jti2", "jti3", time.time() + 3600)
+    assert await redis.smembers(f"refresh:user:{EMAIL}") == {b"fam1"}
+
+
+async def test_revoked_family_cannot_rotate(revocation):
+    exp = time.time() + 3600
+    await revocation.start_family(EMAIL, "fam1", "jti1", exp)
+    await revocation.revoke_family("fam1", 3600)
+    assert await revocation.rotate(EMAIL, "fam1", "jti1", "jti2", exp) == TokenRevocation.REVOKED
+    assert await revocation.is_revoked("access-jti", "fam1")
+    assert not await revocation.is_revoked("access-jti", "fam2")
+
+
+async def test_revoke_user_closes_all_families(revocation, redis):
+    exp = time.time() + 3600
+    await revocation.start_family(EMAIL, "fam1", "jti1", exp)
+    await revocation.start_family(EMAIL, "fam2", "jti2", exp)
+    await revocation.start_family("other@example.com", "fam3", "jti3", exp)
+    await revocation.revoke_user(EMAIL, 3600)
+    assert await revocation.is_revoked("a", "fam1") and await revocation.is_revoked("a", "fam2")
+    assert not await revocation.is_revoked("a", "fam3")
+    assert await revocation.rotate(EMAIL, "fam2", "jti2", "jti4", exp) == TokenRevocation.REVOKED
+    assert not await redis.exists(f"refresh:user:{EMAIL}")
+
+
+async def test_revoked_jti(revocation):
+    await revocation.revoke("jti1", time.time() + 60)
+    assert await revocation.is_revoked("jti1", None)
+    assert not await revocation.is_revoked("jti2", None)
@@ -0,0 +1,29 @@
+import pytest
+from redis.exceptions import ConnectionError
+
+from src.services import send_email as send_email_module
+from src.services.metrics import metrics
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_enqueue_failure_does_not_raise(monkeypatch):
+    async def enqueue(**kwargs):
+        raise ConnectionError("Redis is down")
+
+    monkeypatch.setattr(send_email_module.email_queue, "enqueue", enqueue)
+    before = metrics.snapshot()["counters"].get("email.enqueue_errors", 0)
+    assert await send_email_module.send_email("user@example.com", "user", "http://test/") is False
+    assert metrics.snapshot()["counters"]["email.enqueue_errors"] == before + 1
+
+
+async def test_enqueue_success(monkeypatch):
+    queued = []
+
+    async def enqueue(**kwargs):
+        queued.append(kwargs)
+        return "1-0"
+
+    monkeypatch.setattr(send_email_module.email_queue, "enqueue", enqueue)
+    assert await send_email_module.send_email("user@example.com", "user", "http://test/") is True
+    assert queued[0]["recipient"] == "user@example.com" and queued[0]["body"]["token"]
@@ -0,0 +1,45 @@
+import time
+
+from src.services.cache import TokenCache
+
+
+def claims(subject: str, ttl: float = 60) -> dict:
+    return {"sub": subject, "exp": time.time() + ttl}
+
+
+def test_cached_until_exp():
+    cache = TokenCache()
+    cache.put("token-a", claims("anna@example.com"))
+    cache.put("token-expired", claims("anna@example.com", ttl=-1))
+    assert cache.get("token-a")["sub"] == "anna@example.com"
+    assert cache.get("token-expired") is None
+    cache.evict("token-a")
+    assert cache.get("token-a") is None
+
+
+def test_evict_subject():
+    cache = TokenCache()
+    cache.put("token-a", claims("anna@example.com"))
+    cache.put("token-b", claims("anna@example.com"))
+    cache.put("token-c", claims("bob@example.com"))
+    cache.evict_subject("anna@example.com")
+    assert cache.get("token-a") is None and cache.get("token-b") is None
+    assert cache.get("token-c") is not None
+
+
+def test_subject_index_is_bounded_by_cache():
+    cache = TokenCache(maxsize=10)
+    for i in range(1000):
+        cache.put(f"token-{i}", claims(f"user{i}@example.com"))
+    # витiсненi з L1 токени прибираються й з iндексу <sub>
+    assert len(cache.local) == 10
+    assert sum(map(len, cache._by_subject.values())) == 10
+    assert set(cache._by_subject) == {f"user{i}@example.com" for i in range(990, 1000)}
+
+
+def test_expired_tokens_leave_the_index():
+    cache = TokenCache()
+    cache.put("token-a", claims("anna@example.com", ttl=0.01))
+    time.sleep(0.02)
+    assert cache.get("token-a") is None
+    assert cache._by_subject == {}
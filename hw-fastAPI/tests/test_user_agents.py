@@ -0,0 +1,47 @@
+from src.services.user_agents import UserAgentFilter
+
+BOT = "Mozilla/5.0 (compatible; YandexBot/3.0; +http://yandex.com/bots)"
+BROWSER = "Mozilla/5.0 (X11; Linux x86_64) Firefox/120.0"
+
+
+def test_ban_and_allow():
+    user_agents = UserAgentFilter([r"yandexbot", r"yandex-bot", r"^curl/"])
+    assert user_agents.is_banned(BOT)
+    assert user_agents.is_banned("curl/8.4.0")
+    assert not user_agents.is_banned(BROWSER)
+    # шаблон з якорем не спрацьовує всерединi рядка
+    assert not user_agents.is_banned("libcurl/8.4.0")
+
+
+def test_missing_header_is_allowed():
+    user_agents = UserAgentFilter([r"yandexbot"])
+    assert not user_agents.is_banned(None)
+    assert not user_agents.is_banned("")
+    assert not UserAgentFilter([]).is_banned(BOT)
+
+
+def test_case_handling():
+    assert UserAgentFilter([r"yandexbot"]).is_banned(BOT)
+    assert not UserAgentFilter([r"yandexbot"], ignore_case=False).is_banned(BOT)
+    assert UserAgentFilter([r"YandexBot"], ignore_case=False).is_banned(BOT)
+
+
+def test_results_are_cached():
+    user_agents = UserAgentFilter([r"yandexbot"], cache_size=2)
+    for _ in range(3):
+        assert user_agents.is_banned(BOT)
+    assert user_agents._cached.cache_info().hits == 2
+    # надто довгi заголовки в кеш не потрапляють
+    assert user_agents.is_banned(BOT + "x" * UserAgentFilter.MAX_CACHED_LENGTH)
+    assert user_agents._cached.cache_info().currsize == 1
+
+
+def test_cache_rebuilt_when_ban_list_changes():
+    user_agents = UserAgentFilter([r"yandexbot"])
+    assert user_agents.is_banned(BOT) and not user_agents.is_banned(BROWSER)
+    user_agents.set_patterns([r"firefox"])
+    assert user_agents._cached.cache_info().currsize == 0
+    assert not user_agents.is_banned(BOT)
+    assert user_agents.is_banned(BROWSER)
+    user_agents.set_patterns([])
+    assert not user_agents.is_banned(BROWSER)
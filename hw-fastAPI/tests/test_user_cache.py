@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+
+from src.entity.models import Role, User
+from src.services.cache import LocalTTLCache, UserCache, UserSnapshot
+
+pytestmark = pytest.mark.anyio
+
+
+def make_user(**fields) -> User:
+    values = {"id": 7, "username": "anna", "email": "anna@example.com", "role": Role.user, "avatar": None,
+              "confirmed": True, "updated_at": datetime(2024, 1, 2, 3, 4, 5)}
+    return User(**{**values, **fields})
+
+
+class Loader:
+    def __init__(self, user: User | None, delay: float = 0):
+        self.user = user
+        self.delay = delay
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return self.user
+
+
+def test_local_cache_lru_and_ttl():
+    cache = LocalTTLCache(maxsize=2, ttl=30)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    cache.set("d", 4, ttl=-1)
+    assert cache.get("d") is None
+
+
+def test_snapshot_roundtrip():
+    snapshot = UserSnapshot.from_user(make_user())
+    assert UserSnapshot.loads(snapshot.dumps()) == snapshot
+    user = snapshot.to_user()
+    assert (user.id, user.email, user.role) == (7, "anna@example.com", Role.user)
+
+
+def test_snapshot_other_version_is_miss():
+    assert UserSnapshot.loads(b'[0,7,"anna","anna@example.com",null,null,true,null]') is None
+    assert UserSnapshot.loads(b"not json") is None
+
+
+async def test_single_flight_loader(redis):
+    cache = UserCache(redis)
+    loader = Loader(make_user(), delay=0.05)
+    users = await asyncio.gather(*(cache.get_or_load("anna@example.com", loader) for _ in range(10)))
+    assert loader.calls == 1
+    assert {user.id for user in users} == {7}
+
+
+async def test_l2_hit_after_l1_eviction(redis):
+    cache = UserCache(redis)
+    loader = Loader(make_user())
+    await cache.get_or_load("anna@example.com", loader)
+    cache.local.clear()
+    user = await cache.get_or_load("anna@example.com", loader)
+    assert loader.calls == 1
+    assert user.username == "anna"
+
+
+async def test_missing_user_is_not_cached(redis):
+    cache = UserCache(redis)
+    loader = Loader(None)
+    assert await cache.get_or_load("ghost@example.com", loader) is None
+    assert await cache.get_or_load("ghost@example.com", loader) is None
+    assert loader.calls == 2
+
+
+async def test_invalidate(redis):
+    cache = UserCache(redis)
+    await cache.set("anna@example.com", make_user())
+    await cache.invalidate("anna@example.com")
+    loader = Loader(make_user(username="new"))
+    assert (await cache.get_or_load("anna@example.com", loader)).username == "new"